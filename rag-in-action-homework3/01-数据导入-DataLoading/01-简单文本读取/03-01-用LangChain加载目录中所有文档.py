@@ -39,7 +39,10 @@ nltk.download('averaged_perceptron_tagger')
 nltk.download('punkt') 
 """
 import os
-from langchain_community.document_loaders import DirectoryLoader
+from langchain_community.document_loaders import UnstructuredFileLoader
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from incremental_ingest import sync_directory
 
 # 获取当前脚本文件所在的目录
 script_dir = os.path.dirname(__file__)
@@ -47,7 +50,10 @@ print(f"获取当前脚本文件所在的目录：{script_dir}")
 # 结合相对路径构建完整路径
 data_dir = os.path.join(script_dir, '../../90-文档-Data/黑悟空')
 
-loader = DirectoryLoader(data_dir)
-docs = loader.load()
+# DirectoryLoader 默认对每个文件使用 UnstructuredFileLoader；这里按清单增量加载，只解析新增或修改的文件
+result = sync_directory(data_dir, load_file=lambda path: UnstructuredFileLoader(path).load())
+docs = result["documents"]
+print(f"新增/修改 {len(result['changed'])} 个文件，未变化 {len(result['unchanged'])} 个，"
+      f"已删除 {len(result['removed'])} 个，出错 {len(result['errors'])} 个")
 print(f"文档数：{len(docs)}")  # 输出文档总数
 print(docs[0])  # 输出第一个文档
\ No newline at end of file
@@ -1,17 +1,23 @@
-from langchain_community.document_loaders import DirectoryLoader
+from langchain_community.document_loaders import UnstructuredFileLoader
 
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from incremental_ingest import sync_directory
 # 获取当前脚本文件所在的目录
 script_dir = os.path.dirname(__file__)
 print(f"获取当前脚本文件所在的目录：{script_dir}") 
 # 结合相对路径构建完整路径
 data_dir = os.path.join(script_dir, '../../90-文档-Data/黑悟空')
 
-loader = DirectoryLoader(data_dir, 
-                         glob="**/*.md", 
-                         use_multithreading=True,
-                         show_progress=True,
-                         )
-docs = loader.load()
+# 只加载 Markdown 文件，8 个线程并行解析；未变化的文件直接读缓存
+result = sync_directory(data_dir,
+                        load_file=lambda path: UnstructuredFileLoader(path).load(),
+                        glob="**/*.md",
+                        max_workers=8,
+                        manifest_path=os.path.normpath(data_dir) + ".md.manifest.json",
+                        )
+docs = result["documents"]
+print(f"本次解析的文件：{result['changed']}")
 print(f"文档数：{len(docs)}")  # 输出文档总数
 print(docs[0])  # 输出第一个文档
\ No newline at end of file
@@ -1,6 +1,9 @@
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from langchain_community.document_loaders import TextLoader
 
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from incremental_ingest import sync_directory
 # 获取当前脚本文件所在的目录
 script_dir = os.path.dirname(__file__)
 print(f"获取当前脚本文件所在的目录：{script_dir}") 
@@ -8,9 +11,11 @@ print(f"获取当前脚本文件所在的目录：{script_dir}")
 data_dir = os.path.join(script_dir, '../../90-文档-Data/黑悟空')
 
 # 加载目录下所有 Markdown 文件
-loader = DirectoryLoader(data_dir,
-                         glob="**/*.md",
-                         loader_cls=TextLoader # 指定加载工具
-                         )
-docs = loader.load()
+result = sync_directory(data_dir,
+                        load_file=lambda path: TextLoader(path).load(),  # 指定加载工具
+                        glob="**/*.md",
+                        loader_version="text-1",  # 更换加载工具时修改版本号，所有文件会重新解析
+                        manifest_path=os.path.normpath(data_dir) + ".text-md.manifest.json",
+                        )
+docs = result["documents"]
 print(docs[0].page_content[:100])  # 打印第一个文档内容的前100个字符
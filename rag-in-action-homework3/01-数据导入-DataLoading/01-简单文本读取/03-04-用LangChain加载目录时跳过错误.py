@@ -1,17 +1,24 @@
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from langchain_community.document_loaders import TextLoader
 # 加载目录下所有文件，跳过出错文件，因为有些文件是图片，TextLoader 无法加载
+# 与 silent_errors=True 不同：每个文件的错误都会记录下来，出错的文件不写入清单，下次运行会重试
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from incremental_ingest import sync_directory
 # 获取当前脚本文件所在的目录
 script_dir = os.path.dirname(__file__)
 print(f"获取当前脚本文件所在的目录：{script_dir}") 
 # 结合相对路径构建完整路径
 data_dir = os.path.join(script_dir, '../../90-文档-Data/黑悟空')
 
-# 加载目录下所有 Markdown 文件
-loader = DirectoryLoader(data_dir,
-                          silent_errors=True,
-                         loader_cls=TextLoader
-                         )
+# 加载目录下所有文件
+result = sync_directory(data_dir,
+                        load_file=lambda path: TextLoader(path).load(),
+                        loader_version="text-1",
+                        manifest_path=os.path.normpath(data_dir) + ".text.manifest.json",
+                        )
+for path, error in result["errors"].items():
+    print(f"跳过 {path}：{error}")
 
-docs = loader.load()
+docs = result["documents"]
 print(docs[0].page_content[:100])  # 打印第一个文档内容的前100个字符
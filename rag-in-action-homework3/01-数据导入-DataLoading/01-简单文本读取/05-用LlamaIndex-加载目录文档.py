@@ -1,9 +1,21 @@
-from llama_index.core import SimpleDirectoryReader
-# 使用 SimpleDirectoryReader 加载目录中的文件
-dir_reader = SimpleDirectoryReader("90-文档-Data/黑悟空")
-documents = dir_reader.load_data()
+import os
+import sys
+from llama_index.core import Document, SimpleDirectoryReader
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from incremental_ingest import sync_directory
+
+
+def load_file(path):
+    # 单个文件交给 SimpleDirectoryReader 解析，转成 LangChain 格式以便缓存
+    return [doc.to_langchain_format() for doc in SimpleDirectoryReader(input_files=[path]).load_data()]
+
+
+# 增量加载目录中的文件：只解析新增或修改的文件，未变化的文件直接读缓存
+result = sync_directory("90-文档-Data/黑悟空", load_file=load_file, loader_version="llamaindex-1",
+                        manifest_path="90-文档-Data/黑悟空.llamaindex.manifest.json")
+documents = [Document.from_langchain_format(doc) for doc in result["documents"]]
 # 查看加载的文档数量和内容
-print(f"文档数量: {len(documents)}")
+print(f"文档数量: {len(documents)}（本次解析 {len(result['changed'])} 个文件，出错 {len(result['errors'])} 个）")
 print(documents[0].text[:100])  # 打印第一个文档的前100个字符
 
 # 仅加载某一个特定文件
@@ -12,4 +24,3 @@ documents = dir_reader.load_data()
 print(f"文档数量: {len(documents)}")
 print(documents[0].text[:100])  # 打印第一个文档的前100个字符
 
-
@@ -17,3 +17,16 @@ support_loader = JSONLoader(
 support_chars = support_loader.load()
 print(support_chars)
 
+print("\n3. 流式加载（大文件不整体读入内存，按批产出）：")
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from streaming_json_loader import StreamingJSONLoader
+stream_loader = StreamingJSONLoader(
+    file_path="90-文档-Data/灭神纪/人物角色.json",
+    jq_schema=".supportCharacters[]",
+    content_key=lambda record: "姓名：" + record["name"] + "，背景：" + record["background"],
+    metadata_func=lambda record, metadata: {**metadata, "name": record["name"]},
+)
+for batch in stream_loader.iter_batches(batch_size=2):
+    print(batch)
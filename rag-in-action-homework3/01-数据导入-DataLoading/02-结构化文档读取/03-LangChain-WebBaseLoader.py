@@ -25,3 +25,17 @@ assert len(docs) == 1
 doc = docs[0]
 print(f"{doc.metadata}\n")
 print(doc.page_content)
+
+
+# 使用带缓存的并发加载器：自动定位正文、去掉导航和页脚；响应缓存在 .web_cache，
+# 再次运行带 ETag / Last-Modified 做条件请求，mode="replay" 时完全不访问网络
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from web_loader import CachedWebLoader
+cached_loader = CachedWebLoader([page_url])
+cached_docs = cached_loader.load()
+for cached_doc in cached_docs:
+    print(f"\n{cached_doc.metadata}")
+    print(f"正文长度: {len(cached_doc.page_content)}（bodyContent: {len(doc.page_content)}）")
+print(f"失败: {cached_loader.errors}")
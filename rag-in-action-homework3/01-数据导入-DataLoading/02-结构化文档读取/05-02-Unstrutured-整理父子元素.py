@@ -1,21 +1,23 @@
+import os
+import sys
 from langchain_unstructured import UnstructuredLoader
 from typing import List
 from langchain_core.documents import Document
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from element_tree import ElementTree
 page_url = "https://zh.wikipedia.org/wiki/黑神话：悟空"
 def _get_setup_docs_from_url(url: str) -> List[Document]:
     loader = UnstructuredLoader(web_url=url)
+    # 一次遍历按 element_id 建立 标题-内容 层级：子元素不必紧跟在父元素后面，多级标题也能保留
+    tree = ElementTree(loader.load())
     setup_docs = []
-    # parent_id = None  # 初始化 parent_id
-    # current_parent = None  # 用于存储当前父元素
-    for doc in loader.load():
-        # 检查是否是 Title 或 Table
-        if doc.metadata["category"] == "Title" or doc.metadata["category"] == "Table":
-            parent_id = doc.metadata["element_id"]
-            current_parent = doc  # 更新当前父元素
-            setup_docs.append(doc)
-        elif doc.metadata.get("parent_id") == parent_id:
-            setup_docs.append((current_parent, doc))  # 将父元素和子元素一起存储
-    return setup_docs       
+    for section in tree.iter_sections(with_content_only=False):
+        parent = Document(page_content=section["title"],
+                          metadata={"category": "Title", "element_id": section["id"], "path": section["path"]})
+        setup_docs.append(parent)
+        for child in section["elements"]:
+            setup_docs.append((parent, child))  # 将父元素和子元素一起存储
+    return setup_docs
 docs = _get_setup_docs_from_url(page_url)
 for item in docs:
     if isinstance(item, tuple):
@@ -25,4 +27,3 @@ for item in docs:
     else:
         print(f'{item.metadata["category"]}: {item.page_content}')
     print("-" * 80)
-
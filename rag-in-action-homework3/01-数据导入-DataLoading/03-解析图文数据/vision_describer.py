@@ -0,0 +1,233 @@
+# vision_describer.py - 多模态页面描述：流式渲染 + 缩放 + 有界并发 + 感知哈希缓存
+import base64
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pymupdf
+from PIL import Image
+
+"""
+用视觉大模型描述 PDF / 幻灯片页面
+
+03-大模型读取图文.py 先把每一页按默认分辨率渲染成 JPEG 写到磁盘，再逐页 base64 后串行调用 gpt-4o-mini：
+- 全分辨率图片上传后会被服务端缩到 768 像素短边，多传的像素只增加编码和上传时间
+- 几十页的幻灯片逐页等待，整体耗时 = 页数 × 单次调用延迟
+- 每次运行都重新描述所有页，没改动的页也要重新付费
+
+这里：
+- 用 PyMuPDF 逐页渲染，渲染时直接按目标分辨率计算缩放比（长边不超过 MAX_LONG_SIDE、短边不超过 MAX_SHORT_SIDE，
+  与 OpenAI high detail 的有效分辨率一致），内存中编码为 JPEG，不落盘
+- 描述请求在线程池中并发执行，同时在途的页面数不超过 max_concurrency（渲染不会远远跑在调用前面）；
+  限流、超时、连接错误、5xx 按指数退避 + 随机抖动重试
+- 以图片感知哈希（dHash）+ 模型 + 提示词为键把描述缓存到 VISION_CACHE_DIR，缓存中同时记录精确指纹
+  （页面文本 + 渲染像素的 sha1）：dHash 相同但指纹不同（只改了几个字的页面）视为未命中并重新描述，
+  页面没有变化才复用缓存
+- describe_pdf_pages 是生成器，按页码顺序产出 LangChain Document
+
+使用方式：
+    from vision_describer import describe_pdf_pages
+    for doc in describe_pdf_pages("90-文档-Data/黑悟空/黑神话悟空.pdf", max_concurrency=8):
+        ...
+"""
+
+VISION_MODEL = "gpt-4o-mini"
+VISION_PROMPT = "请详细描述这张PPT幻灯片的内容，包括标题、正文和图片内容。"
+MAX_LONG_SIDE = 2048
+MAX_SHORT_SIDE = 768
+JPEG_QUALITY = 85
+HASH_SIZE = 32      # dHash 网格边长：32 -> 1024 位，同一模板、文字不同的幻灯片也能区分
+MAX_RETRIES = 5
+VISION_CACHE_DIR = ".vision_cache"
+
+
+def render_page(page, max_long=MAX_LONG_SIDE, max_short=MAX_SHORT_SIDE):
+    """
+    按目标分辨率渲染单页（不先渲染全分辨率再缩小）
+
+    返回：
+        PIL.Image: RGB 图片
+    """
+    width, height = page.rect.width, page.rect.height
+    zoom = min(max_long / max(width, height), max_short / min(width, height))
+    pix = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+
+def downscale(image, max_long=MAX_LONG_SIDE, max_short=MAX_SHORT_SIDE):
+    """
+    把已有图片缩到模型的有效分辨率以内（只缩小不放大）
+    """
+    scale = min(1.0, max_long / max(image.size), max_short / min(image.size))
+    if scale < 1.0:
+        image = image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+    return image.convert("RGB")
+
+
+def perceptual_hash(image, hash_size=HASH_SIZE):
+    """
+    dHash：灰度缩到 (hash_size+1) x hash_size，比较相邻像素明暗，得到 hash_size² 位的十六进制串
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+
+def exact_fingerprint(image, text=None):
+    """
+    精确指纹：渲染像素 + 页面文本的 sha1，像素或文字有任何改动都会变化
+    """
+    digest = hashlib.sha1(image.tobytes())
+    if text:
+        digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def encode_jpeg(image, quality=JPEG_QUALITY):
+    """
+    内存中编码为 base64 JPEG
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def call_with_retries(func, max_retries=MAX_RETRIES, base_delay=1.0):
+    """
+    对可重试的 OpenAI 错误（限流、超时、连接错误、5xx）做指数退避 + 随机抖动重试
+    """
+    import openai
+    retryable = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except retryable:
+            if attempt == max_retries:
+                raise
+            time.sleep(base_delay * 2 ** attempt * (0.5 + random.random()))
+
+
+class VisionDescriber:
+    """
+    带缓存的视觉模型页面描述器（线程安全，可在线程池中共享）
+    """
+
+    def __init__(self, client=None, model=VISION_MODEL, prompt=VISION_PROMPT, max_tokens=300,
+                 cache_dir=VISION_CACHE_DIR):
+        """
+        参数：
+            client (OpenAI): OpenAI 客户端，默认新建；重试由本类负责，客户端自身的重试关掉
+            model (str): 视觉模型名
+            prompt (str): 描述提示词
+            max_tokens (int): 单页描述的最大 token 数
+            cache_dir (str): 缓存目录，None 表示不缓存
+        """
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI(max_retries=0)
+        self.client, self.model, self.prompt, self.max_tokens = client, model, prompt, max_tokens
+        self.cache_dir = cache_dir
+        self.stats = {"cached": 0, "described": 0}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(self, image_hash):
+        key = hashlib.sha1(f"{image_hash}|{self.model}|{self.prompt}|{self.max_tokens}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def describe(self, image, text=None):
+        """
+        描述一张图片，命中缓存且精确指纹一致则不调用模型
+
+        参数：
+            image (PIL.Image): 页面图片
+            text (str): 页面文本（PDF 页的 get_text()），参与精确指纹
+
+        返回：
+            tuple: (描述文本, 是否命中缓存)
+        """
+        cache_path = fingerprint = None
+        if self.cache_dir:
+            cache_path = self._cache_path(perceptual_hash(image))
+            fingerprint = exact_fingerprint(image, text)
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry.get("fingerprint") == fingerprint:
+                with self._lock:
+                    self.stats["cached"] += 1
+                return entry["description"], True
+
+        base64_image = encode_jpeg(downscale(image))
+        response = call_with_retries(lambda: self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": [
+                {"type": "text", "text": self.prompt},
+                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}},
+            ]}],
+            max_tokens=self.max_tokens,
+        ))
+        description = response.choices[0].message.content
+        with self._lock:
+            self.stats["described"] += 1
+        if cache_path:
+            with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"model": self.model, "fingerprint": fingerprint, "description": description}, f, ensure_ascii=False)
+            os.replace(cache_path + ".tmp", cache_path)
+        return description, False
+
+
+def describe_pdf_pages(file_path, describer=None, max_concurrency=4):
+    """
+    流式渲染 PDF 页面并并发描述，按页码顺序产出 Document
+
+    参数：
+        file_path (str): PDF 路径
+        describer (VisionDescriber): 描述器，默认使用 VISION_MODEL 新建
+        max_concurrency (int): 同时在途的页面数（渲染好的图片 + 进行中的请求）
+
+    返回：
+        generator: Document，metadata 包含 source、page_number、total_pages、cached
+    """
+    from langchain_core.documents import Document
+    describer = describer or VisionDescriber()
+    slots = threading.BoundedSemaphore(max_concurrency)
+
+    def task(image, text):
+        try:
+            return describer.describe(image, text)
+        finally:
+            image.close()
+            slots.release()
+
+    with pymupdf.open(file_path) as doc, ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        total_pages = len(doc)
+        futures = []
+        next_page = 0
+        for page_number in range(total_pages):
+            slots.acquire()  # 在途页面达到上限时等待，避免把整份文档的图片都渲染到内存
+            page = doc[page_number]
+            futures.append(executor.submit(task, render_page(page), page.get_text()))
+            # 已完成的前缀页先产出
+            while next_page < len(futures) and futures[next_page].done():
+                yield _to_document(Document, futures[next_page].result(), file_path, next_page, total_pages)
+                next_page += 1
+        for page_number in range(next_page, total_pages):
+            yield _to_document(Document, futures[page_number].result(), file_path, page_number, total_pages)
+
+
+def _to_document(document_cls, result, file_path, page_number, total_pages):
+    description, cached = result
+    return document_cls(page_content=description,
+                        metadata={"source": file_path, "page_number": page_number + 1,
+                                  "total_pages": total_pages, "cached": cached})
@@ -1,8 +1,7 @@
 import pymupdf
 # 打开PDF文件
 doc = pymupdf.open("90-文档-Data/黑悟空/黑神话悟空.pdf")
-text = [page.get_text() for page in doc]
-print(text)
+# 每页文本只在下面的循环里提取一次；多页 PDF 的并行提取见 pdf_pipeline.py
 
 # 示例: 使用PyMuPDF的基础功能
 print("=== PyMuPDF 基本信息提取 ===")
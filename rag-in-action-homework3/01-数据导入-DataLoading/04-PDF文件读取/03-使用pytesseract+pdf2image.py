@@ -2,22 +2,17 @@
 # sudo apt-get install tesseract-ocr
 # sudo apt-get install tesseract-ocr-chi-sim
 
-import pdf2image
-import pytesseract
-import os
+# 原来的做法是 convert_from_path 一次把所有页面栅格化到内存、逐张保存 PNG，再顺序 OCR 全部页面，
+# 有文本层的页面也一样 OCR。现在改为 pdf_pipeline.py 中的 OCR 阶段：
+# 1. 先用 PyMuPDF 检查每页的文本层覆盖率，只有低覆盖率的页面才 OCR
+# 2. 用 first_page/last_page 一次只栅格化一页，内存占用不随页数增长
+# 3. 多个进程并行运行 Tesseract
+# 4. OCR 结果按页面内容哈希缓存在 .ocr_cache/，再次运行直接命中缓存
 
-# 创建 output 目录
-output_dir = 'output'
-os.makedirs(output_dir, exist_ok=True)
+from pdf_pipeline import iter_pdf_documents
 
-# 将 PDF 转换为图片并保存
-images = pdf2image.convert_from_path('90-文档-Data/黑悟空/黑神话悟空.pdf')
-for i, image in enumerate(images):
-    image.save(f'{output_dir}/page_{i+1}.png')
-
-# 使用 pytesseract 提取文本
-for i, image in enumerate(images):
-    text = pytesseract.image_to_string(image, lang='chi_sim')
-    print(f"第 {i+1} 页文本:")
-    print(text)
-    print("\n") 
\ No newline at end of file
+if __name__ == "__main__":
+    for doc in iter_pdf_documents('90-文档-Data/黑悟空/黑神话悟空.pdf', fallback="tesseract"):
+        print(f"第 {doc.metadata['page']} 页文本（{doc.metadata['parser']}）:")
+        print(doc.page_content)
+        print("\n")
@@ -1,7 +1,7 @@
-from unstructured.partition.auto import partition
-filename = "90-文档-Data/黑悟空/黑神话悟空.pdf"
-elements = partition(filename=filename, 
-                     content_type="application/pdf"
-                    )
-print("\n\n".join([str(el) for el in elements][:10]))
+from unstructured_partition import partition_pdf_cached
 
+# 分片在子进程中解析（spawn 方式会重新导入本脚本），脚本主体放在 main 保护下
+if __name__ == "__main__":
+    filename = "90-文档-Data/黑悟空/黑神话悟空.pdf"
+    elements = partition_pdf_cached(filename, strategy="auto")
+    print("\n\n".join([str(el) for el in elements][:10]))
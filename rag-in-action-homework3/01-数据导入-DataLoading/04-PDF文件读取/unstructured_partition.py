@@ -0,0 +1,147 @@
+# unstructured_partition.py - 按页范围分片并行 + 结果缓存的 Unstructured PDF 解析
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pymupdf
+
+"""
+Unstructured partition_pdf 的分片并行与缓存
+
+06-Unstrctured-*.py、09-Parent-Child-Unstructured-ParitionPDF.py 每次运行都对整份文件调用
+partition_pdf(strategy="hi_res")，版面检测一份文档要几分钟，只是改了后面的处理逻辑也要全部重跑。
+
+这里：
+1. 用 PyMuPDF 把 PDF 切成若干页范围（每片 PAGES_PER_SHARD 页），在进程池中并行 partition
+2. 合并：页码加上分片起始页；element_id 按 (文件哈希, 分片起点, 原 id) 重新生成，避免分片之间冲突，
+   分片内的 parent_id 按同一映射改写；分片开头没有父节点的元素挂到前一分片最后一个标题下，
+   补上被分片切断的父子关系
+3. 结果以 JSON 缓存，键为 (文件内容哈希, strategy, unstructured 版本, 其余参数)，
+   下游步骤重跑时直接读缓存，不再做版面检测
+
+使用方式：
+    from unstructured_partition import partition_pdf_cached, group_by_page
+    elements = partition_pdf_cached("90-文档-Data/山西文旅/云冈石窟-en.pdf", strategy="hi_res")
+    pages = group_by_page(elements)   # {页码: [元素, ...]}，一次遍历建好
+"""
+
+PAGES_PER_SHARD = 8
+PARTITION_CACHE_DIR = ".partition_cache"
+MERGE_VERSION = 1  # 分片合并逻辑变化时加一，使旧缓存失效
+
+
+def file_hash(file_path, chunk_size=1 << 20):
+    """
+    文件内容 SHA-256（分块读取）
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _partition_shard(file_path, start, end, strategy, partition_kwargs):
+    """
+    工作进程：把 [start, end) 页抽成临时 PDF 并 partition，返回元素字典列表
+    """
+    import io
+    from unstructured.partition.pdf import partition_pdf
+    from unstructured.staging.base import elements_to_dicts
+    with pymupdf.open(file_path) as doc, pymupdf.open() as shard:
+        shard.insert_pdf(doc, from_page=start, to_page=end - 1)
+        pdf_bytes = shard.tobytes()
+    elements = partition_pdf(file=io.BytesIO(pdf_bytes), strategy=strategy, **partition_kwargs)
+    return elements_to_dicts(elements)
+
+
+def merge_shards(shard_results, file_path, digest):
+    """
+    合并各分片的元素字典：修正页码、重写 element_id / parent_id、补跨分片的父子关系
+
+    参数：
+        shard_results (list): [(分片起始页, 元素字典列表), ...]，按起始页排序
+        file_path (str): 原始文件路径
+        digest (str): 原始文件哈希
+
+    返回：
+        list: 合并后的元素字典
+    """
+    merged = []
+    last_title_id = None
+    for start, dicts in shard_results:
+        id_map = {d["element_id"]: hashlib.sha1(f"{digest}:{start}:{d['element_id']}".encode()).hexdigest()[:32]
+                  for d in dicts}
+        seen_title = False
+        for d in dicts:
+            meta = d.setdefault("metadata", {})
+            meta["page_number"] = meta.get("page_number", 1) + start
+            meta["filename"] = os.path.basename(file_path)
+            meta["file_directory"] = os.path.dirname(os.path.abspath(file_path))
+            d["element_id"] = id_map[d["element_id"]]
+            if meta.get("parent_id") in id_map:
+                meta["parent_id"] = id_map[meta["parent_id"]]
+            elif not seen_title and d["type"] != "Title" and last_title_id:
+                meta["parent_id"] = last_title_id
+            if d["type"] == "Title":
+                seen_title = True
+                if not meta.get("parent_id"):
+                    last_title_id = d["element_id"]
+            merged.append(d)
+    return merged
+
+
+def partition_pdf_cached(file_path, strategy="hi_res", pages_per_shard=PAGES_PER_SHARD, max_workers=None,
+                         cache_dir=PARTITION_CACHE_DIR, **partition_kwargs):
+    """
+    分片并行 partition，并按 (文件哈希, strategy, 版本, 参数) 缓存结果
+
+    参数：
+        file_path (str): PDF 路径
+        strategy (str): partition_pdf 的策略（hi_res / fast / ocr_only / auto）
+        pages_per_shard (int): 每个分片的页数
+        max_workers (int): 进程数，默认 CPU 核数
+        cache_dir (str): 缓存目录，None 表示不缓存
+        partition_kwargs: 透传给 partition_pdf 的其他参数（如 infer_table_structure、languages）
+
+    返回：
+        list: unstructured Element 列表
+    """
+    import unstructured
+    from unstructured.staging.base import elements_from_dicts
+
+    digest = file_hash(file_path)
+    cache_path = None
+    if cache_dir:
+        params = json.dumps(partition_kwargs, sort_keys=True, default=str)
+        key = hashlib.sha1(f"{digest}|{strategy}|{unstructured.__version__}|{MERGE_VERSION}|{params}".encode()).hexdigest()
+        cache_path = os.path.join(cache_dir, f"{key}.json")
+        if os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return elements_from_dicts(json.load(f))
+
+    with pymupdf.open(file_path) as doc:
+        total_pages = len(doc)
+    starts = list(range(0, total_pages, pages_per_shard))
+    ends = [min(start + pages_per_shard, total_pages) for start in starts]
+    with ProcessPoolExecutor(max_workers=min(max_workers or os.cpu_count(), len(starts)) or 1) as executor:
+        shard_dicts = list(executor.map(_partition_shard, [file_path] * len(starts), starts, ends,
+                                        [strategy] * len(starts), [partition_kwargs] * len(starts)))
+    merged = merge_shards(list(zip(starts, shard_dicts)), file_path, digest)
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(merged, f, ensure_ascii=False)
+        os.replace(cache_path + ".tmp", cache_path)
+    return elements_from_dicts(merged)
+
+
+def group_by_page(elements):
+    """
+    一次遍历按页码分组，代替对每一页重复扫描整个元素列表
+    """
+    pages = {}
+    for element in elements:
+        pages.setdefault(getattr(element.metadata, "page_number", None), []).append(element)
+    return pages
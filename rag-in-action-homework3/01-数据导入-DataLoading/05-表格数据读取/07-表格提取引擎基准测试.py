@@ -0,0 +1,84 @@
+import argparse
+import glob
+import time
+from table_extractor import BACKENDS, detect_table_pages, extract_page_tables, extract_tables, to_markdown, rows_to_dataframe
+
+"""
+表格提取后端基准测试
+
+在 90-文档-Data/复杂PDF 下的样例上比较：
+1. 表格页检测：耗时、候选页数 / 总页数
+2. 单个后端（pdfplumber / camelot / unstructured）逐页串行处理所有页面：耗时、表格数、单元格数
+3. 组合引擎 extract_tables：先检测再并行、逐级回退：耗时、表格数、各后端实际用到的页数、Markdown 字符数
+
+运行方式：
+    python 07-表格提取引擎基准测试.py
+    python 07-表格提取引擎基准测试.py --pdf 90-文档-Data/复杂PDF/billionaires_page-1-5.pdf --skip unstructured
+"""
+
+
+def bench_backend(file_path, name, total_pages):
+    """
+    单个后端串行处理所有页面（与原来各脚本的做法一致）
+    """
+    start = time.perf_counter()
+    tables, cells, error = 0, 0, None
+    for page_number in range(total_pages):
+        backend, page_tables, errors = extract_page_tables(file_path, page_number, backends=(name,))
+        if name in errors:
+            error = errors[name]
+            break
+        for rows in page_tables:
+            df = rows_to_dataframe(rows)
+            tables += not df.empty
+            cells += df.size
+    return time.perf_counter() - start, tables, cells, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="表格提取后端基准测试")
+    parser.add_argument("--pdf", nargs="*", default=None, help="PDF 文件，默认 90-文档-Data/复杂PDF/*.pdf")
+    parser.add_argument("--skip", nargs="*", default=[], help="跳过的后端")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    import pymupdf
+    for file_path in args.pdf or sorted(glob.glob("90-文档-Data/复杂PDF/*.pdf")):
+        with pymupdf.open(file_path) as doc:
+            total_pages = len(doc)
+        print(f"\n=== {file_path}（{total_pages} 页）===")
+
+        start = time.perf_counter()
+        candidates = detect_table_pages(file_path)
+        print(f"表格页检测: {(time.perf_counter() - start) * 1000:.1f}ms, 候选页 {len(candidates)}/{total_pages} "
+              f"{[(p + 1, reason) for p, reason in candidates]}")
+
+        print(f"{'后端':<14}{'耗时(s)':>10}{'表格数':>8}{'单元格数':>10}")
+        for name in BACKENDS:
+            if name in args.skip:
+                continue
+            elapsed, tables, cells, error = bench_backend(file_path, name, total_pages)
+            if error:
+                print(f"{name:<14}{'失败':>10}  {error[:80]}")
+            else:
+                print(f"{name:<14}{elapsed:>10.2f}{tables:>8}{cells:>10}")
+
+        backends = tuple(name for name in BACKENDS if name not in args.skip)
+        start = time.perf_counter()
+        tables = extract_tables(file_path, backends=backends, max_workers=args.workers)
+        elapsed = time.perf_counter() - start
+        used = {}
+        for table in tables:
+            used[table["backend"]] = used.get(table["backend"], 0) + 1
+        markdown_chars = sum(len(table["markdown"]) for table in tables)
+        to_string_chars = sum(len(table["dataframe"].to_string()) for table in tables)
+        print(f"{'组合引擎':<14}{elapsed:>10.2f}{len(tables):>8}{sum(t['dataframe'].size for t in tables):>10}"
+              f"  后端 {used}")
+        print(f"文本长度: Markdown {markdown_chars} 字符, to_string {to_string_chars} 字符")
+        if tables:
+            print(f"\n第一个表格（第 {tables[0]['page']} 页, {tables[0]['backend']}）:")
+            print(to_markdown(tables[0]["dataframe"].head(5)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# table_extractor.py - PDF 表格提取：廉价的表格页检测 + 按页并行 + 后端逐级回退
+import io
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import pymupdf
+
+"""
+PDF 表格提取引擎
+
+03-01（camelot）、04-01/04-02（pdfplumber）、05-0x（unstructured）、06-01（LlamaParse）
+各自用一个库把整份文件串行跑一遍：没有表格的页面也要走完整的表格识别，
+unstructured hi_res 更是对每一页做版面检测；04-02 最后用 DataFrame.to_string() 把表格变成
+按空格对齐的长文本，列宽填充占了大量 token。
+
+这里：
+1. 检测：用 PyMuPDF 读取页面的矢量线条和文字坐标（毫秒级），
+   有足够多的表格线、或文字按列对齐的页面才认为可能有表格
+2. 提取：候选页分发到进程池，每页按 DEFAULT_BACKENDS 顺序尝试：
+     pdfplumber（lines 策略，即 lattice，最快） -> camelot（lattice，再 stream） -> unstructured hi_res（最慢，兜底）
+   某个后端没装、报错或没找到表格时回退到下一个
+3. 输出：每个表格是 pandas DataFrame（to_arrow 可转成 Arrow Table），
+   另外生成紧凑的 Markdown（不做列宽填充）用于嵌入
+
+使用方式：
+    from table_extractor import extract_tables
+    for table in extract_tables("90-文档-Data/复杂PDF/billionaires_page-1-5.pdf"):
+        table["page"], table["backend"], table["dataframe"], table["markdown"]
+"""
+
+MIN_RULING_LINES = 6      # 页面上水平/竖直线条数达到该值视为有表格线
+MIN_ALIGNED_COLUMNS = 3   # 无表格线时，至少有这么多列起点对齐
+MIN_ALIGNED_ROWS = 4      # 每个对齐的列起点至少出现在这么多行
+MIN_PAGES_FOR_POOL = 8    # 候选页少于该值时在当前进程串行提取，不启动进程池
+
+
+def detect_table_pages(file_path):
+    """
+    廉价地检测可能含表格的页面（不做任何表格识别）
+
+    返回：
+        list: [(页码(从 0 开始), 原因), ...]
+    """
+    candidates = []
+    with pymupdf.open(file_path) as doc:
+        for page in doc:
+            rulings = 0
+            for drawing in page.get_drawings():
+                for item in drawing["items"]:
+                    if item[0] == "l":
+                        p1, p2 = item[1], item[2]
+                        rulings += abs(p1.x - p2.x) < 1 or abs(p1.y - p2.y) < 1
+                    elif item[0] == "re":
+                        rect = item[1]
+                        rulings += 1 if min(rect.width, rect.height) < 2 else 4  # 细长矩形当作一条线，单元格边框算四条
+            if rulings >= MIN_RULING_LINES:
+                candidates.append((page.number, "rulings"))
+                continue
+            # 无表格线的表格：统计每行文字的起始 x 坐标，多个 x 坐标在多行重复出现即按列对齐
+            line_starts = Counter()
+            for block in page.get_text("dict")["blocks"]:
+                for line in block.get("lines", []):
+                    line_starts[round(line["bbox"][0] / 5)] += 1
+            if sum(count >= MIN_ALIGNED_ROWS for count in line_starts.values()) >= MIN_ALIGNED_COLUMNS:
+                candidates.append((page.number, "aligned_columns"))
+    return candidates
+
+
+def pdfplumber_backend(file_path, page_number):
+    """
+    pdfplumber lines 策略（lattice）：只用表格线切分单元格，速度最快
+    """
+    import pdfplumber
+    with pdfplumber.open(file_path) as pdf:
+        page = pdf.pages[page_number]
+        return page.extract_tables({"vertical_strategy": "lines", "horizontal_strategy": "lines"})
+
+
+def camelot_backend(file_path, page_number):
+    """
+    camelot：先 lattice，没找到再 stream（按文字间距推断列）
+    """
+    import camelot
+    for flavor in ("lattice", "stream"):
+        tables = camelot.read_pdf(file_path, pages=str(page_number + 1), flavor=flavor)
+        if tables.n:
+            return [table.df.values.tolist() for table in tables]
+    return []
+
+
+def unstructured_backend(file_path, page_number):
+    """
+    unstructured hi_res + infer_table_structure：只把这一页抽成临时 PDF 做版面检测
+    """
+    from unstructured.partition.pdf import partition_pdf
+    with pymupdf.open(file_path) as doc, pymupdf.open() as single:
+        single.insert_pdf(doc, from_page=page_number, to_page=page_number)
+        pdf_bytes = single.tobytes()
+    elements = partition_pdf(file=io.BytesIO(pdf_bytes), strategy="hi_res", infer_table_structure=True)
+    tables = []
+    for element in elements:
+        html = getattr(element.metadata, "text_as_html", None)
+        if element.category == "Table" and html:
+            df = pd.read_html(io.StringIO(html))[0]
+            tables.append([list(map(str, df.columns))] + df.astype(str).values.tolist())
+    return tables
+
+
+BACKENDS = {
+    "pdfplumber": pdfplumber_backend,
+    "camelot": camelot_backend,
+    "unstructured": unstructured_backend,
+}
+DEFAULT_BACKENDS = ("pdfplumber", "camelot", "unstructured")
+
+
+def rows_to_dataframe(rows):
+    """
+    表格行（list[list]）转 DataFrame：第一行各列非空时作为表头，空单元格填空字符串，丢弃全空行/列
+    """
+    rows = [["" if cell is None else str(cell).strip() for cell in row] for row in rows]
+    rows = [row for row in rows if any(row)]
+    if not rows:
+        return pd.DataFrame()
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    df = pd.DataFrame(rows)
+    df = df.loc[:, (df != "").any(axis=0)]
+    header = df.iloc[0].tolist()
+    if len(df) > 1 and all(header):
+        seen = Counter()
+        columns = []
+        for name in header:  # 重复的列名加序号
+            seen[name] += 1
+            columns.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+        df = df.iloc[1:].set_axis(columns, axis=1)
+    return df.reset_index(drop=True)
+
+
+def to_markdown(df):
+    """
+    紧凑 Markdown 表格：单元格内换行替换为空格、转义竖线，不做列宽填充
+    """
+    def cell(value):
+        return str(value).replace("\n", " ").replace("|", "\\|")
+    lines = ["| " + " | ".join(cell(c) for c in df.columns) + " |",
+             "|" + "---|" * len(df.columns)]
+    lines.extend("| " + " | ".join(cell(v) for v in row) + " |" for row in df.itertuples(index=False))
+    return "\n".join(lines)
+
+
+def to_arrow(df):
+    """
+    DataFrame 转 Arrow Table（需要 pyarrow）
+    """
+    import pyarrow as pa
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def extract_page_tables(file_path, page_number, backends=DEFAULT_BACKENDS):
+    """
+    工作进程：按顺序尝试各个后端，返回第一个找到表格的结果
+
+    返回：
+        tuple: (后端名, 表格行列表, {后端名: 错误信息})
+    """
+    errors = {}
+    for name in backends:
+        try:
+            tables = [t for t in BACKENDS[name](file_path, page_number) if t]
+        except Exception as e:  # 后端没装或解析失败：回退到下一个
+            errors[name] = f"{type(e).__name__}: {e}"
+            continue
+        if tables:
+            return name, tables, errors
+    return None, [], errors
+
+
+def extract_tables(file_path, backends=DEFAULT_BACKENDS, max_workers=None, pages=None):
+    """
+    检测表格页并按页并行提取
+
+    参数：
+        file_path (str): PDF 路径
+        backends (tuple): 后端尝试顺序（BACKENDS 的键）
+        max_workers (int): 进程数，默认 CPU 核数；候选页少于 MIN_PAGES_FOR_POOL 或为 1 时串行
+        pages (list): 指定页码（从 0 开始），None 表示自动检测
+
+    返回：
+        list: 每个表格一个 dict：page（从 1 开始）、index（页内序号）、backend、dataframe、markdown
+    """
+    if pages is None:
+        pages = [page_number for page_number, _ in detect_table_pages(file_path)]
+    if not pages:
+        return []
+    args = ([file_path] * len(pages), pages, [tuple(backends)] * len(pages))
+    if len(pages) < MIN_PAGES_FOR_POOL or max_workers == 1:
+        return _collect(pages, map(extract_page_tables, *args))
+    with ProcessPoolExecutor(max_workers=min(max_workers or os.cpu_count(), len(pages))) as executor:
+        return _collect(pages, executor.map(extract_page_tables, *args))
+
+
+def _collect(pages, page_results):
+    """
+    把每页的 (后端, 表格行列表, 错误) 整理成表格 dict 列表
+    """
+    results = []
+    for page_number, (backend, tables, _) in zip(pages, page_results):
+        for index, rows in enumerate(tables, 1):
+            df = rows_to_dataframe(rows)
+            if df.empty:
+                continue
+            results.append({"page": page_number + 1, "index": index, "backend": backend,
+                            "dataframe": df, "markdown": to_markdown(df)})
+    return results
@@ -0,0 +1,167 @@
+# element_tree.py - 线性时间构建 标题-内容 层级树（Unstructured 元素 / LangChain Document 通用）
+from collections import defaultdict
+
+"""
+标题-内容层级树
+
+09-Parent-Child-*.py 为了把正文挂到标题下，对每一页都把全部元素扫描两遍，
+标题去重用的是 title_text not in [data["title"] for data in title_dict.values()]，标题数的平方级；
+05-02-Unstrutured-整理父子元素.py 只能处理"子元素紧跟在父元素后面"的情况。
+几百页的报告按页循环时总耗时是 页数 × 元素数。
+
+这里：
+- 一次遍历所有页的元素，建立 element_id -> 节点、页码 -> 节点 两个索引，
+  再线性遍历两遍：先按 parent_id 建立标题层级，再把正文挂到所属标题下，总耗时 O(n)
+- 标题（SECTION_CATEGORIES）构成章节，正文类元素（CONTENT_CATEGORIES）挂在最近的祖先章节下，页眉页脚等忽略；
+  父元素是表格等正文元素时沿 parent_id 继续向上找（表格下的子元素不会变成孤立正文）；
+  同一父章节下文本相同的重复标题（如每页重复的页眉标题）合并为一个章节，用集合判重，O(1)
+- sections 是层级结构，iter_sections 深度优先展开，每个章节带 title / content / pages / path，
+  可以直接作为父子分块中的"父文档"（章节全文）和"子文档"（正文元素）
+- page_sections 按标题所在页取章节，只保留该页上的正文（与原脚本逐页输出的结果一致）
+
+同时支持 unstructured 的 Element（partition_pdf 的结果）和 UnstructuredLoader 产出的 LangChain Document。
+
+使用方式：
+    from element_tree import ElementTree
+    tree = ElementTree(elements)
+    tree.by_page[1]                       # 第一页的元素
+    for section in tree.iter_sections():  # 所有章节
+        print(section["path"], section["content"])
+"""
+
+SECTION_CATEGORIES = {"Title"}
+CONTENT_CATEGORIES = {"NarrativeText", "Text", "ListItem", "Table", "UncategorizedText", "FigureCaption", "Formula"}
+
+
+def element_fields(element):
+    """
+    取出元素的 (id, parent_id, 类别, 页码, 文本)，兼容 Element 和 LangChain Document
+    """
+    if hasattr(element, "page_content"):
+        meta = element.metadata
+        return (meta.get("element_id"), meta.get("parent_id"), meta.get("category"),
+                meta.get("page_number"), element.page_content)
+    meta = element.metadata
+    return (getattr(element, "id", None) or getattr(element, "_element_id", None), getattr(meta, "parent_id", None),
+            getattr(element, "category", type(element).__name__), getattr(meta, "page_number", None), element.text)
+
+
+class ElementTree:
+    """
+    按 parent_id 组织的元素树
+    """
+
+    def __init__(self, elements, dedupe_titles=True):
+        """
+        参数：
+            elements (list): Element 或 Document 列表（保持文档顺序）
+            dedupe_titles (bool): 是否合并同一父章节下文本相同的标题
+        """
+        self.nodes = {}                  # element_id -> 节点
+        self.by_page = defaultdict(list)  # 页码 -> 原始元素
+        self.sections = []               # 顶层章节
+        self.sections_by_page = defaultdict(list)  # 标题所在页码 -> 章节
+        order = []
+        # 第一遍：建立索引
+        for element in elements:
+            element_id, parent_id, category, page, text = element_fields(element)
+            node = {"id": element_id, "parent_id": parent_id, "category": category, "page": page,
+                    "text": (text or "").strip(), "element": element}
+            if element_id is not None:
+                self.nodes[element_id] = node
+            self.by_page[page].append(element)
+            order.append(node)
+
+        # 第二遍：建立章节层级（标题的父节点也是标题）
+        alias = {}       # 被合并的重复标题 id -> 保留的章节 id
+        seen = {}        # (父章节 id, 标题文本) -> 章节 id
+        sections = {}    # 章节 id -> 章节
+        for node in order:
+            if node["category"] not in SECTION_CATEGORIES or not node["text"]:
+                continue
+            parent_id = alias.get(node["parent_id"], node["parent_id"])
+            parent = sections.get(parent_id)
+            key = (parent_id if parent else None, node["text"])
+            if dedupe_titles and key in seen:
+                alias[node["id"]] = seen[key]
+                continue
+            seen[key] = node["id"]
+            section = {"id": node["id"], "title": node["text"], "page": node["page"], "pages": [node["page"]],
+                       "content": [], "content_pages": [], "elements": [], "children": []}
+            sections[node["id"]] = section
+            self.sections_by_page[node["page"]].append(section)
+            (parent["children"] if parent else self.sections).append(section)
+
+        # 第三遍：正文挂到最近的祖先章节（标题出现在正文之后也能挂上）
+        self.orphans = []  # 不属于任何章节的正文
+        enclosing = {}     # 元素 id -> 最近的祖先章节，沿途结果都缓存，每个元素只向上查找一次
+
+        def enclosing_section(element_id):
+            chain, current, found = [], element_id, None
+            while current is not None:
+                current = alias.get(current, current)
+                if current in sections:
+                    found = sections[current]
+                    break
+                if current in enclosing:
+                    found = enclosing[current]
+                    break
+                if current in chain:  # parent_id 成环
+                    break
+                chain.append(current)
+                parent_node = self.nodes.get(current)
+                current = parent_node["parent_id"] if parent_node else None
+            for visited in chain:
+                enclosing[visited] = found
+            return found
+
+        for node in order:
+            if node["category"] not in CONTENT_CATEGORIES or not node["text"]:
+                continue
+            parent = enclosing_section(node["parent_id"])
+            if parent is None:
+                self.orphans.append(node["element"])
+                continue
+            parent["content"].append(node["text"])
+            parent["content_pages"].append(node["page"])
+            parent["elements"].append(node["element"])
+            if node["page"] not in parent["pages"][-1:]:
+                parent["pages"].append(node["page"])
+        self._sections_by_id = sections
+
+    def section(self, element_id):
+        """
+        按标题的 element_id 取章节
+        """
+        return self._sections_by_id.get(element_id)
+
+    def iter_sections(self, with_content_only=True):
+        """
+        深度优先遍历所有章节
+
+        参数：
+            with_content_only (bool): 只返回有正文的章节
+
+        返回：
+            generator: 章节 dict，附加 path（从顶层标题到本标题的列表）和 depth
+        """
+        stack = [(section, [section["title"]]) for section in reversed(self.sections)]
+        while stack:
+            section, path = stack.pop()
+            if section["content"] or not with_content_only:
+                yield {**section, "path": path, "depth": len(path) - 1}
+            stack.extend((child, path + [child["title"]]) for child in reversed(section["children"]))
+
+    def page_sections(self, page_number, with_content_only=True):
+        """
+        标题在指定页上的章节，content / elements 只保留同一页上的正文（跨页章节的后续页正文不包含在内）
+        """
+        result = []
+        for section in self.sections_by_page.get(page_number, []):
+            keep = [i for i, page in enumerate(section["content_pages"]) if page == page_number]
+            if keep or not with_content_only:
+                result.append({**section,
+                               "content": [section["content"][i] for i in keep],
+                               "content_pages": [page_number] * len(keep),
+                               "elements": [section["elements"][i] for i in keep]})
+        return result
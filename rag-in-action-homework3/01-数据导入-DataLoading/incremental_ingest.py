@@ -0,0 +1,202 @@
+# incremental_ingest.py - 基于清单（manifest）的增量目录导入
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+"""
+增量目录导入
+
+03-0x-用LangChain加载目录*.py、05-用LlamaIndex-加载目录文档.py、01-RRF重排.py 的 load_documents
+每次运行都把目录下所有文件重新解析一遍；DirectoryLoader(silent_errors=True) 出错时只是静默跳过，
+不知道哪些文件没有导入，下次也不会重试。文件删除后，向量库里对应的块还留着。
+
+这里：
+- 清单文件记录每个文件的 (路径, 大小, mtime, 内容哈希, loader_version, 下游 id)
+  - 大小和 mtime 都没变：直接跳过，连哈希都不算
+  - 变了再算内容哈希：哈希没变（只是被 touch / 复制）也不重新解析
+  - loader_version 变化（换了加载器或参数）：全部重新解析
+- 需要解析的文件在线程池中并行加载，每个文件单独捕获异常，错误按文件记录在返回值里；
+  失败的文件不更新清单，下次运行会自动重试
+- 已删除文件和已修改文件的旧下游 id 交给 delete_fn 删除，新文档交给 index_fn 写入下游（向量库），
+  index_fn 返回的 id 记入清单，下次据此删除
+- 解析结果按 (相对路径, 内容哈希, loader_version) 缓存成 JSON，未变化文件的 Document 直接从缓存读取；
+  Document 带有 source 等按文件的元数据，内容相同的两个文件（副本、空文件）不能共用一份缓存
+
+使用方式：
+    from incremental_ingest import sync_directory
+    result = sync_directory("90-文档-Data/黑悟空", load_file=lambda p: TextLoader(p).load(),
+                            manifest_path="黑悟空.manifest.json", glob="**/*.md")
+    result["documents"]   # 目录下全部文档（未变化的来自缓存）
+    result["changed"], result["removed"], result["errors"]
+"""
+
+INGEST_CACHE_DIR = ".ingest_cache"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """
+    文件内容 SHA-256（分块读取）
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _dump_documents(docs, path):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump([{"page_content": d.page_content, "metadata": d.metadata} for d in docs], f,
+                  ensure_ascii=False, default=str)
+    os.replace(path + ".tmp", path)
+
+
+def _load_documents(path):
+    from langchain_core.documents import Document
+    with open(path, "r", encoding="utf-8") as f:
+        return [Document(**item) for item in json.load(f)]
+
+
+class IngestionManifest:
+    """
+    导入清单：{相对路径: {size, mtime_ns, sha256, loader_version, ids}}
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.files = json.load(f)["files"]
+
+    def save(self):
+        """
+        原子写入（先写临时文件再替换）
+        """
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f, ensure_ascii=False, indent=2)
+        os.replace(self.path + ".tmp", self.path)
+
+    def is_unchanged(self, rel_path, stat, loader_version):
+        """
+        大小、mtime、loader_version 都与清单一致
+        """
+        entry = self.files.get(rel_path)
+        return (entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+                and entry["loader_version"] == loader_version)
+
+
+def scan_directory(directory, glob="**/*"):
+    """
+    列出目录下匹配 glob 的文件（跳过隐藏文件）
+
+    返回：
+        dict: {相对路径(posix): os.stat_result}
+    """
+    root = Path(directory)
+    files = {}
+    for path in sorted(root.glob(glob)):
+        rel_path = path.relative_to(root).as_posix()
+        if path.is_file() and not any(part.startswith(".") for part in path.relative_to(root).parts):
+            files[rel_path] = path.stat()
+    return files
+
+
+def sync_directory(directory, load_file, manifest_path=None, loader_version="1", glob="**/*", max_workers=8,
+                   index_fn=None, delete_fn=None, cache_dir=INGEST_CACHE_DIR):
+    """
+    增量同步目录：只解析新增或修改的文件，删除已移除文件的下游数据
+
+    参数：
+        directory (str): 文档目录
+        load_file (callable): path -> list[Document]，单个文件的加载函数
+        manifest_path (str): 清单路径，默认 <目录>.manifest.json
+        loader_version (str): 加载器版本，加载逻辑或参数变化时修改，使所有文件重新解析
+        glob (str): 文件匹配模式
+        max_workers (int): 并行解析的线程数
+        index_fn (callable): (相对路径, docs) -> 下游 id 列表，写入向量库等；None 表示不写下游
+        delete_fn (callable): 下游 id 列表 -> None，删除已删除 / 已修改文件的旧数据
+        cache_dir (str): 解析结果缓存目录
+
+    返回：
+        dict: documents（全部文档）、changed / unchanged / removed（相对路径列表）、errors（{相对路径: 错误信息}）
+    """
+    manifest_path = manifest_path or os.path.normpath(directory) + ".manifest.json"
+    manifest = IngestionManifest(manifest_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    current = scan_directory(directory, glob)
+    candidates = [p for p, stat in current.items() if not manifest.is_unchanged(p, stat, loader_version)]
+
+    def cache_path(rel_path, sha):
+        path_key = hashlib.sha1(rel_path.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(cache_dir, f"{path_key}-{sha}-{loader_version}.json")
+
+    def parse(rel_path, sha):
+        """
+        解析一个文件、补齐 source / content_hash 并写缓存
+        """
+        docs = load_file(os.path.join(directory, rel_path))
+        for doc in docs:
+            doc.metadata.setdefault("source", os.path.join(directory, rel_path))
+            doc.metadata["content_hash"] = sha
+        _dump_documents(docs, cache_path(rel_path, sha))
+        return docs
+
+    def process(rel_path):
+        """
+        返回 (sha256, docs)；内容哈希未变时 docs 为 None
+        """
+        sha = file_sha256(os.path.join(directory, rel_path))
+        entry = manifest.files.get(rel_path)
+        if entry and entry["sha256"] == sha and entry["loader_version"] == loader_version:
+            return sha, None
+        return sha, parse(rel_path, sha)
+
+    changed, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {p: executor.submit(process, p) for p in candidates}
+        for rel_path, future in futures.items():
+            try:
+                sha, docs = future.result()
+            except Exception as e:  # 单个文件失败不影响其他文件，清单不更新，下次重试
+                errors[rel_path] = f"{type(e).__name__}: {e}"
+                continue
+            stat = current[rel_path]
+            entry = manifest.files.setdefault(rel_path, {"ids": []})
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=sha, loader_version=loader_version)
+            if docs is not None:
+                changed[rel_path] = (entry, docs)
+
+    removed = [p for p in manifest.files if p not in current]
+    stale_ids = [i for p in removed for i in manifest.files[p]["ids"]]
+    stale_ids += [i for entry, _ in changed.values() for i in entry["ids"]]
+    if delete_fn and stale_ids:
+        delete_fn(stale_ids)
+    for rel_path in removed:
+        del manifest.files[rel_path]
+    for rel_path, (entry, docs) in changed.items():
+        entry["ids"] = list(index_fn(rel_path, docs)) if index_fn else []
+    manifest.save()
+
+    documents = []
+    for rel_path in current:
+        if rel_path in errors:
+            continue
+        if rel_path in changed:
+            documents.extend(changed[rel_path][1])
+            continue
+        entry = manifest.files[rel_path]
+        cached = cache_path(rel_path, entry["sha256"])
+        if os.path.exists(cached):
+            documents.extend(_load_documents(cached))
+        else:  # 缓存被清理：重新解析这一个文件，与新解析的文件走同一路径
+            documents.extend(parse(rel_path, entry["sha256"]))
+    return {
+        "documents": documents,
+        "changed": list(changed),
+        "unchanged": [p for p in current if p not in changed and p not in errors],
+        "removed": removed,
+        "errors": errors,
+    }
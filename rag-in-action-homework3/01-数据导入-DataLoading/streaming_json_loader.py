@@ -0,0 +1,174 @@
+# streaming_json_loader.py - 流式 JSON / JSONL 文档加载（jq 风格路径投影 + 分批产出）
+import json
+import warnings
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+"""
+流式 JSON / JSONL 加载
+
+02-LangCHain-JSONLoader-JSON.py 用的 JSONLoader、混合检索脚本里的 json.load(战斗场景.json)
+都是先把整个文件读成 Python 对象再抽字段；Mivlus实现.py 的 load_jsonl 也是先构造完整列表。
+几 GB 的导出文件，Python 对象的内存占用是文件大小的数倍。
+
+这里：
+- JSONL：逐行 json.loads，同时只有一条记录在内存中
+- JSON：用 ijson 增量解析（可选依赖，pip install ijson），按 jq_schema 只产出目标数组里的记录；
+  没有安装 ijson 时退回 json.load 并给出警告
+- jq 风格路径，支持 JSONLoader 最常用的子集：
+    ".data[]"                 遍历 data 数组
+    ".mainCharacter"          取单个对象
+    ".scene_info.location"    嵌套字段
+    ".combat_details.combat_style[]"  展开数组
+  jq_schema 中最后一个 [] 之前的部分决定流式遍历哪个数组，其余部分在每条记录上求值
+- content_key / metadata_func 与 LangChain JSONLoader 的参数同名：
+  content_key 可以是路径、路径列表（取值后以空格拼接）或 record -> str 的函数
+- lazy_load 逐条产出 Document，iter_batches 按批产出，直接对接嵌入和插入
+
+使用方式：
+    from streaming_json_loader import StreamingJSONLoader, iter_json_records
+    loader = StreamingJSONLoader("战斗场景.json", jq_schema=".data[]", content_key=[".title", ".description"])
+    for batch in loader.iter_batches(64):
+        ...
+    for record in iter_json_records("eval.jsonl"):
+        ...
+"""
+
+
+def parse_path(path):
+    """
+    把 jq 风格路径切成 token 列表：".a.b[]" -> ["a", "b", "[]"]
+    """
+    tokens = []
+    for part in path.strip().lstrip(".").split("."):
+        if part.endswith("[]"):
+            if part[:-2]:
+                tokens.append(part[:-2])
+            tokens.append("[]")
+        elif part:
+            tokens.append(part)
+    return tokens
+
+
+def iter_path(value, tokens):
+    """
+    在对象上按 token 求值，[] 展开数组；缺失的字段不产出
+    """
+    if not tokens:
+        yield value
+        return
+    token, rest = tokens[0], tokens[1:]
+    if token == "[]":
+        if isinstance(value, list):
+            for element in value:
+                yield from iter_path(element, rest)
+    elif isinstance(value, dict) and token in value:
+        yield from iter_path(value[token], rest)
+
+
+def project(record, paths, sep=" "):
+    """
+    按一个或多个路径取值并拼接为文本（跳过空值，非字符串值转成 JSON）
+    """
+    if callable(paths):
+        return paths(record)
+    if isinstance(paths, str):
+        paths = [paths]
+    parts = []
+    for path in paths:
+        for value in iter_path(record, parse_path(path)):
+            if value is None or value == "":
+                continue
+            parts.append(value.strip() if isinstance(value, str) else json.dumps(value, ensure_ascii=False))
+    return sep.join(parts)
+
+
+def _ijson_prefix(tokens):
+    return ".".join("item" if token == "[]" else token for token in tokens)
+
+
+def iter_json_records(file_path, jq_schema=".[]", json_lines=None):
+    """
+    流式遍历 JSON / JSONL 文件中的记录
+
+    参数：
+        file_path (str): 文件路径
+        jq_schema (str): 记录路径；JSONL 文件按行遍历，路径作用在每一行上（默认 ".[]" 对 JSONL 表示整行）
+        json_lines (bool): 是否 JSONL，默认按扩展名判断
+
+    返回：
+        generator: 记录（dict 或其他 JSON 值）
+    """
+    if json_lines is None:
+        json_lines = str(file_path).endswith((".jsonl", ".ndjson"))
+    tokens = parse_path(jq_schema)
+
+    if json_lines:
+        line_tokens = tokens[1:] if tokens[:1] == ["[]"] else tokens
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield from iter_path(json.loads(line), line_tokens)
+        return
+
+    # 流式遍历到最后一个 [] 为止，剩余部分逐条求值
+    split = len(tokens) - tokens[::-1].index("[]") if "[]" in tokens else len(tokens)
+    stream_tokens, rest = tokens[:split], tokens[split:]
+    try:
+        import ijson
+    except ImportError:
+        warnings.warn("未安装 ijson，退回 json.load 整体解析；大文件请先 pip install ijson")
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for record in iter_path(data, stream_tokens):
+            yield from iter_path(record, rest)
+        return
+    with open(file_path, "rb") as f:
+        # ijson 前缀：key 按层级用 . 连接，数组元素记作 item，如 ".data[]" -> "data.item"
+        for record in ijson.items(f, _ijson_prefix(stream_tokens), use_float=True):
+            yield from iter_path(record, rest)
+
+
+class StreamingJSONLoader(BaseLoader):
+    """
+    流式 JSON / JSONL 文档加载器
+    """
+
+    def __init__(self, file_path, jq_schema=".[]", content_key=None, metadata_func=None, json_lines=None):
+        """
+        参数：
+            file_path (str): 文件路径
+            jq_schema (str): 记录路径
+            content_key (str | list | callable): 构造 page_content 的路径 / 路径列表 / 函数，None 表示整条记录
+            metadata_func (callable): (record, metadata) -> metadata，与 JSONLoader 相同
+            json_lines (bool): 是否 JSONL，默认按扩展名判断
+        """
+        self.file_path = str(file_path)
+        self.jq_schema = jq_schema
+        self.content_key = content_key
+        self.metadata_func = metadata_func
+        self.json_lines = json_lines
+
+    def lazy_load(self):
+        for seq_num, record in enumerate(iter_json_records(self.file_path, self.jq_schema, self.json_lines), 1):
+            if self.content_key is not None:
+                content = project(record, self.content_key)
+            else:
+                content = record if isinstance(record, str) else json.dumps(record, ensure_ascii=False)
+            metadata = {"source": self.file_path, "seq_num": seq_num}
+            if self.metadata_func:
+                metadata = self.metadata_func(record, metadata)
+            yield Document(page_content=content, metadata=metadata)
+
+    def iter_batches(self, batch_size=64):
+        """
+        按批产出 Document 列表，内存中同时只有一批
+        """
+        batch = []
+        for doc in self.lazy_load():
+            batch.append(doc)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,232 @@
+# web_loader.py - 网页加载：异步有界并发抓取 + ETag/Last-Modified 磁盘缓存 + 正文提取 + 回放模式
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+"""
+带缓存的网页加载器
+
+03-LangChain-WebBaseLoader.py、CRAG、Self-RAG、Agentic RAG 脚本都是
+[WebBaseLoader(url).load() for url in urls]：逐个 URL 串行请求，每次运行都重新下载；
+整页文本连同导航栏、侧边栏、页脚一起进入切块，块数多、噪声大；断网时脚本和测试都跑不了。
+
+这里：
+- 抓取：aiohttp 异步请求，Semaphore 限制同时在途的请求数；429 / 5xx / 连接错误按指数退避重试
+- 缓存：每个 URL 的响应体和 ETag / Last-Modified 存到 WEB_CACHE_DIR；
+  再次运行时带 If-None-Match / If-Modified-Since 做条件请求，304 直接用缓存，
+  max_age 秒内的缓存连条件请求都不发
+- 回放（mode="replay"）：完全不访问网络，只从缓存读取，没有缓存的 URL 记入 errors，
+  测试和基准测试在离线环境下结果可复现
+- 正文提取：优先用 trafilatura（可选依赖）；没有安装时用 BeautifulSoup 按 MAIN_SELECTORS
+  找正文容器，并去掉 script / nav / header / footer / aside 等模板元素
+- 连接错误、超时、5xx 重试后仍失败时，有缓存就退回旧缓存（metadata["stale"] = True）
+- 单个 URL 失败不影响其他 URL，错误记录在 loader.errors 中；调用方需要检查 errors
+
+使用方式：
+    from web_loader import CachedWebLoader
+    loader = CachedWebLoader(urls, max_concurrency=8)
+    docs = loader.load()
+    if loader.errors: ...
+    docs = CachedWebLoader(urls, mode="replay").load()   # 离线回放
+"""
+
+WEB_CACHE_DIR = ".web_cache"
+USER_AGENT = "Mozilla/5.0 (compatible; rag-in-action-loader)"
+MAIN_SELECTORS = ["article", "main", "#bodyContent", "#content", "[role=main]", ".post-content", ".entry-content"]
+BOILERPLATE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg"]
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class WebCache:
+    """
+    URL -> (响应体, 元数据) 的磁盘缓存
+    """
+
+    def __init__(self, cache_dir=WEB_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.html")
+
+    def get(self, url):
+        """
+        返回 (html, 元数据)，没有缓存时返回 (None, None)
+        """
+        meta_path, body_path = self._paths(url)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None, None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "r", encoding="utf-8") as f:
+            return f.read(), meta
+
+    def put(self, url, html, meta):
+        """
+        原子写入：先写正文再写元数据，元数据存在即表示缓存完整
+        """
+        meta_path, body_path = self._paths(url)
+        for path, content in ((body_path, html), (meta_path, json.dumps(meta, ensure_ascii=False))):
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+
+    def touch(self, url, meta):
+        """
+        304 时只更新校验时间
+        """
+        meta_path, _ = self._paths(url)
+        meta["checked_at"] = time.time()
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_path + ".tmp", meta_path)
+
+
+def extract_main_content(html, url=None):
+    """
+    提取正文
+
+    返回：
+        tuple: (标题, 正文文本, 提取器名)
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(strip=True) if soup.title else ""
+    try:
+        import trafilatura
+        text = trafilatura.extract(html, url=url, include_tables=True, include_comments=False)
+        if text:
+            return title, text, "trafilatura"
+    except ImportError:
+        pass
+
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    container = next((node for node in (soup.select_one(s) for s in MAIN_SELECTORS) if node), None)
+    container = container or soup.body or soup
+    text = container.get_text("\n", strip=True)
+    return title, re.sub(r"\n{3,}", "\n\n", text), "bs4"
+
+
+async def _fetch(session, semaphore, cache, url, max_retries, max_age):
+    """
+    单个 URL：缓存新鲜则直接返回；否则条件请求，304 用缓存，200 更新缓存；
+    连接错误、超时、5xx 重试耗尽时有缓存则返回旧缓存
+
+    返回：
+        tuple: (html, 是否来自缓存, 是否为过期缓存)
+    """
+    import aiohttp
+    cached_html, meta = cache.get(url)
+    if cached_html is not None and max_age is not None and time.time() - meta.get("checked_at", 0) < max_age:
+        return cached_html, True, False
+
+    headers = {"User-Agent": USER_AGENT}
+    if cached_html is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    async with semaphore:
+        for attempt in range(max_retries + 1):
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304 and cached_html is not None:
+                        cache.touch(url, meta)
+                        return cached_html, True, False
+                    if response.status in RETRY_STATUS and attempt < max_retries:
+                        await asyncio.sleep(2 ** attempt * (0.5 + random.random()))
+                        continue
+                    if response.status >= 500 and cached_html is not None:
+                        return cached_html, True, True
+                    response.raise_for_status()
+                    html = await response.text(errors="replace")
+                    cache.put(url, html, {
+                        "url": url,
+                        "final_url": str(response.url),
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "content_type": response.headers.get("Content-Type"),
+                        "checked_at": time.time(),
+                    })
+                    return html, False, False
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == max_retries:
+                    if cached_html is not None:
+                        return cached_html, True, True
+                    raise
+                await asyncio.sleep(2 ** attempt * (0.5 + random.random()))
+
+
+class CachedWebLoader(BaseLoader):
+    """
+    异步并发 + 磁盘缓存的网页加载器，接口与 WebBaseLoader 一致（load / lazy_load）
+    """
+
+    def __init__(self, urls, max_concurrency=8, cache_dir=WEB_CACHE_DIR, mode="revalidate", max_age=None,
+                 main_content=True, timeout=30, max_retries=3):
+        """
+        参数：
+            urls (str | list): 一个或多个 URL
+            max_concurrency (int): 同时在途的请求数
+            cache_dir (str): 缓存目录
+            mode (str): 'revalidate'（条件请求，默认）或 'replay'（只读缓存，不访问网络）
+            max_age (float): 缓存在多少秒内视为新鲜、不发请求；None 表示每次都做条件请求
+            main_content (bool): 只提取正文；False 时保留整页文本
+            timeout (float): 单个请求超时秒数
+            max_retries (int): 重试次数
+        """
+        self.urls = [urls] if isinstance(urls, str) else list(urls)
+        self.max_concurrency = max_concurrency
+        self.cache = WebCache(cache_dir)
+        self.mode = mode
+        self.max_age = max_age
+        self.main_content = main_content
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.errors = {}
+
+    async def _fetch_all(self):
+        import aiohttp
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            return await asyncio.gather(
+                *(_fetch(session, semaphore, self.cache, url, self.max_retries, self.max_age) for url in self.urls),
+                return_exceptions=True,
+            )
+
+    def _to_document(self, url, html, from_cache, stale):
+        if self.main_content:
+            title, text, extractor = extract_main_content(html, url)
+        else:
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(html, "html.parser")
+            title = soup.title.get_text(strip=True) if soup.title else ""
+            text, extractor = soup.get_text(), "full"
+        return Document(page_content=text,
+                        metadata={"source": url, "title": title, "from_cache": from_cache, "stale": stale,
+                                  "extractor": extractor})
+
+    def lazy_load(self):
+        self.errors = {}
+        if self.mode == "replay":
+            results = []
+            for url in self.urls:
+                html, _ = self.cache.get(url)
+                results.append((html, True, False) if html is not None else FileNotFoundError(f"回放模式下没有缓存: {url}"))
+        else:
+            results = asyncio.run(self._fetch_all())
+        for url, result in zip(self.urls, results):
+            if isinstance(result, BaseException):
+                self.errors[url] = f"{type(result).__name__}: {result}"
+                continue
+            yield self._to_document(url, *result)
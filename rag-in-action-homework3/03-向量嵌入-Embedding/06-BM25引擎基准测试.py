@@ -0,0 +1,147 @@
+from pymilvus import MilvusClient, DataType, Function, FunctionType
+import argparse
+import os
+import time
+import numpy as np
+from bm25_engine import BM25Index, TOKENIZERS
+
+"""
+进程内 BM25 引擎 vs Milvus BM25
+
+在同一份语料上比较：
+1. 进程内引擎（bm25_engine.py）：构建耗时、索引文件大小、加载耗时、exhaustive / maxscore 单查询延迟
+2. Milvus BM25 Function（SPARSE_INVERTED_INDEX + DAAT_MAXSCORE）：单查询延迟
+3. 两者 top-k 结果的重合度
+
+为了让两边的打分可比，送进 Milvus 的文本先用同一个分词器切好、以空格连接，
+Milvus 端用 whitespace 分词器，k1 / b 也保持一致。
+
+运行方式：
+    python 06-BM25引擎基准测试.py                                  # 合成中文语料
+    python 06-BM25引擎基准测试.py --corpus docs.txt --tokenizer jieba  # 每行一篇文档
+    python 06-BM25引擎基准测试.py --uri ./bm25_bench.db              # Milvus Lite
+"""
+
+K1, B = 1.2, 0.75
+TOP_K = 10
+COLLECTION_NAME = "bm25_engine_bench"
+INDEX_PATH = "bm25_bench_index.npz"
+
+
+def synthetic_corpus(num_docs, seed=0):
+    """
+    合成中文语料：由常用字组成的 2~3 字词按 Zipf 分布抽样，模拟真实语料中词频的长尾
+    """
+    chars = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处队南给色光门即保治北造百规热领七海口东导器压志世金增争济阶油思术极交受联什认六共权收证改清己美再采转更单风切打白教速花带安场身车例真务具万每目至达走积示议声报斗完类八离华名确才科张信马节话米整空元况今集温传土许步群广石记需段研界拉林律叫且究观越织装影算低持音众书布复容儿须际商非验连断深难近矿千周委素技备半办青省列习响约支般史感劳便团往酸历市克何除消构府称太准精值号率族维划选标写存候毛亲快效斯院查江型眼王按格养易置派层片始却专状育厂京识适属圆包火住调满县局照参红细引听该铁价严"
+    rng = np.random.default_rng(seed)
+    vocab = np.array(["".join(rng.choice(list(chars), size=rng.integers(2, 4))) for _ in range(20000)])
+    probs = 1.0 / np.arange(1, len(vocab) + 1) ** 1.1
+    probs /= probs.sum()
+    lengths = rng.integers(20, 120, size=num_docs)
+    words = vocab[rng.choice(len(vocab), size=lengths.sum(), p=probs)]
+    docs = ["".join(chunk) for chunk in np.split(words, np.cumsum(lengths)[:-1])]
+    queries = ["".join(vocab[rng.choice(len(vocab), size=3, p=probs)]) for _ in range(200)]
+    return docs, queries
+
+
+def percentile_ms(latencies):
+    return float(np.percentile(latencies, 50)) * 1000, float(np.percentile(latencies, 99)) * 1000
+
+
+def bench_local(docs, queries, tokenizer):
+    """
+    进程内引擎：构建、持久化、加载、两种检索方式的延迟
+    """
+    start = time.perf_counter()
+    index = BM25Index(tokenizer=tokenizer, k1=K1, b=B).fit(docs)
+    print(f"构建: {time.perf_counter() - start:.2f}s, 词表 {len(index.vocab)}, 倒排项 {len(index.doc_ids)}")
+
+    index.save(INDEX_PATH)
+    start = time.perf_counter()
+    index = BM25Index.load(INDEX_PATH)
+    print(f"索引文件: {os.path.getsize(INDEX_PATH) / 1024 / 1024:.1f} MB, 加载: {time.perf_counter() - start:.2f}s")
+
+    results = {}
+    for method in ("exhaustive", "maxscore"):
+        latencies, hits = [], []
+        for query in queries:
+            start = time.perf_counter()
+            hits.append([doc_idx for doc_idx, _ in index.search(query, TOP_K, method=method)])
+            latencies.append(time.perf_counter() - start)
+        p50, p99 = percentile_ms(latencies)
+        print(f"{method:<10} p50={p50:.3f}ms p99={p99:.3f}ms")
+        results[method] = hits
+    return results["maxscore"]
+
+
+def bench_milvus(client, docs, queries, tokenize):
+    """
+    Milvus BM25：预分词文本 + whitespace 分词器
+    """
+    if client.has_collection(COLLECTION_NAME):
+        client.drop_collection(COLLECTION_NAME)
+    schema = client.create_schema()
+    schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True)
+    schema.add_field(field_name="text", datatype=DataType.VARCHAR, max_length=65535,
+                     enable_analyzer=True, analyzer_params={"tokenizer": "whitespace"})
+    schema.add_field(field_name="sparse", datatype=DataType.SPARSE_FLOAT_VECTOR)
+    schema.add_function(Function(name="text_bm25_emb", input_field_names=["text"],
+                                 output_field_names=["sparse"], function_type=FunctionType.BM25))
+    index_params = client.prepare_index_params()
+    index_params.add_index(field_name="sparse", index_name="sparse_inverted_index",
+                           index_type="SPARSE_INVERTED_INDEX", metric_type="BM25",
+                           params={"inverted_index_algo": "DAAT_MAXSCORE", "bm25_k1": K1, "bm25_b": B})
+    client.create_collection(collection_name=COLLECTION_NAME, schema=schema, index_params=index_params)
+
+    start = time.perf_counter()
+    for i in range(0, len(docs), 5000):
+        client.insert(COLLECTION_NAME, [{"id": i + j, "text": " ".join(tokenize(doc))}
+                                        for j, doc in enumerate(docs[i:i + 5000])])
+    client.flush(collection_name=COLLECTION_NAME)
+    client.load_collection(collection_name=COLLECTION_NAME)
+    print(f"导入 + 建索引: {time.perf_counter() - start:.2f}s")
+
+    latencies, hits = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results = client.search(collection_name=COLLECTION_NAME, data=[" ".join(tokenize(query))],
+                                anns_field="sparse", limit=TOP_K, search_params={"params": {"drop_ratio_search": 0.0}})
+        latencies.append(time.perf_counter() - start)
+        hits.append([hit["id"] for hit in results[0]])
+    p50, p99 = percentile_ms(latencies)
+    print(f"milvus     p50={p50:.3f}ms p99={p99:.3f}ms")
+    client.drop_collection(COLLECTION_NAME)
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="进程内 BM25 vs Milvus BM25")
+    parser.add_argument("--corpus", default=None, help="语料文件，每行一篇文档；不指定则生成合成中文语料")
+    parser.add_argument("--queries", default=None, help="查询文件，每行一条")
+    parser.add_argument("--n", type=int, default=100000, help="合成语料文档数")
+    parser.add_argument("--tokenizer", choices=list(TOKENIZERS), default="char_bigram")
+    parser.add_argument("--uri", default="http://localhost:19530", help="Milvus 地址，传 none 跳过 Milvus")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            docs = [line.strip() for line in f if line.strip()]
+        with open(args.queries or args.corpus, "r", encoding="utf-8") as f:
+            queries = [line.strip()[:20] for line in f if line.strip()][:200]
+    else:
+        docs, queries = synthetic_corpus(args.n)
+    print(f"语料 {len(docs)} 篇，查询 {len(queries)} 条，分词器 {args.tokenizer}\n")
+
+    print("=== 进程内 BM25 ===")
+    local_hits = bench_local(docs, queries, args.tokenizer)
+
+    if args.uri.lower() == "none":
+        return
+    print("\n=== Milvus BM25 ===")
+    milvus_hits = bench_milvus(MilvusClient(uri=args.uri), docs, queries, TOKENIZERS[args.tokenizer])
+    overlap = np.mean([len(set(a) & set(b)) / max(len(b), 1) for a, b in zip(local_hits, milvus_hits) if b])
+    print(f"\ntop-{TOP_K} 重合度: {overlap:.3f}")
+
+
+if __name__ == "__main__":
+    main()
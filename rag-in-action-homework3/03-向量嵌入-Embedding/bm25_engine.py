@@ -0,0 +1,236 @@
+# bm25_engine.py - 进程内 BM25 检索引擎（numpy 倒排表 + MaxScore 剪枝）
+import json
+import re
+from collections import Counter
+import numpy as np
+
+"""
+进程内 BM25 引擎
+
+03-BM25.py 手写的 BM25 用 split("，") 分词，只能给单条文本算稀疏向量；
+06-full-text-search-bm25-*.py 依赖 Milvus 服务端的 BM25 Function。
+小规模部署只想做关键词检索时，没有一个不依赖服务端的词法检索引擎。
+
+这里：
+- 分词器可插拔：jieba（可选依赖）、char_bigram（中文按字二元组、英文数字按词）、whitespace
+- 倒排表存成 numpy 数组：indptr[V+1]、doc_ids[P]、impacts[P]，
+  impacts 是预先算好的 BM25 分量 idf * tf*(k1+1) / (tf + k1*(1-b+b*dl/avgdl))，查询时只做加法
+- top-k 检索：
+    exhaustive：逐个查询词把整条倒排表累加到分数数组
+    maxscore：按词的分数上界从高到低处理；一旦剩余词上界之和低于当前第 k 名分数，
+              未出现过的文档不可能再进入 top-k，之后只对候选文档在倒排表上二分查找（相当于跳表跳读），
+              结果与 exhaustive 相同
+- save / load：整个索引存成一个 .npz 文件
+
+使用方式：
+    index = BM25Index(tokenizer="char_bigram").fit(documents)
+    index.search("信息检索", top_k=3)          # [(doc_idx, score), ...]
+    index.save("bm25_index.npz"); BM25Index.load("bm25_index.npz")
+"""
+
+_TOKEN_SPAN = re.compile(r"[一-鿿]+|[a-zA-Z0-9]+")
+
+
+def whitespace_tokenizer(text):
+    return text.lower().split()
+
+
+def char_bigram_tokenizer(text):
+    """
+    中文连续片段切成字二元组（单字片段保留单字），英文和数字按词切分并转小写
+    """
+    tokens = []
+    for span in _TOKEN_SPAN.findall(text):
+        if span[0].isascii():
+            tokens.append(span.lower())
+        elif len(span) == 1:
+            tokens.append(span)
+        else:
+            tokens.extend(span[i:i + 2] for i in range(len(span) - 1))
+    return tokens
+
+
+def jieba_tokenizer(text):
+    """
+    jieba 分词（搜索引擎模式），只保留含中文/字母/数字的词
+    """
+    try:
+        import jieba
+    except ImportError:
+        raise ImportError("jieba 分词器需要先安装：pip install jieba")
+    return [w.lower() for w in jieba.lcut_for_search(text) if _TOKEN_SPAN.search(w)]
+
+
+TOKENIZERS = {
+    "whitespace": whitespace_tokenizer,
+    "char_bigram": char_bigram_tokenizer,
+    "jieba": jieba_tokenizer,
+}
+
+
+class BM25Index:
+    """
+    BM25 倒排索引
+    """
+
+    def __init__(self, tokenizer="char_bigram", k1=1.2, b=0.75):
+        """
+        参数：
+            tokenizer (str): TOKENIZERS 中的名字（按名字保存，load 时可以还原）
+            k1 (float): 词频饱和参数
+            b (float): 文档长度归一化参数
+        """
+        self.tokenizer_name = tokenizer
+        self.tokenize = TOKENIZERS[tokenizer]
+        self.k1, self.b = k1, b
+
+    def fit(self, documents):
+        """
+        构建倒排表
+
+        参数：
+            documents (list[str]): 文档列表，文档编号即下标
+
+        返回：
+            BM25Index: self
+        """
+        vocab = {}
+        term_ids, doc_ids, tfs = [], [], []
+        doc_lens = np.zeros(len(documents), dtype=np.float32)
+        for doc_idx, text in enumerate(documents):
+            counts = Counter(self.tokenize(text))
+            doc_lens[doc_idx] = sum(counts.values())
+            for term, tf in counts.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc_idx)
+                tfs.append(tf)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+        # 按 (词, 文档) 排序，同一个词的倒排表连续且文档号递增
+        order = np.lexsort((doc_ids, term_ids))
+        term_ids, doc_ids, tfs = term_ids[order], doc_ids[order], tfs[order]
+
+        num_docs, num_terms = len(documents), len(vocab)
+        df = np.bincount(term_ids, minlength=num_terms).astype(np.float32)
+        # 与 Milvus / Lucene 相同的 IDF：log(1 + (N - df + 0.5) / (df + 0.5))
+        idf = np.log1p((num_docs - df + 0.5) / (df + 0.5))
+        avgdl = float(doc_lens.mean()) if num_docs else 0.0
+        norm = self.k1 * (1 - self.b + self.b * doc_lens[doc_ids] / max(avgdl, 1e-9))
+
+        self.impacts = (idf[term_ids] * tfs * (self.k1 + 1) / (tfs + norm)).astype(np.float32)
+        self.doc_ids = doc_ids
+        self.indptr = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        self.max_impacts = np.zeros(num_terms, dtype=np.float32)
+        nonempty = df > 0
+        self.max_impacts[nonempty] = np.maximum.reduceat(self.impacts, self.indptr[:-1][nonempty])
+        self.vocab = vocab
+        self.num_docs = num_docs
+        self.avgdl = avgdl
+        return self
+
+    def _postings(self, term_id):
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        return self.doc_ids[start:end], self.impacts[start:end]
+
+    def _query_terms(self, query):
+        """
+        查询词 -> [(term_id, 查询词频)]，按分数上界从高到低排列
+        """
+        counts = Counter(t for t in self.tokenize(query) if t in self.vocab)
+        terms = [(self.vocab[t], qtf) for t, qtf in counts.items()]
+        return sorted(terms, key=lambda x: -self.max_impacts[x[0]] * x[1])
+
+    @staticmethod
+    def _top_k(doc_idx, scores, top_k):
+        if len(doc_idx) > top_k:
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            doc_idx, scores = doc_idx[part], scores[part]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(d), float(s)) for d, s in zip(doc_idx[order], scores[order]) if s > 0]
+
+    def search(self, query, top_k=10, method="maxscore"):
+        """
+        BM25 top-k 检索
+
+        参数：
+            query (str): 查询文本
+            top_k (int): 返回条数
+            method (str): 'maxscore'（剪枝）或 'exhaustive'（全量累加）
+
+        返回：
+            list: [(文档下标, 分数), ...]，按分数降序
+        """
+        terms = self._query_terms(query)
+        if not terms:
+            return []
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+
+        if method == "exhaustive":
+            for term_id, qtf in terms:
+                docs, impacts = self._postings(term_id)
+                scores[docs] += qtf * impacts  # 同一倒排表内文档号不重复，可以直接花式索引累加
+            touched = np.flatnonzero(scores)
+            return self._top_k(touched, scores[touched], top_k)
+
+        # MaxScore：remaining[i] 是第 i 个词之后所有词的分数上界之和
+        upper = np.array([self.max_impacts[t] * qtf for t, qtf in terms], dtype=np.float32)
+        remaining = np.concatenate([np.cumsum(upper[::-1])[::-1][1:], [0.0]])
+        # threshold 是第 k 名分数的下界：任意 k 个文档里的最小分数都不会超过真实的第 k 名，
+        # 只在本轮涉及的文档上取，避免每个词都在整个分数数组上做 partition
+        threshold = 0.0
+        candidates = None  # None 表示还可能有新文档进入 top-k
+        for i, (term_id, qtf) in enumerate(terms):
+            docs, impacts = self._postings(term_id)
+            if candidates is None:
+                scores[docs] += qtf * impacts
+                touched = docs
+            else:
+                # 只在倒排表中二分查找候选文档，跳过其余部分
+                pos = np.searchsorted(docs, candidates)
+                valid = pos < len(docs)
+                hit = np.zeros(len(candidates), dtype=bool)
+                hit[valid] = docs[pos[valid]] == candidates[valid]
+                scores[candidates[hit]] += qtf * impacts[pos[hit]]
+                touched = candidates
+            if len(touched) >= top_k:
+                kth = np.partition(scores[touched], len(touched) - top_k)[len(touched) - top_k]
+                threshold = max(threshold, float(kth))
+
+            if candidates is None:
+                if remaining[i] >= threshold:
+                    continue
+                # 剩余词全部命中也追不上第 k 名：没出现过的文档（分数 0）从此不可能进入 top-k
+                candidates = np.flatnonzero(scores + remaining[i] >= threshold)
+            else:
+                candidates = candidates[scores[candidates] + remaining[i] >= threshold]
+
+        pool = np.flatnonzero(scores) if candidates is None else candidates
+        return self._top_k(pool, scores[pool], top_k)
+
+    def save(self, path):
+        """
+        保存为 .npz（词表按 term_id 顺序存成字符串数组）
+        """
+        terms = np.empty(len(self.vocab), dtype=object)
+        for term, term_id in self.vocab.items():
+            terms[term_id] = term
+        config = {"tokenizer": self.tokenizer_name, "k1": self.k1, "b": self.b,
+                  "num_docs": self.num_docs, "avgdl": self.avgdl}
+        np.savez(path, indptr=self.indptr, doc_ids=self.doc_ids, impacts=self.impacts,
+                 max_impacts=self.max_impacts, terms=terms.astype(str), config=json.dumps(config))
+
+    @classmethod
+    def load(cls, path):
+        """
+        从 .npz 加载
+        """
+        data = np.load(path)
+        config = json.loads(str(data["config"]))
+        index = cls(config["tokenizer"], config["k1"], config["b"])
+        index.indptr, index.doc_ids = data["indptr"], data["doc_ids"]
+        index.impacts, index.max_impacts = data["impacts"], data["max_impacts"]
+        index.vocab = {term: i for i, term in enumerate(data["terms"].tolist())}
+        index.num_docs, index.avgdl = config["num_docs"], config["avgdl"]
+        return index
@@ -1,5 +1,8 @@
 from pymilvus import MilvusClient
-import random
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from milvus_data_utils import generate_vectors
 
 # 连接到 Milvus
 client = MilvusClient(
@@ -45,9 +48,10 @@ res = client.insert(
 print(res)
 
 # 3. 更新实体
+update_vectors = generate_vectors(2, 5).tolist()
 update_data = [
-    {"id": 0, "vector": [random.random() for _ in range(5)], "color": "updated_pink_8682"},
-    {"id": 1, "vector": [random.random() for _ in range(5)], "color": "updated_red_7025"}
+    {"id": 0, "vector": update_vectors[0], "color": "updated_pink_8682"},
+    {"id": 1, "vector": update_vectors[1], "color": "updated_red_7025"}
 ]
 
 res = client.upsert(
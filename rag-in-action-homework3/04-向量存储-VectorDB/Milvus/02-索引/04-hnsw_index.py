@@ -1,5 +1,8 @@
 from pymilvus import MilvusClient, DataType
-import random
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from milvus_data_utils import generate_vectors, generate_columns, insert_in_batches
 
 # 1. 设置 Milvus 客户端
 client = MilvusClient(uri="http://localhost:19530")
@@ -19,11 +22,9 @@ client.create_collection(collection_name=COLLECTION_NAME, schema=schema)
 
 # 4. 插入随机向量数据
 num_vectors = 1000
-vectors = [[random.random() for _ in range(128)] for _ in range(num_vectors)]
-ids = list(range(num_vectors))
-entities = [{"id": ids[i], "vector": vectors[i]} for i in range(num_vectors)]
+columns = generate_columns(num_vectors, 128)  # numpy 一次性生成，按列组织
 
-client.insert(collection_name=COLLECTION_NAME, data=entities)
+insert_in_batches(client, COLLECTION_NAME, columns)
 # flush 保证数据落盘
 # client.flush([COLLECTION_NAME])
 
@@ -54,7 +55,7 @@ print("索引详情:", client.describe_index(
 
 # 6. load 后再搜索
 client.load_collection(collection_name=COLLECTION_NAME)
-search_vectors = [[random.random() for _ in range(128)]]
+search_vectors = generate_vectors(1, 128).tolist()
 results = client.search(
     collection_name=COLLECTION_NAME,
     data=search_vectors,
@@ -0,0 +1,171 @@
+from pymilvus import MilvusClient, DataType
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from milvus_data_utils import generate_vectors, insert_in_batches
+from milvus_index_utils import build_index, search_ids, measure_latency, recall_at_k, estimate_index_size_mb
+
+"""
+ANN 索引统一基准测试
+
+01~05 每个脚本只在 1000 条随机 128 维向量上建一种索引并打印 5 条结果，
+不测构建耗时、索引大小、QPS，也不和精确结果比较召回率。
+
+本脚本用一份配置完成：
+1. 数据：加载真实嵌入（.npy，形状 [N, dim]），或生成带聚类结构的合成数据（比均匀随机更接近真实嵌入）
+2. 真值：先建 FLAT 索引，用它的搜索结果作为 ground truth
+3. 索引：依次构建 IVF_FLAT / IVF_PQ / HNSW / DISKANN，记录构建耗时和估算大小
+4. 扫参：对每种索引扫描 nprobe / ef / search_list，测 recall@k、QPS、单查询延迟（p50/p99）
+5. 输出：CSV + JSON 结果；如果安装了 matplotlib，额外输出 recall@k - QPS 曲线图
+
+运行方式（N 可配置为 1e4 ~ 1e7）：
+    python 06-索引基准测试.py --n 100000 --uri http://localhost:19530
+    python 06-索引基准测试.py --n 10000 --uri ./bench.db          # Milvus Lite，仅支持 FLAT/IVF_FLAT 等部分索引
+    python 06-索引基准测试.py --embeddings my_embeddings.npy
+"""
+
+# 基准配置：每种索引的构建参数与搜索参数扫描范围
+BENCH_CONFIG = {
+    "dim": 128,
+    "num_queries": 200,
+    "top_k": 10,
+    "metric_type": "L2",
+    "insert_batch_size": 10000,
+    "search_batch_size": 50,   # 测 QPS 时每次 search 携带的查询数
+    "latency_queries": 100,    # 测单查询延迟的查询数
+    "indexes": [
+        {"index_type": "IVF_FLAT", "params": {"nlist": 1024}, "search_key": "nprobe", "sweep": [1, 4, 16, 64, 128]},
+        {"index_type": "IVF_PQ", "params": {"nlist": 1024, "m": 32, "nbits": 8}, "search_key": "nprobe", "sweep": [1, 4, 16, 64, 128]},
+        {"index_type": "HNSW", "params": {"M": 16, "efConstruction": 200}, "search_key": "ef", "sweep": [10, 20, 40, 80, 160]},
+        {"index_type": "DISKANN", "params": {}, "search_key": "search_list", "sweep": [10, 20, 40, 80, 160]},
+    ],
+}
+COLLECTION_NAME = "ann_benchmark"
+OUTPUT_DIR = "ann_benchmark_results"
+
+
+def plot_curves(rows, path):
+    """
+    画 recall@k - QPS 曲线（matplotlib 可选）
+    """
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("未安装 matplotlib，跳过绘图")
+        return
+    plt.figure(figsize=(8, 6))
+    for index_type in dict.fromkeys(row["index_type"] for row in rows):
+        points = [row for row in rows if row["index_type"] == index_type]
+        plt.plot([p["recall"] for p in points], [p["qps"] for p in points], marker="o", label=index_type)
+    plt.xlabel(f"recall@{BENCH_CONFIG['top_k']}")
+    plt.ylabel("QPS")
+    plt.yscale("log")
+    plt.grid(True, alpha=0.3)
+    plt.legend()
+    plt.savefig(path, dpi=120, bbox_inches="tight")
+    print(f"曲线已保存到 {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Milvus ANN 索引基准测试")
+    parser.add_argument("--n", type=int, default=100000, help="向量数量（1e4 ~ 1e7）")
+    parser.add_argument("--uri", default="http://localhost:19530", help="Milvus 地址，或 Milvus Lite 的 .db 文件路径")
+    parser.add_argument("--embeddings", default=None, help="真实嵌入 .npy 文件，不指定则生成聚类合成数据")
+    args = parser.parse_args()
+
+    cfg = BENCH_CONFIG
+    top_k, metric_type = cfg["top_k"], cfg["metric_type"]
+
+    # 1. 准备数据
+    if args.embeddings:
+        vectors = np.load(args.embeddings, mmap_mode="r")[:args.n].astype(np.float32)
+        print(f"加载真实嵌入: {args.embeddings}, 形状 {vectors.shape}")
+    else:
+        vectors = generate_vectors(args.n, cfg["dim"], distribution="clustered", seed=42)
+        print(f"生成聚类合成数据: 形状 {vectors.shape}")
+    n, dim = vectors.shape
+    # 查询向量取自同一分布（加少量噪声），避免与库中向量完全重合
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(n, cfg["num_queries"], replace=False)] + \
+        rng.normal(0, 0.01, size=(cfg["num_queries"], dim)).astype(np.float32)
+
+    # 2. 创建集合并批量插入（插入完成后再建索引）
+    client = MilvusClient(uri=args.uri)
+    if client.has_collection(COLLECTION_NAME):
+        client.drop_collection(COLLECTION_NAME)
+    schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=False)
+    schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True)
+    schema.add_field(field_name="vector", datatype=DataType.FLOAT_VECTOR, dim=dim)
+    client.create_collection(collection_name=COLLECTION_NAME, schema=schema)
+
+    print(f"插入 {n} 条向量...")
+    start = time.perf_counter()
+    insert_in_batches(client, COLLECTION_NAME,
+                      {"id": np.arange(n, dtype=np.int64), "vector": vectors},
+                      batch_size=cfg["insert_batch_size"])
+    client.flush(collection_name=COLLECTION_NAME)
+    print(f"插入完成，用时 {time.perf_counter() - start:.1f}s")
+
+    # 3. FLAT 真值
+    print("\n构建 FLAT 索引作为 ground truth...")
+    rows = []
+    flat_build = build_index(client, COLLECTION_NAME, "FLAT", {}, metric_type)
+    ground_truth, flat_qps = search_ids(client, COLLECTION_NAME, queries, top_k, metric_type, {}, cfg["search_batch_size"])
+    p50, p99 = measure_latency(client, COLLECTION_NAME, queries[:cfg["latency_queries"]], top_k, metric_type, {})
+    rows.append({
+        "index_type": "FLAT", "build_params": "{}", "search_param": "-", "recall": 1.0,
+        "qps": flat_qps, "p50_ms": p50, "p99_ms": p99, "build_s": flat_build,
+        "size_mb": estimate_index_size_mb("FLAT", {}, n, dim),
+    })
+
+    # 4. 各 ANN 索引扫参
+    for index_cfg in cfg["indexes"]:
+        index_type = index_cfg["index_type"]
+        print(f"\n构建 {index_type} 索引 {index_cfg['params']}...")
+        try:
+            build_seconds = build_index(client, COLLECTION_NAME, index_type, index_cfg["params"], metric_type)
+        except Exception as e:
+            # Milvus Lite 等环境不支持部分索引类型
+            print(f"  跳过 {index_type}: {e}")
+            continue
+        size_mb = estimate_index_size_mb(index_type, index_cfg["params"], n, dim)
+        print(f"  构建耗时 {build_seconds:.1f}s，估算大小 {size_mb:.1f} MB")
+
+        for value in index_cfg["sweep"]:
+            search_params = {index_cfg["search_key"]: value}
+            ids, qps = search_ids(client, COLLECTION_NAME, queries, top_k, metric_type, search_params, cfg["search_batch_size"])
+            p50, p99 = measure_latency(client, COLLECTION_NAME, queries[:cfg["latency_queries"]], top_k, metric_type, search_params)
+            recall = recall_at_k(ids, ground_truth, top_k)
+            print(f"  {index_cfg['search_key']}={value:<4} recall@{top_k}={recall:.4f} "
+                  f"QPS={qps:.0f} p50={p50:.2f}ms p99={p99:.2f}ms")
+            rows.append({
+                "index_type": index_type, "build_params": json.dumps(index_cfg["params"]),
+                "search_param": f"{index_cfg['search_key']}={value}", "recall": recall,
+                "qps": qps, "p50_ms": p50, "p99_ms": p99, "build_s": build_seconds, "size_mb": size_mb,
+            })
+
+    # 5. 输出结果
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    csv_path = os.path.join(OUTPUT_DIR, f"results_n{n}.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(OUTPUT_DIR, f"results_n{n}.json"), "w", encoding="utf-8") as f:
+        json.dump({"n": n, "dim": dim, "config": cfg, "results": rows}, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {csv_path}")
+    plot_curves(rows, os.path.join(OUTPUT_DIR, f"recall_qps_n{n}.png"))
+
+    # 清理
+    client.release_collection(collection_name=COLLECTION_NAME)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+from pymilvus import MilvusClient
+import argparse
+import math
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from milvus_index_utils import (
+    build_index, search_ids, measure_latency, recall_at_k,
+    estimate_index_size_mb, save_tuned_index_params
+)
+
+"""
+索引参数自动调优
+
+02~04 的索引脚本把 nlist: 64、m: 32、M: 64 / efConstruction: 100、ef: 10 写死，
+create_milvus_db.py 甚至给 AUTOINDEX 传了 nlist（AUTOINDEX 会忽略它）。
+
+本脚本针对一个已有集合：
+1. 先建 FLAT 索引，从集合中抽样查询向量并得到精确 Top-k 真值
+2. 根据数据量 N 和维度生成候选构建参数（IVF_FLAT / IVF_PQ / HNSW）
+3. 每个构建配置下，搜索参数（nprobe / ef）从小到大扫描，找到第一个满足目标召回率的值
+4. 在满足 recall@k 目标（以及可选的 p99 延迟上限）的配置中选出代价最低的：
+   objective=latency 按 p50 延迟最小，objective=memory 按估算内存最小
+5. 把选中的索引参数和搜索参数写入 tuned_index_params.json，并把集合的索引重建为选中配置；
+   集合构建脚本（如 create_milvus_db.py）通过 load_tuned_index_params 读取索引参数，
+   搜索时通过 tuned_search_params 使用调优出的 nprobe / ef；度量类型与集合不一致时构建脚本直接报错
+
+注意：调优过程会反复重建目标集合的索引，请在开发/测试环境的集合上运行。
+
+运行方式：
+    python 07-索引参数自动调优.py --collection ann_benchmark --metric L2 --target-recall 0.95
+    python 07-索引参数自动调优.py --uri ./bench.db --collection concepts_only_name --max-p99-ms 20
+"""
+
+
+def candidate_build_configs(n, dim):
+    """
+    按数据规模生成候选构建参数
+
+    说明：
+        - IVF 的 nlist 经验值在 sqrt(N) ~ 4*sqrt(N) 之间，取 2 的幂
+        - IVF_PQ 的 m 必须整除 dim，取 dim/4 和 dim/8 两档
+        - HNSW 的 M 取 8 / 16 / 32，efConstruction 固定 200
+
+    返回：
+        list: [(index_type, build_params, search_key, sweep), ...]
+    """
+    low = max(16, 2 ** int(math.log2(math.sqrt(n))))
+    nlists = sorted({low, low * 2, low * 4})
+    configs = []
+    for nlist in nlists:
+        nprobes = [p for p in (1, 2, 4, 8, 16, 32, 64, 128, 256) if p <= nlist]
+        configs.append(("IVF_FLAT", {"nlist": nlist}, "nprobe", nprobes))
+        for m in (dim // 4, dim // 8):
+            if m > 0 and dim % m == 0:
+                configs.append(("IVF_PQ", {"nlist": nlist, "m": m, "nbits": 8}, "nprobe", nprobes))
+    for M in (8, 16, 32):
+        configs.append(("HNSW", {"M": M, "efConstruction": 200}, "ef", [16, 32, 64, 128, 256, 512]))
+    return configs
+
+
+def sample_queries(client, collection_name, field_name, num_queries, seed=0):
+    """
+    从集合中抽样向量作为查询（加少量噪声，避免与库中向量完全相同）
+    """
+    rows = client.query(collection_name=collection_name, filter="", output_fields=[field_name],
+                        limit=num_queries * 10)
+    vectors = np.asarray([row[field_name] for row in rows], dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.choice(len(vectors), min(num_queries, len(vectors)), replace=False)]
+    return picked + rng.normal(0, 0.01, size=picked.shape).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Milvus 索引参数自动调优")
+    parser.add_argument("--uri", default="http://localhost:19530", help="Milvus 地址或 Milvus Lite .db 路径")
+    parser.add_argument("--collection", required=True, help="要调优的集合")
+    parser.add_argument("--field", default="vector", help="向量字段名")
+    parser.add_argument("--metric", default="COSINE",
+                        help="度量类型：L2 / IP / COSINE，须与集合构建脚本一致（create_milvus_db.py 为 COSINE）")
+    parser.add_argument("--queries", default=None, help="查询向量 .npy 文件，不指定则从集合抽样")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="可选的 p99 延迟上限")
+    parser.add_argument("--objective", choices=["latency", "memory"], default="latency")
+    args = parser.parse_args()
+
+    client = MilvusClient(uri=args.uri)
+    collection_name, field_name, metric, top_k = args.collection, args.field, args.metric, args.top_k
+    n = int(client.get_collection_stats(collection_name=collection_name)["row_count"])
+    dim = next(f["params"]["dim"] for f in client.describe_collection(collection_name=collection_name)["fields"]
+               if f["name"] == field_name)
+    print(f"集合 {collection_name}: N={n}, dim={dim}, 目标 recall@{top_k} ≥ {args.target_recall}")
+
+    # 1. FLAT 真值
+    print("\n1. 构建 FLAT 索引并计算真值...")
+    build_index(client, collection_name, "FLAT", {}, metric, field_name)
+    if args.queries:
+        queries = np.load(args.queries).astype(np.float32)[:args.num_queries]
+    else:
+        queries = sample_queries(client, collection_name, field_name, args.num_queries)
+    ground_truth, _ = search_ids(client, collection_name, queries, top_k, metric, {}, field_name=field_name)
+    latency_queries = queries[:min(100, len(queries))]
+
+    # 2. 搜索参数空间
+    print("\n2. 搜索参数空间...")
+    feasible = []
+    for index_type, build_params, search_key, sweep in candidate_build_configs(n, dim):
+        try:
+            build_seconds = build_index(client, collection_name, index_type, build_params, metric, field_name)
+        except Exception as e:
+            print(f"  跳过 {index_type} {build_params}: {e}")
+            continue
+        for value in sweep:
+            search_params = {search_key: max(value, top_k) if search_key == "ef" else value}
+            ids, qps = search_ids(client, collection_name, queries, top_k, metric, search_params, field_name=field_name)
+            recall = recall_at_k(ids, ground_truth, top_k)
+            if recall < args.target_recall:
+                continue
+            # 搜索参数从小到大扫描，第一个达标的值就是这个构建配置下最便宜的
+            p50, p99 = measure_latency(client, collection_name, latency_queries, top_k, metric, search_params, field_name)
+            size_mb = estimate_index_size_mb(index_type, build_params, n, dim)
+            print(f"  {index_type} {build_params} {search_params}: recall={recall:.4f} "
+                  f"p50={p50:.2f}ms p99={p99:.2f}ms 估算内存={size_mb:.1f}MB 构建={build_seconds:.1f}s")
+            if args.max_p99_ms is None or p99 <= args.max_p99_ms:
+                feasible.append({
+                    "index_type": index_type, "metric_type": metric, "params": build_params,
+                    "search_params": search_params, "recall": round(recall, 4),
+                    "p50_ms": round(p50, 3), "p99_ms": round(p99, 3), "qps": round(qps, 1),
+                    "size_mb": round(size_mb, 2), "build_s": round(build_seconds, 2),
+                })
+            break
+        else:
+            print(f"  {index_type} {build_params}: 扫描范围内未达到目标召回率")
+
+    # 3. 选出最便宜的配置
+    if not feasible:
+        print("\n没有配置满足目标，保留 FLAT 索引。可以降低目标召回率或放宽延迟上限。")
+        return
+    key = (lambda c: (c["p50_ms"], c["size_mb"])) if args.objective == "latency" else \
+        (lambda c: (c["size_mb"], c["p50_ms"]))
+    best = min(feasible, key=key)
+    print(f"\n3. 选中配置（objective={args.objective}）: {best}")
+
+    # 4. 写回调优结果并把集合索引重建为选中配置
+    save_tuned_index_params(collection_name, {**best, "target_recall": args.target_recall, "top_k": top_k})
+    build_index(client, collection_name, best["index_type"], best["params"], metric, field_name)
+    print(f"已写入 tuned_index_params.json，集合 {collection_name} 的索引已重建为选中配置")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 from pymilvus import MilvusClient, DataType
-import random
 import numpy as np
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from milvus_data_utils import generate_vectors, generate_columns, random_labels, insert_in_batches
 
 '''
 L2 适合连续数据
@@ -15,14 +18,13 @@ client = MilvusClient(uri="http://localhost:19530")
 metric_types = ["L2", "IP", "COSINE"]
 collections = {metric: f"ann_search_demo_{metric.lower()}" for metric in metric_types}
 
-# 2. 创建数据
+# 2. 创建数据（numpy 一次性生成，按列组织，三个集合共用）
 def create_data(num_vectors=1000, dim=128):
-    vectors = [[random.random() for _ in range(dim)] for _ in range(num_vectors)]
-    ids = list(range(num_vectors))
-    colors = [f"color_{random.randint(1, 1000)}" for _ in range(num_vectors)]
-    return vectors, ids, colors
+    columns = generate_columns(num_vectors, dim)
+    columns["color"] = random_labels(num_vectors, "color", 1000)
+    return columns
 
-vectors, ids, colors = create_data()
+columns = create_data()
 
 # 3. 为每种指标类型创建集合和索引
 def create_collection_with_metric(collection_name, metric_type):
@@ -40,8 +42,7 @@ def create_collection_with_metric(collection_name, metric_type):
     client.create_collection(collection_name=collection_name, schema=schema)
 
     # 插入数据
-    entities = [{"id": ids[i], "vector": vectors[i], "color": colors[i]} for i in range(len(ids))]
-    client.insert(collection_name=collection_name, data=entities)
+    insert_in_batches(client, collection_name, columns)
 
     # 创建索引
     index_params = MilvusClient.prepare_index_params()
@@ -73,7 +74,7 @@ def normalize_vector(vector):
         return vector
     return vector / norm
 
-query_vector = [random.random() for _ in range(128)]
+query_vector = generate_vectors(1, 128)[0].tolist()
 normalized_query_vector = normalize_vector(query_vector)
 
 # 5. 使用不同指标类型进行搜索
@@ -98,7 +99,7 @@ for metric_type, collection_name in collections.items():
 
 # 6. 批量向量搜索示例
 print("\n=== 批量向量搜索（不同指标类型）===")
-query_vectors = [[random.random() for _ in range(128)] for _ in range(2)]
+query_vectors = generate_vectors(2, 128).tolist()
 normalized_query_vectors = [normalize_vector(v) for v in query_vectors]
 
 for metric_type, collection_name in collections.items():
@@ -1,5 +1,9 @@
 from pymilvus import MilvusClient, DataType
-import random
+import numpy as np
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from milvus_data_utils import generate_vectors, generate_columns, random_labels, insert_in_batches
 
 # 1. 设置 Milvus 客户端
 client = MilvusClient(uri="http://localhost:19530")
@@ -21,13 +25,11 @@ client.create_collection(collection_name=COLLECTION_NAME, schema=schema)
 
 # 4. 插入随机向量数据
 num_vectors = 1000
-vectors = [[random.random() for _ in range(128)] for _ in range(num_vectors)]
-ids = list(range(num_vectors))
-colors = [f"color_{random.randint(1, 1000)}" for _ in range(num_vectors)]
-likes = [random.randint(1, 1000) for _ in range(num_vectors)]
-entities = [{"id": ids[i], "vector": vectors[i], "color": colors[i], "likes": likes[i]} for i in range(num_vectors)]
+columns = generate_columns(num_vectors, 128)  # numpy 一次性生成，按列组织
+columns["color"] = random_labels(num_vectors, "color", 1000)
+columns["likes"] = np.random.default_rng().integers(1, 1001, size=num_vectors)
 
-client.insert(collection_name=COLLECTION_NAME, data=entities)
+insert_in_batches(client, COLLECTION_NAME, columns)
 
 # 5. 创建索引
 index_params = MilvusClient.prepare_index_params()
@@ -38,6 +40,9 @@ index_params.add_index(
     index_name="vector_index",
     params={}
 )
+# 过滤字段的标量索引：color 用 INVERTED（支持前缀 like），likes 用 STL_SORT（范围过滤）
+index_params.add_index(field_name="color", index_type="INVERTED", index_name="color_index")
+index_params.add_index(field_name="likes", index_type="STL_SORT", index_name="likes_index")
 client.create_index(
     collection_name=COLLECTION_NAME,
     index_params=index_params,
@@ -49,7 +54,7 @@ client.load_collection(collection_name=COLLECTION_NAME)
 
 # 7. 标准过滤搜索示例
 print("\n=== 标准过滤搜索 ===")
-query_vector = [random.random() for _ in range(128)]
+query_vector = generate_vectors(1, 128)[0].tolist()
 results = client.search(
     collection_name=COLLECTION_NAME,
     data=[query_vector],
@@ -1,5 +1,9 @@
 from pymilvus import MilvusClient, DataType
-import random
+import numpy as np
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from milvus_data_utils import generate_vectors, generate_columns, random_labels, insert_in_batches
 
 # 1. 设置 Milvus 客户端
 client = MilvusClient(uri="http://localhost:19530")
@@ -21,13 +25,11 @@ client.create_collection(collection_name=COLLECTION_NAME, schema=schema)
 
 # 4. 插入示例数据
 num_vectors = 1000
-vectors = [[random.random() for _ in range(128)] for _ in range(num_vectors)]
-ids = list(range(num_vectors))
-doc_ids = [random.randint(1, 100) for _ in range(num_vectors)]  # 假设有100个文档
-chunks = [f"chunk_{random.randint(1, 1000)}" for _ in range(num_vectors)]
-entities = [{"id": ids[i], "vector": vectors[i], "docId": doc_ids[i], "chunk": chunks[i]} for i in range(num_vectors)]
+columns = generate_columns(num_vectors, 128)  # numpy 一次性生成，按列组织
+columns["docId"] = np.random.default_rng().integers(1, 101, size=num_vectors)  # 假设有100个文档
+columns["chunk"] = random_labels(num_vectors, "chunk", 1000)
 
-client.insert(collection_name=COLLECTION_NAME, data=entities)
+insert_in_batches(client, COLLECTION_NAME, columns)
 
 # 5. 创建索引
 index_params = MilvusClient.prepare_index_params()
@@ -49,7 +51,7 @@ client.load_collection(collection_name=COLLECTION_NAME)
 
 # 7. 基本分组搜索示例
 print("\n=== 基本分组搜索 ===")
-query_vector = [random.random() for _ in range(128)]
+query_vector = generate_vectors(1, 128)[0].tolist()
 results = client.search(
     collection_name=COLLECTION_NAME,
     data=[query_vector],
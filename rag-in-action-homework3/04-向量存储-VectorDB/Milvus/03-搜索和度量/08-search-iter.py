@@ -1,5 +1,8 @@
 from pymilvus import MilvusClient, DataType
-import random
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from milvus_data_utils import generate_vectors, generate_columns, random_labels, insert_in_batches
 
 # 1. 设置 Milvus 客户端
 client = MilvusClient(uri="http://localhost:19530")
@@ -20,12 +23,10 @@ client.create_collection(collection_name=COLLECTION_NAME, schema=schema)
 
 # 4. 插入随机向量数据
 num_vectors = 20000  # 插入更多数据以演示 SearchIterator
-vectors = [[random.random() for _ in range(128)] for _ in range(num_vectors)]
-ids = list(range(num_vectors))
-colors = [f"color_{random.randint(1, 1000)}" for _ in range(num_vectors)]
-entities = [{"id": ids[i], "vector": vectors[i], "color": colors[i]} for i in range(num_vectors)]
+columns = generate_columns(num_vectors, 128)  # numpy 一次性生成，按列组织
+columns["color"] = random_labels(num_vectors, "color", 1000)
 
-client.insert(collection_name=COLLECTION_NAME, data=entities)
+insert_in_batches(client, COLLECTION_NAME, columns, batch_size=5000)
 
 # 5. 创建索引
 index_params = MilvusClient.prepare_index_params()
@@ -47,7 +48,7 @@ client.load_collection(collection_name=COLLECTION_NAME)
 
 # 7. 使用 SearchIterator 进行搜索
 print("\n=== 使用 SearchIterator 进行搜索 ===")
-query_vector = [random.random() for _ in range(128)]
+query_vector = generate_vectors(1, 128)[0].tolist()
 
 # 创建 SearchIterator
 iterator = client.search_iterator(
@@ -60,21 +61,23 @@ iterator = client.search_iterator(
     output_fields=["color"]
 )
 
-# 使用迭代器获取结果
-all_results = []
+# 使用迭代器逐批处理结果：只计数并保留前5条，不把全部结果留在内存里
+# （需要导出全部结果时见 10-streaming-export.py）
+total = 0
+first_results = []
 while True:
     result = iterator.next()
     if not result:
         iterator.close()
         break
-    
-    # 将结果转换为字典并添加到结果列表
-    for hit in result:
-        all_results.append(hit.to_dict())
 
-print(f"总共获取到 {len(all_results)} 条结果")
+    total += len(result)
+    if len(first_results) < 5:
+        first_results.extend(hit.to_dict() for hit in result[:5 - len(first_results)])
+
+print(f"总共获取到 {total} 条结果")
 print("\n前5条结果:")
-for result in all_results[:5]:
+for result in first_results:
     print(f"ID: {result['id']}, 距离: {result['distance']}, 颜色: {result['entity']['color']}")
 
 # 8. 清理
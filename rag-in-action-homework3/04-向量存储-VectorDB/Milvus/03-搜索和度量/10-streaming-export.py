@@ -0,0 +1,222 @@
+from pymilvus import MilvusClient, DataType
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
+import pyarrow.parquet as pq
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from milvus_data_utils import generate_vectors, generate_columns, random_labels, insert_in_batches
+
+"""
+基于 search_iterator / query_iterator 的流式导出
+
+08-search-iter.py 把迭代器的结果全部追加到一个 all_results 列表里，
+导出 2 万条结果时内存随结果数线性增长，迭代器"分批取数"的意义就没有了。
+
+本脚本：
+1. iter_search_batches / iter_query_batches：把迭代器包装成生成器，每次 yield 一批扁平化的记录
+2. 多个分区各用一个线程并行迭代，批次放进有界队列；队列满时迭代线程阻塞（背压），
+   所以同一时刻内存中最多只有 (队列容量 + 分区数) 个批次
+3. 写线程从队列取批次，转成 Arrow RecordBatch 后增量写入 Parquet（ParquetWriter.write_batch）
+无论导出多少条结果，内存占用只和批大小、队列容量有关。
+"""
+
+COLLECTION_NAME = "streaming_export_demo"
+PARTITIONS = ["part_0", "part_1", "part_2", "part_3"]
+BATCH_SIZE = 1000      # 迭代器每批返回的条数
+QUEUE_SIZE = 4         # 迭代线程与写线程之间最多缓存的批次数
+DIM = 128
+
+
+def flatten_hit(hit, partition):
+    """
+    把 search_iterator 的单条结果展开为扁平记录
+    """
+    record = {"id": hit["id"], "distance": hit["distance"], "partition": partition}
+    record.update(hit["entity"])
+    return record
+
+
+def iter_search_batches(client, collection_name, query_vector, limit, output_fields,
+                        partition=None, batch_size=BATCH_SIZE, metric_type="L2"):
+    """
+    流式返回 search_iterator 的结果批次
+
+    参数：
+        client (MilvusClient): Milvus 客户端
+        collection_name (str): 集合名
+        query_vector (list): 查询向量
+        limit (int): 总结果数上限
+        output_fields (list): 输出字段
+        partition (str): 分区名，None 表示整个集合
+        batch_size (int): 每批条数
+        metric_type (str): 度量类型
+
+    返回：
+        generator: 每次 yield 一个记录列表
+    """
+    iterator = client.search_iterator(
+        collection_name=collection_name,
+        data=[query_vector],
+        anns_field="vector",
+        search_params={"metric_type": metric_type},
+        batch_size=batch_size,
+        limit=limit,
+        output_fields=output_fields,
+        partition_names=[partition] if partition else None
+    )
+    try:
+        while True:
+            result = iterator.next()
+            if not result:
+                break
+            yield [flatten_hit(hit.to_dict(), partition) for hit in result]
+    finally:
+        iterator.close()
+
+
+def iter_query_batches(client, collection_name, filter_expr, output_fields,
+                       partition=None, batch_size=BATCH_SIZE):
+    """
+    流式返回 query_iterator 的结果批次（标量过滤导出，不需要查询向量）
+
+    返回：
+        generator: 每次 yield 一个记录列表
+    """
+    iterator = client.query_iterator(
+        collection_name=collection_name,
+        batch_size=batch_size,
+        filter=filter_expr,
+        output_fields=output_fields,
+        partition_names=[partition] if partition else None
+    )
+    try:
+        while True:
+            result = iterator.next()
+            if not result:
+                break
+            yield [{**row, "partition": partition} for row in result]
+    finally:
+        iterator.close()
+
+
+def export_parquet(batch_iter_factories, path, schema, queue_size=QUEUE_SIZE):
+    """
+    并行迭代多个批次来源，经有界队列增量写入 Parquet
+
+    参数：
+        batch_iter_factories (list): 每个元素是无参函数，调用后返回批次生成器（每个分区一个）
+        path (str): 输出 Parquet 文件路径
+        schema (pa.Schema): Arrow schema
+        queue_size (int): 有界队列容量，决定背压阈值
+
+    返回：
+        int: 导出的记录数
+    """
+    batches = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    done = object()
+
+    def produce(factory):
+        try:
+            for batch in factory():
+                if stop.is_set():
+                    break
+                batches.put(batch)  # 队列满时阻塞，形成背压
+        finally:
+            batches.put(done)
+
+    total = 0
+    with ThreadPoolExecutor(max_workers=len(batch_iter_factories)) as pool:
+        futures = [pool.submit(produce, factory) for factory in batch_iter_factories]
+        try:
+            with pq.ParquetWriter(path, schema) as writer:
+                remaining = len(futures)
+                while remaining:
+                    batch = batches.get()
+                    if batch is done:
+                        remaining -= 1
+                        continue
+                    writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                    total += len(batch)
+        finally:
+            stop.set()
+            # 写入异常退出时排空队列，让阻塞在 put 上的迭代线程结束，线程池才能正常关闭
+            while not all(future.done() for future in futures):
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        for future in futures:
+            future.result()  # 迭代线程中的异常在这里抛出
+    return total
+
+
+if __name__ == "__main__":
+    # 1. 设置 Milvus 客户端
+    client = MilvusClient(uri="http://localhost:19530")
+
+    # 2. 准备带分区的集合
+    if client.has_collection(COLLECTION_NAME):
+        client.drop_collection(COLLECTION_NAME)
+    schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=True)
+    schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True)
+    schema.add_field(field_name="vector", datatype=DataType.FLOAT_VECTOR, dim=DIM)
+    schema.add_field(field_name="color", datatype=DataType.VARCHAR, max_length=100)
+    client.create_collection(collection_name=COLLECTION_NAME, schema=schema)
+
+    rows_per_partition = 20000
+    for i, partition in enumerate(PARTITIONS):
+        client.create_partition(collection_name=COLLECTION_NAME, partition_name=partition)
+        columns = generate_columns(rows_per_partition, DIM, start_id=i * rows_per_partition, seed=i)
+        columns["color"] = random_labels(rows_per_partition, "color", 1000, seed=i)
+        insert_in_batches(client, COLLECTION_NAME, columns, batch_size=5000, partition_name=partition)
+    client.flush(collection_name=COLLECTION_NAME)
+
+    index_params = MilvusClient.prepare_index_params()
+    index_params.add_index(field_name="vector", metric_type="L2", index_type="FLAT",
+                           index_name="vector_index", params={})
+    client.create_index(collection_name=COLLECTION_NAME, index_params=index_params, sync=True)
+    client.load_collection(collection_name=COLLECTION_NAME)
+
+    # 3. 向量检索结果流式导出（各分区并行）
+    print("\n=== search_iterator 流式导出 ===")
+    query_vector = generate_vectors(1, DIM)[0].tolist()
+    search_schema = pa.schema([
+        ("id", pa.int64()), ("distance", pa.float32()), ("partition", pa.string()), ("color", pa.string())
+    ])
+    start = time.perf_counter()
+    total = export_parquet(
+        [lambda p=p: iter_search_batches(client, COLLECTION_NAME, query_vector, rows_per_partition, ["color"], p)
+         for p in PARTITIONS],
+        "search_export.parquet",
+        search_schema
+    )
+    print(f"导出 {total} 条结果到 search_export.parquet，用时 {time.perf_counter() - start:.2f}s")
+
+    # 4. 标量过滤结果流式导出（包含向量字段）
+    print("\n=== query_iterator 流式导出 ===")
+    query_schema = pa.schema([
+        ("id", pa.int64()), ("color", pa.string()), ("vector", pa.list_(pa.float32(), DIM)), ("partition", pa.string())
+    ])
+    start = time.perf_counter()
+    total = export_parquet(
+        [lambda p=p: iter_query_batches(client, COLLECTION_NAME, 'color like "color_1%"', ["color", "vector"], p)
+         for p in PARTITIONS],
+        "query_export.parquet",
+        query_schema
+    )
+    print(f"导出 {total} 条记录到 query_export.parquet，用时 {time.perf_counter() - start:.2f}s")
+
+    # 5. 校验：按行组读取，不一次性载入整个文件
+    parquet_file = pq.ParquetFile("search_export.parquet")
+    print(f"\nsearch_export.parquet: {parquet_file.metadata.num_rows} 行, {parquet_file.num_row_groups} 个行组")
+    first_batch = next(parquet_file.iter_batches(batch_size=5))
+    for row in first_batch.to_pylist():
+        print(f"ID: {row['id']}, 距离: {row['distance']}, 颜色: {row['color']}, 分区: {row['partition']}")
+
+    # 6. 清理
+    client.release_collection(collection_name=COLLECTION_NAME)
@@ -0,0 +1,136 @@
+from pymilvus import MilvusClient, DataType
+import argparse
+import csv
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from milvus_data_utils import generate_vectors, insert_in_batches
+from milvus_index_utils import add_scalar_indexes, measure_latency
+
+"""
+过滤搜索：选择率 vs 延迟（有/无标量索引、有/无分区键）
+
+03-filtered-search.py、09-metadata-query.py 过去在没有标量索引的字段上过滤，
+create_milvus_db.py 的十个 VARCHAR 元数据字段也都没有索引，数据量上来后过滤就退化为逐行扫描。
+
+本脚本模拟 SNOMED 类元数据：
+- domain：低基数、分布倾斜（少数几个域占大多数概念），对应 domain_id
+- standard：只有 S / C / NA 三个值，对应 standard_concept
+- bucket：0~999 均匀整数，用于构造任意选择率的范围过滤
+在三种集合配置上运行同一组过滤表达式，记录选择率和 p50/p99 延迟：
+1. no_index：只有向量索引
+2. scalar_index：domain / standard 用 BITMAP，bucket 用 STL_SORT
+3. partition_key：在 2 的基础上把 domain 设为分区键，按 domain 过滤时只搜索相关分区
+
+运行方式：
+    python 11-scalar-index-benchmark.py --n 1000000
+"""
+
+DIM = 128
+TOP_K = 10
+DOMAINS = ["Condition", "Procedure", "Observation", "Drug", "Measurement", "Device", "Specimen", "Meas Value"]
+DOMAIN_PROBS = [0.5, 0.25, 0.12, 0.06, 0.04, 0.02, 0.008, 0.002]
+SCALAR_INDEXES = {"domain": "BITMAP", "standard": "BITMAP", "bucket": "STL_SORT"}
+CONFIGS = {
+    "no_index": {"scalar_indexes": {}, "partition_key": False},
+    "scalar_index": {"scalar_indexes": SCALAR_INDEXES, "partition_key": False},
+    "partition_key": {"scalar_indexes": SCALAR_INDEXES, "partition_key": True},
+}
+OUTPUT_PATH = "scalar_index_benchmark.csv"
+
+
+def generate_metadata(n, seed=0):
+    """
+    生成按列组织的元数据
+    """
+    rng = np.random.default_rng(seed)
+    return {
+        "domain": np.array(DOMAINS)[rng.choice(len(DOMAINS), size=n, p=DOMAIN_PROBS)],
+        "standard": np.array(["S", "C", "NA"])[rng.choice(3, size=n, p=[0.7, 0.1, 0.2])],
+        "bucket": rng.integers(0, 1000, size=n, dtype=np.int64),
+    }
+
+
+def filter_cases(metadata):
+    """
+    构造一组覆盖不同选择率的过滤表达式，并用 numpy 计算精确选择率
+    """
+    domain, standard, bucket = metadata["domain"], metadata["standard"], metadata["bucket"]
+    cases = [(f'domain == "{d}"', domain == d) for d in DOMAINS]
+    cases.append(('domain == "Condition" and standard == "S"', (domain == "Condition") & (standard == "S")))
+    cases.append(('domain == "Device" and standard == "C"', (domain == "Device") & (standard == "C")))
+    for t in (1, 10, 100, 500):
+        cases.append((f"bucket < {t}", bucket < t))
+    return [(expr, float(mask.mean())) for expr, mask in cases]
+
+
+def build_collection(client, name, columns, scalar_indexes, partition_key):
+    """
+    按配置创建集合、批量插入、建索引并加载
+    """
+    if client.has_collection(name):
+        client.drop_collection(name)
+    schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=False)
+    schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True)
+    schema.add_field(field_name="vector", datatype=DataType.FLOAT_VECTOR, dim=DIM)
+    schema.add_field(field_name="domain", datatype=DataType.VARCHAR, max_length=20, is_partition_key=partition_key)
+    schema.add_field(field_name="standard", datatype=DataType.VARCHAR, max_length=2)
+    schema.add_field(field_name="bucket", datatype=DataType.INT64)
+    partition_kwargs = {"num_partitions": 16} if partition_key else {}
+    client.create_collection(collection_name=name, schema=schema, **partition_kwargs)
+
+    insert_in_batches(client, name, columns, batch_size=10000)
+    client.flush(collection_name=name)
+
+    index_params = MilvusClient.prepare_index_params()
+    index_params.add_index(field_name="vector", metric_type="L2", index_type="HNSW",
+                           index_name="vector_index", params={"M": 16, "efConstruction": 200})
+    add_scalar_indexes(index_params, scalar_indexes)
+    client.create_index(collection_name=name, index_params=index_params, sync=True)
+    client.load_collection(collection_name=name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="过滤选择率 vs 延迟基准测试")
+    parser.add_argument("--n", type=int, default=200000, help="实体数量")
+    parser.add_argument("--uri", default="http://localhost:19530")
+    parser.add_argument("--num-queries", type=int, default=50)
+    args = parser.parse_args()
+
+    client = MilvusClient(uri=args.uri)
+    metadata = generate_metadata(args.n)
+    columns = {
+        "id": np.arange(args.n, dtype=np.int64),
+        "vector": generate_vectors(args.n, DIM, distribution="clustered", seed=42),
+        **metadata,
+    }
+    queries = generate_vectors(args.num_queries, DIM, distribution="clustered", seed=7)
+    cases = filter_cases(metadata)
+
+    rows = []
+    for config_name, config in CONFIGS.items():
+        name = f"scalar_bench_{config_name}"
+        print(f"\n=== {config_name} ===")
+        try:
+            build_collection(client, name, columns, config["scalar_indexes"], config["partition_key"])
+        except Exception as e:
+            # Milvus Lite 等环境不支持 BITMAP / 分区键时跳过
+            print(f"  跳过 {config_name}: {e}")
+            continue
+        for expr, selectivity in cases:
+            p50, p99 = measure_latency(client, name, queries, TOP_K, "L2", {"ef": 64}, filter_expr=expr)
+            print(f"  选择率={selectivity:8.4%}  p50={p50:7.2f}ms  p99={p99:7.2f}ms  {expr}")
+            rows.append({"config": config_name, "filter": expr, "selectivity": selectivity,
+                         "p50_ms": p50, "p99_ms": p99})
+        client.drop_collection(name)
+
+    with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["config", "filter", "selectivity", "p50_ms", "p99_ms"])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\n结果已保存到 {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
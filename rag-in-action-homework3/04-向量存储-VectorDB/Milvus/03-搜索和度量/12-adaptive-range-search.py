@@ -0,0 +1,131 @@
+from pymilvus import MilvusClient, DataType
+import argparse
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from milvus_data_utils import insert_in_batches
+from milvus_index_utils import (
+    calibrate_range_threshold, range_search, load_tuned_index_params, save_tuned_index_params,
+    RANGE_THRESHOLDS_PATH
+)
+
+"""
+自适应阈值的范围搜索
+
+04-range-search.py 在随机向量上写死 radius=1.0 / range_filter=0.5，
+而 RAG 流程总是取固定 top-k：只有一两个块相关时，其余块也被塞进提示词，浪费上下文。
+
+本脚本：
+1. 校准：对一批标注查询（查询向量 + 相关文档 id）做 top-N 搜索，
+   用 calibrate_range_threshold 选出 F1 最大（或满足目标召回率）的相似度阈值，
+   按 "集合名/嵌入模型" 写入 range_thresholds.json —— 阈值依赖嵌入模型的分数分布，换模型要重新校准
+2. 服务：range_search 用 radius=阈值做范围搜索，每个查询返回的结果数随相关文档数变化，
+   没有结果时退回 top-1
+3. 对比固定 top-k：平均返回条数、精确率 / 召回率、估算的提示词 token 数
+
+演示数据：大小不一的簇（1~40 个文档）模拟"有的问题只有一个相关块、有的有很多"，同簇即相关。
+真实场景中把 make_demo_data 换成自己的嵌入和标注即可。
+"""
+
+COLLECTION_NAME = "adaptive_range_demo"
+MODEL_NAME = "synthetic-128d"
+DIM = 128
+METRIC = "COSINE"
+FIXED_TOP_K = 10
+TOKENS_PER_CHUNK = 300  # 估算提示词 token 用
+
+
+def make_demo_data(num_clusters=300, seed=0):
+    """
+    生成大小不一的簇：返回文档向量、簇标签、查询向量、每个查询的相关 id 集合
+    """
+    rng = np.random.default_rng(seed)
+    sizes = np.minimum(rng.zipf(1.6, size=num_clusters), 40)
+    centers = rng.standard_normal((num_clusters, DIM)).astype(np.float32)
+    labels = np.repeat(np.arange(num_clusters), sizes)
+    vectors = centers[labels] + rng.normal(0, 0.08, size=(len(labels), DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = centers + rng.normal(0, 0.08, size=centers.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    relevant = [set(np.flatnonzero(labels == c).tolist()) for c in range(num_clusters)]
+    return vectors, queries, relevant
+
+
+def calibrate(client, queries, relevant, top_n=50, target_recall=None):
+    """
+    在标注查询上校准阈值
+    """
+    results = client.search(collection_name=COLLECTION_NAME, data=queries.tolist(), anns_field="vector",
+                            limit=top_n, search_params={"metric_type": METRIC})
+    scores, labels = [], []
+    for hits, rel in zip(results, relevant):
+        for hit in hits:
+            scores.append(hit["distance"])
+            labels.append(hit["id"] in rel)
+    total_relevant = sum(len(rel) for rel in relevant)
+    return calibrate_range_threshold(scores, labels, total_relevant, METRIC, target_recall)
+
+
+def evaluate(hits_per_query, relevant):
+    """
+    平均返回条数、微平均精确率 / 召回率
+    """
+    returned = sum(len(hits) for hits in hits_per_query)
+    tp = sum(len({hit["id"] for hit in hits} & rel) for hits, rel in zip(hits_per_query, relevant))
+    return {
+        "avg_hits": returned / len(hits_per_query),
+        "precision": tp / max(returned, 1),
+        "recall": tp / sum(len(rel) for rel in relevant),
+        "avg_prompt_tokens": returned / len(hits_per_query) * TOKENS_PER_CHUNK,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="自适应阈值范围搜索")
+    parser.add_argument("--uri", default="http://localhost:19530")
+    parser.add_argument("--target-recall", type=float, default=None, help="不指定则按 F1 选阈值")
+    args = parser.parse_args()
+
+    client = MilvusClient(uri=args.uri)
+    vectors, queries, relevant = make_demo_data()
+    if client.has_collection(COLLECTION_NAME):
+        client.drop_collection(COLLECTION_NAME)
+    schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=False)
+    schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True)
+    schema.add_field(field_name="vector", datatype=DataType.FLOAT_VECTOR, dim=DIM)
+    index_params = MilvusClient.prepare_index_params()
+    index_params.add_index(field_name="vector", metric_type=METRIC, index_type="FLAT", index_name="vector_index")
+    client.create_collection(collection_name=COLLECTION_NAME, schema=schema, index_params=index_params)
+    insert_in_batches(client, COLLECTION_NAME, {"id": np.arange(len(vectors), dtype=np.int64), "vector": vectors})
+    client.flush(collection_name=COLLECTION_NAME)
+    client.load_collection(collection_name=COLLECTION_NAME)
+    print(f"文档 {len(vectors)} 条，查询 {len(queries)} 条，相关文档数 1~{max(len(r) for r in relevant)}")
+
+    # 1. 一半查询用于校准，另一半用于评估
+    half = len(queries) // 2
+    key = f"{COLLECTION_NAME}/{MODEL_NAME}"
+    calibration = calibrate(client, queries[:half], relevant[:half], target_recall=args.target_recall)
+    save_tuned_index_params(key, {"metric_type": METRIC, **calibration}, path=RANGE_THRESHOLDS_PATH)
+    print(f"\n校准结果（{key}）: {calibration}")
+
+    # 2. 服务时读取阈值
+    threshold = load_tuned_index_params(key, path=RANGE_THRESHOLDS_PATH)["threshold"]
+    test_queries, test_relevant = queries[half:], relevant[half:]
+    range_hits = range_search(client, COLLECTION_NAME, test_queries, threshold, METRIC, max_hits=50)
+    fixed_hits = client.search(collection_name=COLLECTION_NAME, data=test_queries.tolist(), anns_field="vector",
+                               limit=FIXED_TOP_K, search_params={"metric_type": METRIC})
+
+    # 3. 对比
+    print(f"\n{'模式':<16}{'平均条数':>10}{'精确率':>10}{'召回率':>10}{'提示词tokens':>14}")
+    for name, hits in [(f"固定 top-{FIXED_TOP_K}", fixed_hits), ("自适应范围搜索", range_hits)]:
+        m = evaluate(hits, test_relevant)
+        print(f"{name:<16}{m['avg_hits']:>10.2f}{m['precision']:>10.3f}{m['recall']:>10.3f}{m['avg_prompt_tokens']:>14.0f}")
+
+    counts = np.bincount([len(h) for h in range_hits])
+    print("\n范围搜索返回条数分布:", {n: int(c) for n, c in enumerate(counts) if c})
+    client.release_collection(collection_name=COLLECTION_NAME)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 from pymilvus import model
 from pymilvus import MilvusClient
-import pandas as pd
-from tqdm import tqdm
+import numpy as np
+import os
 import logging
 from dotenv import load_dotenv
 load_dotenv()
 import torch    
 from pymilvus import MilvusClient, DataType, FieldSchema, CollectionSchema
+from milvus_index_utils import (
+    load_tuned_index_params, tuned_search_params, add_scalar_indexes, is_milvus_lite, lite_scalar_indexes
+)
+from milvus_bulk_loader import iter_csv_batches, bulk_load, load_checkpoint
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -34,13 +38,42 @@ client = MilvusClient(db_path)
 
 collection_name = "concepts_only_name"
 # collection_name = "concepts_with_synonym"
+METRIC_TYPE = "COSINE"  # 集合的向量度量类型，调优结果必须使用同一度量
+
+# 标量索引：过滤字段没有标量索引时，带 filter 的搜索要逐行计算过滤表达式
+# BITMAP 用于低基数字段，INVERTED 用于高基数字段（==、in、前缀 like）
+SCALAR_INDEXES = {
+    "domain_id": "BITMAP",
+    "standard_concept": "BITMAP",
+    "vocabulary_id": "BITMAP",
+    "concept_class_id": "INVERTED",
+    "concept_id": "INVERTED",
+    "concept_name": "INVERTED",
+    "concept_code": "INVERTED",
+}
+# 分区键：设置后 Milvus 按该字段的哈希自动分区，按该字段过滤时只搜索相关分区
+# 设为 None 则不使用分区键（分区键需要在创建集合时确定，已有集合需要重建）
+PARTITION_KEY_FIELD = "domain_id"
+NUM_PARTITIONS = 16
+
+# Milvus Lite（本地 .db 文件）不支持 BITMAP 索引和分区键：BITMAP 换成 INVERTED，不设分区键
+# 连接 Milvus 服务（db_path 改为 http://localhost:19530）时按上面的声明启用
+if is_milvus_lite(db_path):
+    scalar_indexes = lite_scalar_indexes(SCALAR_INDEXES)
+    partition_key_field = None
+    logging.info("Milvus Lite: BITMAP -> INVERTED, partition key disabled")
+else:
+    scalar_indexes = SCALAR_INDEXES
+    partition_key_field = PARTITION_KEY_FIELD
+
+
+def varchar_field(name, max_length):
+    """
+    VARCHAR 标量字段；字段名等于分区键字段时设为分区键
+    """
+    return FieldSchema(name=name, dtype=DataType.VARCHAR, max_length=max_length,
+                       is_partition_key=(name == partition_key_field))
 
-# 加载数据
-logging.info("Loading data from CSV")
-df = pd.read_csv(file_path, 
-                 dtype=str, 
-                low_memory=False,
-                 ).fillna("NA")
 
 # 获取向量维度（使用一个样本文档）
 sample_doc = "Sample Text"
@@ -51,15 +84,15 @@ vector_dim = len(sample_embedding)
 fields = [
     FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
     FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=vector_dim), # BGE-m3 最重要
-    FieldSchema(name="concept_id", dtype=DataType.VARCHAR, max_length=50),
-    FieldSchema(name="concept_name", dtype=DataType.VARCHAR, max_length=200),
-    FieldSchema(name="domain_id", dtype=DataType.VARCHAR, max_length=20),
-    FieldSchema(name="vocabulary_id", dtype=DataType.VARCHAR, max_length=20),
-    FieldSchema(name="concept_class_id", dtype=DataType.VARCHAR, max_length=20),
-    FieldSchema(name="standard_concept", dtype=DataType.VARCHAR, max_length=1),
-    FieldSchema(name="concept_code", dtype=DataType.VARCHAR, max_length=50),
-    FieldSchema(name="valid_start_date", dtype=DataType.VARCHAR, max_length=10),
-    FieldSchema(name="valid_end_date", dtype=DataType.VARCHAR, max_length=10),
+    varchar_field("concept_id", 50),
+    varchar_field("concept_name", 200),
+    varchar_field("domain_id", 20),
+    varchar_field("vocabulary_id", 20),
+    varchar_field("concept_class_id", 20),
+    varchar_field("standard_concept", 1),
+    varchar_field("concept_code", 50),
+    varchar_field("valid_start_date", 10),
+    varchar_field("valid_end_date", 10),
     # FieldSchema(name="full_name", dtype=DataType.VARCHAR, max_length=500), # FSN
     # FieldSchema(name="synonyms", dtype=DataType.VARCHAR, max_length=1000), # 同义词
     # FieldSchema(name="definitions", dtype=DataType.VARCHAR, max_length=1000), # 定义
@@ -69,23 +102,44 @@ schema = CollectionSchema(fields,
                           "SNOMED-CT Concepts", 
                           enable_dynamic_field=True)
 
+# 断点续传检查点：记录最后一个成功插入的批次
+checkpoint_path = f"{db_path}.{collection_name}.checkpoint.json"
+
 # 如果集合不存在，创建集合
 if not client.has_collection(collection_name):
+    # 新集合不能沿用旧集合的检查点
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    partition_kwargs = {"num_partitions": NUM_PARTITIONS} if partition_key_field else {}
     client.create_collection(
         collection_name=collection_name,
         schema=schema,
+        **partition_kwargs
         # dimension=vector_dim
     )
     logging.info(f"Created new collection: {collection_name}")
 
 # # 在创建集合后添加索引
+# 优先使用 02-索引/07-索引参数自动调优.py 写入的调优结果；
+# 没有调优结果时使用 AUTOINDEX（AUTOINDEX 自行选择参数，不需要也不接受 nlist 等参数）
+index_config = load_tuned_index_params(
+    collection_name,
+    default={"index_type": "AUTOINDEX", "metric_type": METRIC_TYPE, "params": {}}
+)
+if index_config["metric_type"] != METRIC_TYPE:
+    raise ValueError(
+        f"tuned_index_params.json 中 {collection_name} 的度量类型是 {index_config['metric_type']}，"
+        f"与集合的 {METRIC_TYPE} 不一致；请用 --metric {METRIC_TYPE} 重新运行 07-索引参数自动调优.py"
+    )
+logging.info(f"Index config for {collection_name}: {index_config}")
 index_params = client.prepare_index_params()
 index_params.add_index(
     field_name="vector",  # 指定要为哪个字段创建索引，这里是向量字段
-    index_type="AUTOINDEX",  # 使用自动索引类型，Milvus会根据数据特性选择最佳索引
-    metric_type="COSINE",  # 使用余弦相似度作为向量相似度度量方式
-    params={"nlist": 1024}  # 索引参数：nlist表示聚类中心的数量，值越大检索精度越高但速度越慢
+    index_type=index_config["index_type"],
+    metric_type=METRIC_TYPE,  # 使用余弦相似度作为向量相似度度量方式
+    params=index_config["params"]
 )
+add_scalar_indexes(index_params, scalar_indexes)
 
 client.create_index(
     collection_name=collection_name,
@@ -94,71 +148,47 @@ client.create_index(
 
 # 批量处理
 batch_size = 1024
-
-for start_idx in tqdm(range(0, len(df), batch_size), desc="Processing batches"):
-    end_idx = min(start_idx + batch_size, len(df))
-    batch_df = df.iloc[start_idx:end_idx]
-
-    # 准备文档
-    # docs = [f"Term: {row['concept_name']}; Synonyms: {row['Synonyms']}" for _, row in batch_df.iterrows()]
-    docs = []
-    for _, row in batch_df.iterrows():
-        doc_parts = [row['concept_name']]
-
-        # if row['Full Name'] != "NA" and row['Full Name'] != row['concept_name']:
-        #     doc_parts.append(",Full Name: " + row['Full Name'])
-
-        # if row['Synonyms'] != "NA" and row['Synonyms'] != row['concept_name']:
-        #     doc_parts.append(", Synonyms: " + row['Synonyms'])
-
-        # if row['Definitions'] != "NA" and row['Definitions'] not in [row['concept_name'], row.get('Full Name', '')]:
-        #     doc_parts.append(", Definitions: " + row['Definitions'])
-
-        docs.append(" ".join(doc_parts))
-
-    # 生成嵌入
-    try:
-        embeddings = embedding_function(docs)
-        logging.info(f"Generated embeddings for batch {start_idx // batch_size + 1}")
-    except Exception as e:
-        logging.error(f"Error generating embeddings for batch {start_idx // batch_size + 1}: {e}")
-        continue
-
-    # 准备数据
-    data = [
-        {
-            # "id": idx + start_idx,
-            "vector": embeddings[idx],
-            "concept_id": str(row['concept_id']),
-            "concept_name": str(row['concept_name']),
-            "domain_id": str(row['domain_id']),
-            "vocabulary_id": str(row['vocabulary_id']),
-            "concept_class_id": str(row['concept_class_id']),
-            "standard_concept": str(row['standard_concept']),
-            "concept_code": str(row['concept_code']),
-            "valid_start_date": str(row['valid_start_date']),
-            "valid_end_date": str(row['valid_end_date']),
-            # "invalid_reason": str(row['invalid_reason']),
-            # "full_name": str(row['Full Name']),
-            # "synonyms": str(row['Synonyms']),
-            # "definitions": str(row['Definitions']),
-            "input_file": file_path
-        } for idx, (_, row) in enumerate(batch_df.iterrows())
-    ]
-
-    # 插入数据 - 1024个向量条目，即1024个医疗术语（标准概念）
-    try:
-        res = client.insert(
-            collection_name=collection_name,
-            data=data
-        )
-        logging.info(f"Inserted batch {start_idx // batch_size + 1}, result: {res}")
-    except Exception as e:
-        logging.error(f"Error inserting batch {start_idx // batch_size + 1}: {e}")
+CSV_COLUMNS = ["concept_id", "concept_name", "domain_id", "vocabulary_id", "concept_class_id",
+               "standard_concept", "concept_code", "valid_start_date", "valid_end_date"]
+
+
+def build_docs(batch_df):
+    """
+    待嵌入的文本：直接取 concept_name 列
+    """
+    # 如需拼接同义词/定义，在这里做列运算，例如：
+    # batch_df["concept_name"] + ", Synonyms: " + batch_df["Synonyms"]
+    return batch_df["concept_name"].tolist()
+
+
+def build_columns(batch_df, embeddings):
+    """
+    按列组织插入数据 - 1024个向量条目，即1024个医疗术语（标准概念）
+    """
+    columns = {"vector": np.asarray(embeddings, dtype=np.float32)}
+    for name in CSV_COLUMNS:
+        columns[name] = batch_df[name].to_numpy()
+    columns["input_file"] = np.full(len(batch_df), file_path)
+    return columns
+
+
+start_batch = load_checkpoint(checkpoint_path) + 1
+if start_batch > 0:
+    logging.info(f"Resuming from batch {start_batch + 1} (checkpoint: {checkpoint_path})")
+inserted = bulk_load(
+    client,
+    collection_name,
+    iter_csv_batches(file_path, batch_size, start_batch=start_batch, usecols=CSV_COLUMNS),
+    build_docs,
+    build_columns,
+    embedding_function,
+    checkpoint_path=checkpoint_path,
+)
+logging.info(f"Inserted {inserted} rows in this run")
 
 logging.info("Insert process completed.")
 
-# 示例查询
+# 示例查询（精确名称、缩写等常见查询应先走 snomed_concept_linker.py 的哈希/模糊索引，不必调用嵌入模型）
 # query = "somatic hallucination"
 query = "SOB"
 query_embeddings = embedding_function([query])
@@ -169,6 +199,7 @@ search_result = client.search(
     collection_name=collection_name,
     data=[query_embeddings[0].tolist()],
     limit=5,
+    search_params=tuned_search_params(collection_name, METRIC_TYPE),  # 调优出的 nprobe / ef
     output_fields=["concept_name", 
                 #    "synonyms", 
                    "concept_class_id", 
@@ -0,0 +1,134 @@
+# milvus_bulk_loader.py - DataFrame/CSV 到 Milvus 的批量导入工具
+import json
+import logging
+import os
+import queue
+import threading
+import pandas as pd
+from milvus_data_utils import columns_to_rows
+
+"""
+CSV 分块读取 + 嵌入/插入流水线 + 断点续传
+
+create_milvus_db.py 原来先把整个 CSV 读进内存，每个 1024 行的批次用 iterrows() 遍历两遍
+（一遍拼文档、一遍拼插入字典），嵌入和插入串行执行，中途失败只能从头再来。
+
+这里：
+- iter_csv_batches：pd.read_csv(chunksize=...) 分块读取，续传时用 skiprows 跳过已提交的行，不再解析它们
+- bulk_load：生产者线程读块并计算嵌入，主线程插入；两者通过有界队列衔接，
+  第 i 批插入的同时第 i+1 批在做嵌入
+- 每批插入成功后把批次号写入检查点文件，失败后重新运行即从下一批继续
+
+插入数据由调用方的 build_columns(batch_df, embeddings) 按列生成（直接取 DataFrame 列，不逐行访问）。
+"""
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    读取最后一个已提交的批次号，没有检查点时返回 -1
+    """
+    if not os.path.exists(checkpoint_path):
+        return -1
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        return json.load(f)["last_committed_batch"]
+
+
+def save_checkpoint(checkpoint_path, batch_idx, total_rows):
+    """
+    原子地写入检查点（先写临时文件再替换，避免中途崩溃留下半个文件）
+    """
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"last_committed_batch": batch_idx, "total_rows": total_rows}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def iter_csv_batches(file_path, batch_size, start_batch=0, usecols=None):
+    """
+    分块读取 CSV
+
+    参数：
+        file_path (str): CSV 路径
+        batch_size (int): 每批行数
+        start_batch (int): 从第几批开始（续传时跳过前面的行）
+        usecols (list): 只读取这些列
+
+    返回：
+        generator: (批次号, DataFrame)
+    """
+    reader = pd.read_csv(
+        file_path,
+        dtype=str,
+        usecols=usecols,
+        chunksize=batch_size,
+        skiprows=range(1, start_batch * batch_size + 1),  # 保留表头
+    )
+    for offset, chunk in enumerate(reader):
+        yield start_batch + offset, chunk.fillna("NA")
+
+
+def bulk_load(client, collection_name, batches, build_docs, build_columns, embedding_function,
+              checkpoint_path=None, queue_size=2):
+    """
+    嵌入与插入重叠执行的批量导入
+
+    参数：
+        client (MilvusClient): Milvus 客户端
+        collection_name (str): 集合名
+        batches (iterable): (批次号, DataFrame) 序列，通常来自 iter_csv_batches
+        build_docs (callable): batch_df -> 待嵌入的文本列表
+        build_columns (callable): (batch_df, embeddings) -> {字段名: 等长列}
+        embedding_function (callable): 文本列表 -> 向量列表
+        checkpoint_path (str): 检查点文件，None 表示不记录
+        queue_size (int): 已嵌入但未插入的批次上限
+
+    返回：
+        int: 本次插入的行数
+
+    说明：
+        任何一批嵌入或插入失败都会停止导入并抛出异常，检查点停在最后一个成功的批次，
+        重新运行时从下一批继续；不会像原来那样 continue 跳过失败批次而悄悄丢数据。
+    """
+    ready = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    done = object()
+    errors = []
+
+    def produce():
+        try:
+            for batch_idx, batch_df in batches:
+                if stop.is_set():
+                    break
+                embeddings = embedding_function(build_docs(batch_df))
+                ready.put((batch_idx, build_columns(batch_df, embeddings)))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            ready.put(done)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    total = 0
+    try:
+        while True:
+            item = ready.get()
+            if item is done:
+                break
+            batch_idx, columns = item
+            res = client.insert(collection_name=collection_name, data=columns_to_rows(columns))
+            total += res["insert_count"]
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, batch_idx, total)
+            logging.info(f"Inserted batch {batch_idx + 1}: {res['insert_count']} rows")
+    finally:
+        stop.set()
+        # 主线程异常退出时排空队列，让阻塞在 put 上的生产者线程结束
+        while producer.is_alive():
+            try:
+                ready.get(timeout=0.1)
+            except queue.Empty:
+                pass
+    if errors:
+        raise errors[0]
+    return total
@@ -0,0 +1,149 @@
+# milvus_data_utils.py - Milvus 演示/基准测试共用的合成数据工具
+import numpy as np
+
+"""
+合成数据生成与分批插入
+
+各个 Milvus 演示原来都用 [[random.random() for _ in range(128)] for _ in range(num_vectors)]
+逐元素生成向量，再用 Python 循环拼实体字典，数据量一大准备数据的时间就超过了 Milvus 本身。
+
+这里统一用 numpy 一次性生成 float32 矩阵，标量字段也按列生成，插入时按批切片：
+- generate_vectors：uniform / normal / clustered 三种分布，可选 L2 归一化
+- generate_columns：按列组织的插入数据（id、vector 以及任意标量列）
+- insert_in_batches：按批切片列数据再插入，内存里不会同时存在全部行字典
+
+在子目录脚本中使用：
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from milvus_data_utils import generate_vectors, generate_columns, insert_in_batches
+"""
+
+
+def generate_vectors(num_vectors, dim, distribution="uniform", normalize=False,
+                     num_clusters=100, cluster_std=0.1, seed=None):
+    """
+    生成 float32 向量矩阵
+
+    参数：
+        num_vectors (int): 向量数量
+        dim (int): 向量维度
+        distribution (str): 'uniform'（[0,1) 均匀，与原 random.random() 一致）、
+                            'normal'（标准正态）或 'clustered'（高斯混合，更接近真实嵌入）
+        normalize (bool): 是否做 L2 归一化（用于 IP/COSINE 度量）
+        num_clusters (int): clustered 分布的聚类中心数
+        cluster_std (float): clustered 分布的簇内标准差
+        seed (int): 随机种子
+
+    返回：
+        np.ndarray: [num_vectors, dim] 的 float32 矩阵
+    """
+    rng = np.random.default_rng(seed)
+    if distribution == "uniform":
+        vectors = rng.random((num_vectors, dim), dtype=np.float32)
+    elif distribution == "normal":
+        vectors = rng.standard_normal((num_vectors, dim), dtype=np.float32)
+    elif distribution == "clustered":
+        centers = rng.standard_normal((num_clusters, dim), dtype=np.float32)
+        labels = rng.integers(0, num_clusters, size=num_vectors)
+        vectors = centers[labels]
+        vectors += rng.normal(0, cluster_std, size=(num_vectors, dim)).astype(np.float32)
+    else:
+        raise ValueError(f"不支持的分布类型: {distribution}")
+
+    if normalize:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.maximum(norms, 1e-12)
+    return vectors
+
+
+def generate_columns(num_vectors, dim, start_id=0, seed=None, **vector_kwargs):
+    """
+    生成按列组织的基础插入数据
+
+    参数：
+        num_vectors (int): 实体数量
+        dim (int): 向量维度
+        start_id (int): 主键起始值
+        seed (int): 随机种子
+        vector_kwargs: 透传给 generate_vectors 的参数（distribution、normalize 等）
+
+    返回：
+        dict: {"id": np.ndarray[int64], "vector": np.ndarray[float32]}，
+              调用方可以继续往里加同样长度的标量列
+    """
+    return {
+        "id": np.arange(start_id, start_id + num_vectors, dtype=np.int64),
+        "vector": generate_vectors(num_vectors, dim, seed=seed, **vector_kwargs),
+    }
+
+
+def random_labels(num_values, prefix, cardinality, seed=None):
+    """
+    生成形如 f"{prefix}_{k}" 的随机标签列（k ∈ [1, cardinality]）
+
+    参数：
+        num_values (int): 数量
+        prefix (str): 标签前缀，如 'color'
+        cardinality (int): 不同取值个数
+        seed (int): 随机种子
+
+    返回：
+        np.ndarray: 字符串数组
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"{prefix}_{k}" for k in range(1, cardinality + 1)])
+    return vocab[rng.integers(0, cardinality, size=num_values)]
+
+
+def columns_to_rows(columns):
+    """
+    把一批列数据转换成 MilvusClient.insert 需要的行格式
+
+    功能：每列只做一次 tolist()，再用 zip 拼行，不在 Python 中逐元素处理向量
+
+    参数：
+        columns (dict): 字段名 -> 等长数组（numpy 数组、列表或 pandas Series）
+
+    返回：
+        list: 行字典列表
+    """
+    names = list(columns)
+    values = [np.asarray(columns[name]).tolist() for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def iter_row_batches(columns, batch_size):
+    """
+    把列数据按批切片并转换成 MilvusClient.insert 需要的行格式
+
+    参数：
+        columns (dict): 字段名 -> 等长数组
+        batch_size (int): 每批行数
+
+    返回：
+        generator: 每批一个行字典列表
+    """
+    total = len(next(iter(columns.values())))
+    for start in range(0, total, batch_size):
+        yield columns_to_rows({name: column[start:start + batch_size] for name, column in columns.items()})
+
+
+def insert_in_batches(client, collection_name, columns, batch_size=10000, **insert_kwargs):
+    """
+    按批插入列数据
+
+    参数：
+        client (MilvusClient): Milvus 客户端
+        collection_name (str): 集合名
+        columns (dict): 字段名 -> 等长数组
+        batch_size (int): 每批行数
+        insert_kwargs: 透传给 client.insert 的参数（如 partition_name）
+
+    返回：
+        int: 插入的实体总数
+    """
+    total = 0
+    for rows in iter_row_batches(columns, batch_size):
+        client.insert(collection_name=collection_name, data=rows, **insert_kwargs)
+        total += len(rows)
+    return total
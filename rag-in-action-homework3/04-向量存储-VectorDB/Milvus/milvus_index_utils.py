@@ -0,0 +1,285 @@
+# milvus_index_utils.py - 索引基准测试 / 参数调优 / 集合构建脚本共用的索引工具
+import json
+import os
+import time
+from pymilvus import MilvusClient
+import numpy as np
+
+"""
+索引相关的公共函数
+
+- build_index：删除旧索引 → 同步构建新索引 → 加载，返回构建耗时
+- add_scalar_indexes：按 {字段: 索引类型} 声明标量索引（INVERTED / BITMAP / STL_SORT）
+- is_milvus_lite / lite_scalar_indexes：Milvus Lite（本地 .db 文件）不支持 BITMAP 和分区键，按 URI 判断并降级
+- search_ids / measure_latency：批量搜索取 id、逐条搜索测延迟
+- recall_at_k：与 FLAT 真值比较的召回率
+- estimate_index_size_mb：按数据结构公式估算索引内存
+- load_tuned_index_params / save_tuned_index_params：读写调优结果（tuned_index_params.json），
+  集合构建脚本据此建索引，没有调优结果时使用默认参数；tuned_search_params：搜索时使用调优出的 nprobe / ef
+- calibrate_range_threshold / range_search：从标注样本校准相似度阈值，用范围搜索返回不定数量的结果
+"""
+
+TUNED_PARAMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tuned_index_params.json")
+RANGE_THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "range_thresholds.json")
+
+
+def build_index(client, collection_name, index_type, params, metric_type, field_name="vector"):
+    """
+    删除旧索引后同步构建新索引并加载
+
+    返回：
+        float: 构建耗时（秒）
+    """
+    client.release_collection(collection_name=collection_name)
+    # 只删除该向量字段上的索引，保留标量索引
+    for name in client.list_indexes(collection_name=collection_name, field_name=field_name):
+        client.drop_index(collection_name=collection_name, index_name=name)
+
+    index_params = MilvusClient.prepare_index_params()
+    index_params.add_index(
+        field_name=field_name,
+        metric_type=metric_type,
+        index_type=index_type,
+        index_name=f"{field_name}_index",
+        params=params
+    )
+    start = time.perf_counter()
+    client.create_index(collection_name=collection_name, index_params=index_params, sync=True)
+    build_seconds = time.perf_counter() - start
+    client.load_collection(collection_name=collection_name)
+    return build_seconds
+
+
+def add_scalar_indexes(index_params, scalar_indexes):
+    """
+    把标量索引声明加入 index_params
+
+    说明：
+        - BITMAP：低基数字段（如 domain_id、standard_concept），过滤时直接做位图运算
+        - INVERTED：高基数 VARCHAR / INT 字段，支持 ==、in、前缀 like
+        - STL_SORT：数值字段的范围过滤（>、<、between）
+        没有标量索引时，带 filter 的搜索要逐行计算过滤表达式
+
+    参数：
+        index_params: MilvusClient.prepare_index_params() 的返回值
+        scalar_indexes (dict): 字段名 -> 索引类型
+    """
+    for field_name, index_type in scalar_indexes.items():
+        index_params.add_index(field_name=field_name, index_type=index_type, index_name=f"{field_name}_index")
+    return index_params
+
+
+def is_milvus_lite(uri):
+    """
+    URI 是本地文件路径（Milvus Lite）而不是 http(s):// / tcp:// 服务地址时返回 True
+    """
+    return "://" not in uri
+
+
+def lite_scalar_indexes(scalar_indexes):
+    """
+    Milvus Lite 只支持部分标量索引：BITMAP 换成 INVERTED，其他保持不变
+    """
+    return {field_name: "INVERTED" if index_type == "BITMAP" else index_type
+            for field_name, index_type in scalar_indexes.items()}
+
+
+def search_ids(client, collection_name, queries, top_k, metric_type, search_params,
+               batch_size=50, field_name="vector"):
+    """
+    批量搜索
+
+    返回：
+        tuple: (每个查询的 id 列表, QPS)
+    """
+    ids = []
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        results = client.search(
+            collection_name=collection_name,
+            data=np.asarray(queries[i:i + batch_size]).tolist(),
+            anns_field=field_name,
+            limit=top_k,
+            search_params={"metric_type": metric_type, "params": search_params},
+        )
+        ids.extend([hit["id"] for hit in hits] for hits in results)
+    return ids, len(queries) / (time.perf_counter() - start)
+
+
+def measure_latency(client, collection_name, queries, top_k, metric_type, search_params, field_name="vector",
+                    filter_expr=""):
+    """
+    逐条查询测单查询延迟（filter_expr 非空时为过滤搜索）
+
+    返回：
+        tuple: (p50, p99) 毫秒
+    """
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        client.search(
+            collection_name=collection_name,
+            data=[np.asarray(query).tolist()],
+            anns_field=field_name,
+            limit=top_k,
+            search_params={"metric_type": metric_type, "params": search_params},
+            filter=filter_expr,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+
+def recall_at_k(results, ground_truth, k):
+    """
+    计算平均 recall@k
+
+    参数：
+        results (list[list[int]]): 每个查询返回的 id
+        ground_truth (list[list[int]]): 每个查询的真值 id
+
+    返回：
+        float: 平均召回率
+    """
+    hits = sum(len(set(r[:k]) & set(g[:k])) for r, g in zip(results, ground_truth))
+    return hits / (k * len(ground_truth))
+
+
+def estimate_index_size_mb(index_type, params, n, dim):
+    """
+    按索引结构估算内存占用（MB）
+
+    说明：Milvus 不直接暴露索引字节数，这里按数据结构公式估算，用于不同索引间的相对比较
+    """
+    raw = n * dim * 4
+    if index_type == "FLAT":
+        size = raw
+    elif index_type == "IVF_FLAT":
+        size = raw + params["nlist"] * dim * 4 + n * 8
+    elif index_type == "IVF_PQ":
+        codebook = params["m"] * (2 ** params["nbits"]) * (dim // params["m"]) * 4
+        size = n * params["m"] * params["nbits"] / 8 + params["nlist"] * dim * 4 + codebook + n * 8
+    elif index_type == "HNSW":
+        size = raw + n * params["M"] * 2 * 4
+    elif index_type == "DISKANN":
+        # DiskANN 的图和全精度向量在磁盘上，内存中只保留 PQ 压缩向量（约 dim/4 字节/条）
+        size = n * dim / 4
+    else:
+        size = raw
+    return size / 1024 / 1024
+
+
+def load_tuned_index_params(collection_name, default=None, path=TUNED_PARAMS_PATH):
+    """
+    读取某个集合的调优结果
+
+    参数：
+        collection_name (str): 集合名
+        default (dict): 没有调优结果时返回的默认配置
+        path (str): 调优结果文件
+
+    返回：
+        dict: {"index_type", "metric_type", "params", "search_params", ...}
+    """
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get(collection_name, default)
+
+
+def tuned_search_params(collection_name, metric_type, path=TUNED_PARAMS_PATH):
+    """
+    搜索参数：有调优结果且度量类型一致时带上调优出的 nprobe / ef，否则只指定度量类型
+
+    返回：
+        dict: 可直接传给 client.search(search_params=...)
+    """
+    config = load_tuned_index_params(collection_name, path=path)
+    if config and config.get("metric_type") == metric_type and config.get("search_params"):
+        return {"metric_type": metric_type, "params": config["search_params"]}
+    return {"metric_type": metric_type}
+
+
+def save_tuned_index_params(collection_name, config, path=TUNED_PARAMS_PATH):
+    """
+    把调优结果写回 tuned_index_params.json（按集合名合并）
+    """
+    data = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    data[collection_name] = config
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def calibrate_range_threshold(scores, labels, total_relevant, metric_type, target_recall=None):
+    """
+    从标注样本校准范围搜索阈值
+
+    参数：
+        scores (array): 标注查询 top-N 结果的分数（所有查询拼在一起）
+        labels (array): 每个结果是否相关（bool）
+        total_relevant (int): 所有查询的相关文档总数（没进 top-N 的相关文档算漏召回）
+        metric_type (str): L2 越小越相似；IP / COSINE 越大越相似
+        target_recall (float): 指定时取满足召回率的最严格阈值，否则取 F1 最大的阈值
+
+    返回：
+        dict: {"threshold", "precision", "recall", "f1"}
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    labels = np.asarray(labels, dtype=bool)
+    order = np.argsort(scores) if metric_type == "L2" else np.argsort(-scores)
+    scores, labels = scores[order], labels[order]
+    # 阈值取在第 i 个结果上：前 i+1 个结果全部保留
+    tp = np.cumsum(labels)
+    precision = tp / np.arange(1, len(labels) + 1)
+    recall = tp / max(total_relevant, 1)
+    f1 = 2 * precision * recall / np.maximum(precision + recall, 1e-12)
+    # 同分的结果要么一起保留要么一起丢弃，只在分数变化处取阈值
+    boundary = np.append(scores[1:] != scores[:-1], True)
+    if target_recall is not None and (recall[boundary] >= target_recall).any():
+        best = np.flatnonzero(boundary & (recall >= target_recall))[0]
+    else:
+        best = np.flatnonzero(boundary)[np.argmax(f1[boundary])]
+    return {"threshold": float(scores[best]), "precision": float(precision[best]),
+            "recall": float(recall[best]), "f1": float(f1[best])}
+
+
+def range_search(client, collection_name, query_vectors, threshold, metric_type, max_hits=20, min_hits=1,
+                 field_name="vector", output_fields=None):
+    """
+    按校准阈值做范围搜索，每个查询返回的结果数不固定
+
+    说明：
+        - IP / COSINE：radius 是相似度下界，返回相似度 > threshold 的结果
+        - L2：radius 是距离上界，返回距离 < threshold 的结果
+        - 一个结果都没有的查询退回普通 top-min_hits 搜索，保证上下文不为空
+
+    返回：
+        list: 每个查询一个 hit 列表
+    """
+    # radius 是开区间，把阈值往外放一点，保证分数恰好等于阈值的结果也被保留
+    radius = threshold * (1 + 1e-6) + 1e-6 if metric_type == "L2" else threshold * (1 - 1e-6) - 1e-6
+    data = np.asarray(query_vectors).tolist()
+    results = client.search(
+        collection_name=collection_name,
+        data=data,
+        anns_field=field_name,
+        limit=max_hits,
+        search_params={"metric_type": metric_type, "params": {"radius": radius}},
+        output_fields=output_fields,
+    )
+    results = [list(hits) for hits in results]
+    empty = [i for i, hits in enumerate(results) if len(hits) < min_hits]
+    if empty and min_hits > 0:
+        fallback = client.search(
+            collection_name=collection_name,
+            data=[data[i] for i in empty],
+            anns_field=field_name,
+            limit=min_hits,
+            search_params={"metric_type": metric_type},
+            output_fields=output_fields,
+        )
+        for i, hits in zip(empty, fallback):
+            results[i] = list(hits)
+    return results
@@ -0,0 +1,191 @@
+# snomed_concept_linker.py - SNOMED 概念链接：精确匹配 → 模糊匹配 → 向量检索
+import logging
+import re
+import time
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+"""
+分级 SNOMED 概念链接
+
+create_milvus_db.py 末尾对 "SOB" 做向量检索，再单独用 client.query 精确查 'Dyspnea'，
+精确名称、缩写这类最常见的查询也要先过一遍 BGE-M3 嵌入模型。
+
+这里按代价从低到高分三级，前一级命中就直接返回：
+1. exact：概念名 / 同义词 / 缩写的哈希表（启动时从概念 CSV 构建），归一化后字典查找，微秒级
+2. fuzzy：字符 3-gram TF-IDF 稀疏矩阵，一次稀疏矩阵乘法得到所有概念的余弦相似度，
+   处理拼写错误和英式/美式拼写（dyspnoea / dyspnea），分数超过阈值才采纳
+3. dense：以上都没命中才调用嵌入模型，在 Milvus 中做向量检索；嵌入模型在第一次需要时才加载
+
+使用方式：
+    linker = SnomedConceptLinker.from_csv("backend/data/SNOMED_5000.csv",
+                                          milvus_uri="backend/db/snomed_bge_m3.db")
+    linker.link("SOB")
+"""
+
+# 常见临床缩写（可通过 abbreviations 参数或 CSV 扩充）
+CLINICAL_ABBREVIATIONS = {
+    "sob": "Dyspnea",
+    "doe": "Dyspnea on exertion",
+    "cp": "Chest pain",
+    "ha": "Headache",
+    "htn": "Hypertensive disorder",
+    "dm": "Diabetes mellitus",
+    "mi": "Myocardial infarction",
+    "chf": "Congestive heart failure",
+    "copd": "Chronic obstructive lung disease",
+    "uti": "Urinary tract infectious disease",
+    "afib": "Atrial fibrillation",
+    "n/v": "Nausea and vomiting",
+}
+CONCEPT_FIELDS = ["concept_id", "concept_name", "domain_id", "concept_class_id", "standard_concept"]
+
+
+def normalize(text):
+    """
+    归一化：小写、合并空白、去掉首尾标点
+    """
+    return re.sub(r"\s+", " ", str(text).lower()).strip(" .,;:")
+
+
+class SnomedConceptLinker:
+    """
+    三级概念链接器：exact → fuzzy → dense
+    """
+
+    def __init__(self, concepts, abbreviations=None, synonym_columns=None, fuzzy_threshold=0.8,
+                 milvus_uri=None, collection_name="concepts_only_name", embedding_factory=None,
+                 metric_type="COSINE"):
+        """
+        参数：
+            concepts (pd.DataFrame): 概念表，至少包含 concept_id、concept_name
+            abbreviations (dict): 缩写 -> 概念名
+            synonym_columns (list): 同义词所在的列（列内多个同义词用 | 或 ; 分隔）
+            fuzzy_threshold (float): 模糊匹配的最低余弦相似度，低于它交给向量检索
+            milvus_uri (str): Milvus 地址 / Milvus Lite 文件，None 表示不启用向量检索
+            collection_name (str): 概念集合名（create_milvus_db.py 创建）
+            embedding_factory (callable): 返回嵌入函数的无参函数，第一次向量检索时才调用
+            metric_type (str): 集合的度量类型；有调优结果时搜索使用调优出的 nprobe / ef
+        """
+        self.fields = [f for f in CONCEPT_FIELDS if f in concepts.columns]
+        self.records = concepts[self.fields].to_dict("records")
+        self.fuzzy_threshold = fuzzy_threshold
+        self.collection_name = collection_name
+        self.embedding_factory = embedding_factory
+        self._embedding_function = None
+        self._client = None
+        self._search_params = None
+        if milvus_uri:
+            from pymilvus import MilvusClient
+            from milvus_index_utils import tuned_search_params
+            self._client = MilvusClient(milvus_uri)
+            self._search_params = tuned_search_params(collection_name, metric_type)
+
+        # 1. 精确索引：归一化字符串 -> 概念下标列表
+        names = concepts["concept_name"].map(normalize).tolist()
+        self.exact_index = {}
+        for idx, name in enumerate(names):
+            self.exact_index.setdefault(name, []).append(idx)
+        for column in synonym_columns or []:
+            for idx, value in enumerate(concepts[column].tolist()):
+                if value in ("NA", "") or pd.isna(value):
+                    continue
+                for synonym in re.split(r"[|;]", value):
+                    key = normalize(synonym)
+                    if key and idx not in self.exact_index.get(key, []):
+                        self.exact_index.setdefault(key, []).append(idx)
+        for abbreviation, concept_name in {**CLINICAL_ABBREVIATIONS, **(abbreviations or {})}.items():
+            target = self.exact_index.get(normalize(concept_name))
+            if target:
+                self.exact_index.setdefault(normalize(abbreviation), target)
+
+        # 2. 模糊索引：字符 3-gram TF-IDF（行已 L2 归一化，点积即余弦相似度）
+        self.vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 3), dtype=np.float32)
+        self.ngram_matrix = self.vectorizer.fit_transform(names)
+        logging.info(f"Linker ready: {len(self.records)} concepts, {len(self.exact_index)} exact keys, "
+                     f"{self.ngram_matrix.shape[1]} n-grams")
+
+    @classmethod
+    def from_csv(cls, file_path, **kwargs):
+        """
+        从概念 CSV 构建（只读取需要的列）
+        """
+        header = pd.read_csv(file_path, nrows=0).columns
+        synonym_columns = [c for c in ("Synonyms", "Full Name") if c in header]
+        usecols = [c for c in CONCEPT_FIELDS if c in header] + synonym_columns
+        concepts = pd.read_csv(file_path, dtype=str, usecols=usecols).fillna("NA")
+        kwargs.setdefault("synonym_columns", synonym_columns)
+        return cls(concepts, **kwargs)
+
+    def _exact(self, query):
+        return [{**self.records[i], "score": 1.0} for i in self.exact_index.get(normalize(query), [])]
+
+    def _fuzzy(self, query, top_k):
+        scores = (self.ngram_matrix @ self.vectorizer.transform([normalize(query)]).T).toarray().ravel()
+        if scores.size == 0:
+            return []
+        top = np.argpartition(-scores, min(top_k, scores.size - 1))[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [{**self.records[i], "score": float(scores[i])} for i in top if scores[i] >= self.fuzzy_threshold]
+
+    def _dense(self, query, top_k):
+        if self._client is None or self.embedding_factory is None:
+            return []
+        if self._embedding_function is None:
+            self._embedding_function = self.embedding_factory()
+        vector = self._embedding_function([query])[0]
+        results = self._client.search(
+            collection_name=self.collection_name,
+            data=[np.asarray(vector).tolist()],
+            limit=top_k,
+            search_params=self._search_params,
+            output_fields=self.fields,
+        )
+        return [{**{f: hit["entity"].get(f) for f in self.fields}, "score": hit["distance"]} for hit in results[0]]
+
+    def link(self, query, top_k=5):
+        """
+        链接一个提及到 SNOMED 概念
+
+        返回：
+            dict: {"query", "stage": "exact"/"fuzzy"/"dense"/None, "matches": [...], "latency_us"}
+        """
+        start = time.perf_counter()
+        stage, matches = None, []
+        for stage_name, lookup in (("exact", lambda: self._exact(query)),
+                                   ("fuzzy", lambda: self._fuzzy(query, top_k)),
+                                   ("dense", lambda: self._dense(query, top_k))):
+            matches = lookup()
+            if matches:
+                stage = stage_name
+                break
+        return {"query": query, "stage": stage, "matches": matches[:top_k],
+                "latency_us": (time.perf_counter() - start) * 1e6}
+
+
+def bge_m3_factory():
+    """
+    与 create_milvus_db.py 相同的嵌入模型
+    """
+    import torch
+    from pymilvus import model
+    return model.dense.SentenceTransformerEmbeddingFunction(
+        model_name='BAAI/bge-m3',
+        device='cuda:0' if torch.cuda.is_available() else 'cpu',
+        trust_remote_code=True
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    linker = SnomedConceptLinker.from_csv(
+        "backend/data/SNOMED_5000.csv",
+        milvus_uri="backend/db/snomed_bge_m3.db",
+        embedding_factory=bge_m3_factory,
+    )
+    for query in ["Dyspnea", "SOB", "dyspnoea", "shortness of breth", "somatic hallucination"]:
+        result = linker.link(query, top_k=3)
+        print(f"\n{query!r} -> stage={result['stage']}, {result['latency_us']:.0f} µs")
+        for match in result["matches"]:
+            print(f"  {match['concept_id']}  {match['concept_name']}  ({match['score']:.3f})")
@@ -116,31 +116,18 @@ try:
         print(f"集合 '{COLLECTION_NAME}' 已存在，正在删除...")
         utility.drop_collection(COLLECTION_NAME)
         print(f"集合 '{COLLECTION_NAME}' 删除成功。")
-        time.sleep(1)
 
+    # 批量导入模式：这里只创建 schema，索引和 load 放到全部数据插入并 flush 之后，
+    # 插入时不用维护索引，也不需要 sleep 等待
     print(f"正在创建集合 '{COLLECTION_NAME}'...")
     collection = Collection(name=COLLECTION_NAME, schema=schema, consistency_level="Strong")
     print(f"集合 '{COLLECTION_NAME}' 创建成功。")
 
-    print("正在为 sparse_vector 创建索引 (SPARSE_INVERTED_INDEX, IP)...")
-    collection.create_index("sparse_vector", {"index_type": "SPARSE_INVERTED_INDEX", "metric_type": "IP"})
-    print("sparse_vector 索引创建成功。")
-    time.sleep(0.5)
-
-    print("正在为 dense_vector 创建索引 (AUTOINDEX, IP)...")
-    collection.create_index("dense_vector", {"index_type": "AUTOINDEX", "metric_type": "IP"})
-    print("dense_vector 索引创建成功。")
-    time.sleep(0.5)
-
-    print(f"正在加载集合 '{COLLECTION_NAME}'...")
-    collection.load()
-    print(f"集合 '{COLLECTION_NAME}' 加载成功。")
-
 except MilvusException as e:
-    print(f"创建或加载集合/索引时发生 Milvus 错误: {e}")
+    print(f"创建集合时发生 Milvus 错误: {e}")
     exit()
 except Exception as e:
-    print(f"创建或加载集合/索引时发生未知错误: {e}")
+    print(f"创建集合时发生未知错误: {e}")
     exit()
 
 # 5. 插入数据
@@ -194,10 +181,9 @@ try:
         print(f"  正在插入批次 {i // BATCH_SIZE + 1} ({len(batch_data)} 条记录)...")
         insert_result = collection.insert(batch_data)
         print(f"  批次 {i // BATCH_SIZE + 1} 插入成功, 主键: {insert_result.primary_keys[:5]}...")
-        collection.flush() 
-        print(f"  批次 {i // BATCH_SIZE + 1} flush 完成。")
-        time.sleep(0.5) 
 
+    # 所有批次插入后只 flush 一次
+    collection.flush()
     print(f"所有数据插入完成。总共 {collection.num_entities} 条实体。")
 
 except MilvusException as e:
@@ -215,6 +201,25 @@ except Exception as e:
         print(f"  Text: {batch_data[0]['text'][:100]}...")
     exit()
 
+# 5.1 建索引并加载（数据已全部落盘）
+print("5.1 正在构建索引...")
+try:
+    for field_name, index_params in [
+        ("sparse_vector", {"index_type": "SPARSE_INVERTED_INDEX", "metric_type": "IP"}),
+        ("dense_vector", {"index_type": "AUTOINDEX", "metric_type": "IP"}),
+    ]:
+        start_time = time.perf_counter()
+        # create_index 默认同步返回：索引构建完成后才返回，不需要固定 sleep 或额外等待
+        collection.create_index(field_name, index_params, index_name=f"{field_name}_index")
+        print(f"  {field_name} 索引 ({index_params['index_type']}) 构建完成，用时 {time.perf_counter() - start_time:.2f}s")
+
+    print(f"正在加载集合 '{COLLECTION_NAME}'...")
+    collection.load()
+    print(f"集合 '{COLLECTION_NAME}' 加载成功。")
+except MilvusException as e:
+    print(f"构建索引或加载集合时发生 Milvus 错误: {e}")
+    exit()
+
 
 # 6. 混合搜索 (示例)
 def hybrid_search(query, category=None, environment=None, limit=5, weights=None):
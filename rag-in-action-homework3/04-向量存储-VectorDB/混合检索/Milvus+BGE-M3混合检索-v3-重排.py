@@ -67,11 +67,6 @@ if utility.has_collection(collection_name):
 
 collection = Collection(name=collection_name, schema=schema, consistency_level="Strong")
 
-collection.create_index("sparse_vector", {"index_type": "SPARSE_INVERTED_INDEX", "metric_type": "IP"})
-collection.create_index("dense_vector", {"index_type": "AUTOINDEX", "metric_type": "IP"})
-
-collection.load()
-
 # 5. 插入数据到集合中
 batch_size = 50
 for i in range(0, len(docs), batch_size):
@@ -93,6 +88,12 @@ for i in range(0, len(docs), batch_size):
 
     collection.insert(batch_data)
 
+# 全部插入后 flush 一次，再建索引并加载（批量导入模式）；create_index 同步返回，索引已构建完成
+collection.flush()
+collection.create_index("sparse_vector", {"index_type": "SPARSE_INVERTED_INDEX", "metric_type": "IP"}, index_name="sparse_index")
+collection.create_index("dense_vector", {"index_type": "AUTOINDEX", "metric_type": "IP"}, index_name="dense_index")
+collection.load()
+
 print(f"数据插入完成，总数：{collection.num_entities}")
 
 # 6. 定义并执行混合搜索
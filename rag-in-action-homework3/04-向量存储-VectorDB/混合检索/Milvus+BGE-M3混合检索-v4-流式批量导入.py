@@ -0,0 +1,216 @@
+import os
+import queue
+import sys
+import threading
+import time
+import numpy as np
+from milvus_model.hybrid import BGEM3EmbeddingFunction
+from pymilvus import (
+    connections,
+    utility,
+    FieldSchema,
+    CollectionSchema,
+    DataType,
+    Collection
+)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "01-数据导入-DataLoading"))
+from streaming_json_loader import iter_json_records, project
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from bge_m3_utils import to_sparse_csr
+
+"""
+BGE-M3 流式批量导入
+
+v1 脚本把全部文档一次性交给 ef(docs)，插入时再逐行把稀疏向量转换成 Python 字典
+（每行 hasattr 判断类型 + {int(idx): float(val) for ...}），数据量一大这段 Python
+转换就成了导入瓶颈，而且所有向量同时驻留内存。
+
+本脚本的做法：
+1. 文档按固定 BATCH_SIZE 分批送入 BGE-M3，只编码当前批次
+2. 稀疏结果统一转成 float32 CSR（bge_m3_utils.to_sparse_csr），整个 CSR 矩阵直接作为稀疏向量列插入，
+   不再逐行构造 {下标: 权重} 字典
+3. 编码线程（生产者）和插入线程（消费者）通过有界队列衔接：
+   插入第 i 批的同时编码第 i+1 批，队列满时编码线程阻塞，峰值内存与批大小有关而与总量无关
+4. 按列组织插入数据（column-oriented），不再为每行构造字典
+5. 数据文件用 streaming_json_loader 增量解析，不再 json.load 整个文件；检索文本由 TEXT_FIELDS 中的路径投影拼接
+"""
+
+# 0. 配置
+DATA_PATH = "90-文档-Data/灭神纪/战斗场景.json"
+COLLECTION_NAME = "wukong_hybrid_stream"
+MILVUS_URI = "./wukong_stream.db"
+BATCH_SIZE = 32        # 每批编码/插入的文档数
+QUEUE_SIZE = 2         # 编码与插入之间最多缓存的批次数，决定峰值内存
+DEVICE = "cpu"         # 或者 "cuda"
+# 拼接检索文本的字段（jq 风格路径，[] 展开数组）
+TEXT_FIELDS = [
+    ".title", ".description",
+    ".combat_details.combat_style[]", ".combat_details.abilities_used[]",
+    ".scene_info.location", ".scene_info.environment", ".scene_info.time_of_day",
+]
+
+
+def load_records(path):
+    """
+    读取数据集并拼接每条记录的检索文本
+
+    参数：
+        path (str): JSON 数据文件路径
+
+    返回：
+        generator: (文本, 原始记录) 元组
+    """
+    # 按 ".data[]" 增量解析，同时只有一条记录在内存中
+    for item in iter_json_records(path, ".data[]"):
+        yield project(item, TEXT_FIELDS), item
+
+
+def iter_batches(records, batch_size):
+    """
+    把记录流切成固定大小的批次
+
+    参数：
+        records (iterable): (文本, 原始记录) 元组流
+        batch_size (int): 批大小
+
+    返回：
+        generator: (文本列表, 记录列表)
+    """
+    texts, items = [], []
+    for text, item in records:
+        texts.append(text)
+        items.append(item)
+        if len(texts) == batch_size:
+            yield texts, items
+            texts, items = [], []
+    if texts:
+        yield texts, items
+
+
+def build_columns(texts, items, embeddings):
+    """
+    构造按列组织的插入数据（顺序与 schema 中非自增字段一致）
+
+    参数：
+        texts (list): 批次文本
+        items (list): 批次原始记录
+        embeddings (dict): ef() 的输出，包含 dense 和 sparse
+
+    返回：
+        list: 各字段的列数据
+    """
+    scene = [item.get("scene_info") or {} for item in items]
+    return [
+        [t[:65530] for t in texts],
+        [str(item.get("id", "")) for item in items],
+        [item.get("title", "N/A")[:500] for item in items],
+        [item.get("category", "N/A") for item in items],
+        [s.get("location", "N/A") for s in scene],
+        [s.get("environment", "N/A") for s in scene],
+        to_sparse_csr(embeddings["sparse"]),
+        list(np.asarray(embeddings["dense"], dtype=np.float32)),
+    ]
+
+
+def stream_ingest(collection, ef, records, batch_size=BATCH_SIZE, queue_size=QUEUE_SIZE):
+    """
+    流水线导入：编码线程生产批次，当前线程插入批次
+
+    参数：
+        collection (Collection): 目标集合
+        ef (BGEM3EmbeddingFunction): BGE-M3 嵌入函数
+        records (iterable): (文本, 原始记录) 元组流
+        batch_size (int): 批大小
+        queue_size (int): 有界队列容量
+
+    返回：
+        int: 插入的实体总数
+    """
+    batches = queue.Queue(maxsize=queue_size)
+    stop = object()
+    errors = []
+
+    def producer():
+        try:
+            for texts, items in iter_batches(records, batch_size):
+                batches.put(build_columns(texts, items, ef(texts)))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            batches.put(stop)
+
+    worker = threading.Thread(target=producer, daemon=True)
+    worker.start()
+
+    total = 0
+    batch_no = 0
+    while True:
+        columns = batches.get()
+        if columns is stop:
+            break
+        batch_no += 1
+        collection.insert(columns)
+        total += len(columns[0])
+        print(f"  批次 {batch_no} 插入 {len(columns[0])} 条，累计 {total} 条")
+
+    worker.join()
+    if errors:
+        raise errors[0]
+    return total
+
+
+if __name__ == "__main__":
+    print("脚本开始执行...")
+
+    # 1. 初始化 BGE-M3
+    print("1. 正在加载 BGE-M3...")
+    ef = BGEM3EmbeddingFunction(use_fp16=False, device=DEVICE)
+    print(f"  密集向量维度: {ef.dim['dense']}")
+
+    # 2. 连接 Milvus 并创建集合
+    print(f"2. 正在连接 Milvus (URI: {MILVUS_URI})...")
+    connections.connect(uri=MILVUS_URI)
+    fields = [
+        FieldSchema(name="pk", dtype=DataType.VARCHAR, is_primary=True, auto_id=True, max_length=100),
+        FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=65535),
+        FieldSchema(name="id", dtype=DataType.VARCHAR, max_length=100),
+        FieldSchema(name="title", dtype=DataType.VARCHAR, max_length=512),
+        FieldSchema(name="category", dtype=DataType.VARCHAR, max_length=128),
+        FieldSchema(name="location", dtype=DataType.VARCHAR, max_length=256),
+        FieldSchema(name="environment", dtype=DataType.VARCHAR, max_length=128),
+        FieldSchema(name="sparse_vector", dtype=DataType.SPARSE_FLOAT_VECTOR),
+        FieldSchema(name="dense_vector", dtype=DataType.FLOAT_VECTOR, dim=ef.dim["dense"])
+    ]
+    schema = CollectionSchema(fields, description="Wukong Hybrid Search Collection (streaming ingest)")
+    if utility.has_collection(COLLECTION_NAME):
+        utility.drop_collection(COLLECTION_NAME)
+    collection = Collection(name=COLLECTION_NAME, schema=schema, consistency_level="Strong")
+
+    # 3. 流式编码 + 插入
+    print(f"3. 开始流式导入（批大小 {BATCH_SIZE}，队列容量 {QUEUE_SIZE}）...")
+    start = time.perf_counter()
+    total = stream_ingest(collection, ef, load_records(DATA_PATH))
+    collection.flush()
+    # 批量导入完成后再建索引（create_index 同步返回，索引已构建完成），最后只 load 一次
+    collection.create_index("sparse_vector", {"index_type": "SPARSE_INVERTED_INDEX", "metric_type": "IP"}, index_name="sparse_index")
+    collection.create_index("dense_vector", {"index_type": "AUTOINDEX", "metric_type": "IP"}, index_name="dense_index")
+    collection.load()
+    elapsed = time.perf_counter() - start
+    print(f"导入完成：{total} 条，用时 {elapsed:.2f}s，吞吐 {total / max(elapsed, 1e-9):.1f} 条/秒")
+    print(f"集合实体数：{collection.num_entities}")
+
+    # 4. 简单校验：查询稀疏向量同样以 CSR 矩阵直接传给 search
+    query = "孙悟空的战斗技巧"
+    query_embeddings = ef([query])
+    results = collection.search(
+        data=to_sparse_csr(query_embeddings["sparse"]),
+        anns_field="sparse_vector",
+        param={"metric_type": "IP", "params": {}},
+        limit=3,
+        output_fields=["title"]
+    )[0]
+    print(f"\n稀疏检索校验 '{query}':")
+    for hit in results:
+        print(f"  - {hit.entity.get('title')} (分数: {hit.distance:.4f})")
+
+    print("\n脚本执行完毕。")
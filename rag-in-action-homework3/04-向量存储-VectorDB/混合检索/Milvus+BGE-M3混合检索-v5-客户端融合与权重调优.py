@@ -0,0 +1,256 @@
+import itertools
+import json
+import math
+import os
+import sys
+import numpy as np
+from milvus_model.hybrid import BGEM3EmbeddingFunction
+from pymilvus import connections, utility, Collection
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from bge_m3_utils import to_sparse_csr
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "01-数据导入-DataLoading"))
+from streaming_json_loader import iter_json_records, project
+
+"""
+BGE-M3 混合检索：客户端融合与离线权重调优
+
+v1/v2/v3 脚本把 WeightedRanker 的权重写死在代码里，想比较不同的稀疏/密集权重时，
+每换一组权重都要重新向 Milvus 发一次 hybrid_search。
+
+本脚本把"取候选"和"融合"拆开：
+1. fetch_candidates：密集、稀疏各做一次 search，取较大的候选池，返回每路的原始分数
+2. fuse：在客户端按任意权重（与 WeightedRanker 相同的 arctan 归一化）或任意 RRF k 重新融合，
+   不再访问 Milvus
+3. grid_search_weights：在带标注的查询集上，对缓存下来的候选做权重/RRF k 网格搜索，
+   按 NDCG@k 挑出最优配置，整个过程只对每个查询检索一次
+4. 标注来自数据文件：有 LABELS_PATH 时直接读取，否则按 LABEL_RULES 的关键词从 DATA_PATH 生成；
+   标注 id 在集合中不存在时直接报错
+
+依赖 v4 脚本（流式批量导入）建好的 wukong_hybrid_stream 集合。
+"""
+
+# 0. 配置
+COLLECTION_NAME = "wukong_hybrid_stream"
+MILVUS_URI = "./wukong_stream.db"
+CANDIDATE_LIMIT = 50   # 每路召回的候选数，融合后再截断到 limit
+DEVICE = "cpu"
+OUTPUT_FIELDS = ["id", "title", "category", "environment"]
+DATA_PATH = "90-文档-Data/灭神纪/战斗场景.json"          # 与 v4 导入的数据相同
+LABELS_PATH = "90-文档-Data/灭神纪/战斗场景_标注.json"   # 可选的人工标注 {查询: [业务 id, ...]}
+# 没有人工标注时的生成规则：{查询: 关键词列表}，记录文本包含全部关键词即相关
+LABEL_RULES = {
+    "雪地中的战斗场景": ["雪"],
+    "孙悟空的战斗技巧": ["悟空"],
+    "火焰山的战斗": ["火焰山"],
+}
+LABEL_FIELDS = [".title", ".description", ".scene_info.location", ".scene_info.environment"]
+
+
+def build_labels(data_path=DATA_PATH, labels_path=LABELS_PATH, rules=LABEL_RULES):
+    """
+    构造标注查询集：{查询: 相关记录的业务 id 集合}
+
+    说明：
+        labels_path 存在时直接读取（{查询: [id, ...]}）；否则按 rules 从数据集生成：
+        记录的 LABEL_FIELDS 文本包含某个查询的全部关键词即视为相关。两种方式都由数据文件决定，结果可复现
+
+    返回：
+        dict: {查询: set(业务 id)}
+    """
+    if os.path.exists(labels_path):
+        with open(labels_path, "r", encoding="utf-8") as f:
+            return {query: set(ids) for query, ids in json.load(f).items()}
+    labels = {query: set() for query in rules}
+    for item in iter_json_records(data_path, ".data[]"):
+        text = project(item, LABEL_FIELDS)
+        for query, keywords in rules.items():
+            if all(keyword in text for keyword in keywords):
+                labels[query].add(str(item.get("id", "")))
+    empty = [query for query, ids in labels.items() if not ids]
+    if empty:
+        raise ValueError(f"以下标注查询在 {data_path} 中没有相关记录，请修改 LABEL_RULES: {empty}")
+    return labels
+
+
+def check_labels(collection, labels):
+    """
+    确认所有标注 id 都在集合中，否则直接报错（缺失的 id 会让 NDCG 悄悄偏低）
+    """
+    all_ids = sorted(set().union(*labels.values()))
+    found = {row["id"] for row in collection.query(expr=f"id in {json.dumps(all_ids, ensure_ascii=False)}",
+                                                   output_fields=["id"])}
+    missing = [doc_id for doc_id in all_ids if doc_id not in found]
+    if missing:
+        raise ValueError(f"标注 id 在集合 {collection.name} 中不存在: {missing}")
+
+
+def fetch_candidates(collection, ef, query, expr=None, candidate_limit=CANDIDATE_LIMIT):
+    """
+    一次性取回密集与稀疏两路候选及原始分数
+
+    参数：
+        collection (Collection): 已加载的混合检索集合
+        ef (BGEM3EmbeddingFunction): BGE-M3 嵌入函数
+        query (str): 查询文本
+        expr (str): 可选的标量过滤表达式
+        candidate_limit (int): 每路候选数
+
+    返回：
+        dict: {"dense": {pk: 分数}, "sparse": {pk: 分数}, "entities": {pk: 字段}}
+    """
+    query_embeddings = ef([query])
+    search_params = {"metric_type": "IP", "params": {}}
+    requests = {
+        "dense": ("dense_vector", [query_embeddings["dense"][0]]),
+        "sparse": ("sparse_vector", to_sparse_csr(query_embeddings["sparse"])),
+    }
+    candidates = {"dense": {}, "sparse": {}, "entities": {}}
+    for modality, (field, data) in requests.items():
+        hits = collection.search(
+            data=data,
+            anns_field=field,
+            param=search_params,
+            limit=candidate_limit,
+            expr=expr,
+            output_fields=OUTPUT_FIELDS
+        )[0]
+        for hit in hits:
+            candidates[modality][hit.id] = hit.distance
+            candidates["entities"].setdefault(hit.id, {f: hit.entity.get(f) for f in OUTPUT_FIELDS})
+    return candidates
+
+
+def fuse(candidates, method="weighted", weights=None, rrf_k=60, limit=5):
+    """
+    客户端融合两路候选
+
+    功能：
+        - weighted：与 Milvus WeightedRanker 一致，先用 0.5 + arctan(s)/π 把 IP 分数归一化到 (0, 1)，
+          再按权重加权求和；某一路没有召回的文档该路得 0 分
+        - rrf：score = Σ 1 / (k + rank)，rank 从 1 开始，与 RRFRanker 一致
+
+    参数：
+        candidates (dict): fetch_candidates 的返回值
+        method (str): 'weighted' 或 'rrf'
+        weights (dict): {"sparse": w1, "dense": w2}
+        rrf_k (int): RRF 参数
+        limit (int): 返回数量
+
+    返回：
+        list: [(pk, 融合分数), ...]
+    """
+    fused = {}
+    if method == "weighted":
+        weights = weights or {"sparse": 0.5, "dense": 0.5}
+        for modality in ("sparse", "dense"):
+            for pk, score in candidates[modality].items():
+                fused[pk] = fused.get(pk, 0.0) + weights[modality] * (0.5 + math.atan(score) / math.pi)
+    elif method == "rrf":
+        for modality in ("sparse", "dense"):
+            ranked = sorted(candidates[modality].items(), key=lambda x: x[1], reverse=True)
+            for rank, (pk, _) in enumerate(ranked, 1):
+                fused[pk] = fused.get(pk, 0.0) + 1 / (rrf_k + rank)
+    else:
+        raise ValueError(f"不支持的融合方法: {method}")
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+
+def ndcg_at_k(ranked_ids, relevant_ids, k):
+    """
+    二值相关性的 NDCG@k
+
+    参数：
+        ranked_ids (list): 融合后的文档 id 序列
+        relevant_ids (set): 标注为相关的文档 id
+        k (int): 截断位置
+
+    返回：
+        float: NDCG@k
+    """
+    dcg = sum(1 / math.log2(rank + 2) for rank, doc_id in enumerate(ranked_ids[:k]) if doc_id in relevant_ids)
+    idcg = sum(1 / math.log2(rank + 2) for rank in range(min(len(relevant_ids), k)))
+    return dcg / idcg if idcg > 0 else 0.0
+
+
+def grid_search_weights(cached, labels, k=5, sparse_grid=None, dense_grid=None, rrf_grid=None):
+    """
+    离线网格搜索最优融合配置（不再访问 Milvus）
+
+    参数：
+        cached (dict): {query: fetch_candidates 的返回值}
+        labels (dict): {query: 相关文档的业务 id 集合}
+        k (int): NDCG@k
+        sparse_grid / dense_grid (list): 稀疏/密集权重取值
+        rrf_grid (list): RRF k 取值
+
+    返回：
+        list: 按平均 NDCG 降序排列的 (配置, 分数)
+    """
+    sparse_grid = sparse_grid or np.round(np.linspace(0.0, 1.0, 11), 2).tolist()
+    dense_grid = dense_grid or [1.0]
+    rrf_grid = rrf_grid or [10, 30, 60, 100]
+
+    configs = [{"method": "weighted", "weights": {"sparse": s, "dense": d}}
+               for s, d in itertools.product(sparse_grid, dense_grid)]
+    configs += [{"method": "rrf", "rrf_k": rk} for rk in rrf_grid]
+
+    results = []
+    for config in configs:
+        scores = []
+        for query, candidates in cached.items():
+            fused = fuse(candidates, limit=k, **config)
+            ranked_ids = [candidates["entities"][pk]["id"] for pk, _ in fused]
+            scores.append(ndcg_at_k(ranked_ids, labels[query], k))
+        results.append((config, sum(scores) / len(scores)))
+    return sorted(results, key=lambda x: x[1], reverse=True)
+
+
+if __name__ == "__main__":
+    print("脚本开始执行...")
+
+    # 1. 连接已有集合
+    print(f"1. 正在连接 Milvus (URI: {MILVUS_URI})...")
+    connections.connect(uri=MILVUS_URI)
+    if not utility.has_collection(COLLECTION_NAME):
+        print(f"错误: 集合 '{COLLECTION_NAME}' 不存在，请先运行 v4 流式批量导入脚本。")
+        exit()
+    collection = Collection(COLLECTION_NAME)
+    collection.load()
+    ef = BGEM3EmbeddingFunction(use_fp16=False, device=DEVICE)
+
+    # 2. 单个查询：取一次候选，多种权重下客户端重新融合
+    query = "雪地中的战斗场景"
+    print(f"\n2. 查询 '{query}'，只检索一次，比较不同融合配置：")
+    candidates = fetch_candidates(collection, ef, query)
+    print(f"  密集候选 {len(candidates['dense'])} 条，稀疏候选 {len(candidates['sparse'])} 条")
+    for config in [
+        {"method": "weighted", "weights": {"sparse": 0.0, "dense": 1.0}},
+        {"method": "weighted", "weights": {"sparse": 0.7, "dense": 1.0}},
+        {"method": "weighted", "weights": {"sparse": 1.0, "dense": 0.0}},
+        {"method": "rrf", "rrf_k": 60},
+    ]:
+        fused = fuse(candidates, limit=3, **config)
+        print(f"\n  配置 {json.dumps(config, ensure_ascii=False)}:")
+        for pk, score in fused:
+            entity = candidates["entities"][pk]
+            dense = candidates["dense"].get(pk)
+            sparse = candidates["sparse"].get(pk)
+            print(f"    - {entity['title']} 融合={score:.4f} "
+                  f"dense={'-' if dense is None else f'{dense:.4f}'} "
+                  f"sparse={'-' if sparse is None else f'{sparse:.4f}'}")
+
+    # 3. 带标注查询集上的离线网格搜索（标注从数据文件生成，并确认 id 都在集合中）
+    labeled_set = build_labels()
+    check_labels(collection, labeled_set)
+    for q, ids in labeled_set.items():
+        print(f"  标注 '{q}': {len(ids)} 条相关记录")
+    print(f"\n3. 在 {len(labeled_set)} 条标注查询上做离线网格搜索...")
+    cached = {q: fetch_candidates(collection, ef, q) for q in labeled_set}
+    ranking = grid_search_weights(cached, labeled_set, k=5)
+    print("  Top-5 配置（NDCG@5）：")
+    for config, score in ranking[:5]:
+        print(f"    {score:.4f}  {json.dumps(config, ensure_ascii=False)}")
+    best_config, best_score = ranking[0]
+    print(f"\n最优配置: {json.dumps(best_config, ensure_ascii=False)} (NDCG@5={best_score:.4f})")
+
+    print("\n脚本执行完毕。")
@@ -0,0 +1,32 @@
+# bge_m3_utils.py - BGE-M3 混合检索脚本（v4 导入 / v5 检索）共用的稀疏向量工具
+import numpy as np
+import scipy.sparse
+
+"""
+BGE-M3 稀疏向量 -> Milvus
+
+v1~v3 脚本插入时逐行把稀疏向量转成 Python 字典（{int(idx): float(val) for ...}）。
+pymilvus 2.4+ 的 SPARSE_FLOAT_VECTOR 字段直接接受 scipy 稀疏矩阵：
+按列插入时整个 CSR 矩阵就是这一列（每行一个实体），search 的 data 也可以直接传 CSR 矩阵（每行一个查询），
+不需要在 Python 里为每行构造字典。
+
+使用方式：
+    from bge_m3_utils import to_sparse_csr
+    collection.insert([..., to_sparse_csr(embeddings["sparse"]), ...])
+    collection.search(data=to_sparse_csr(query_embeddings["sparse"]), anns_field="sparse_vector", ...)
+"""
+
+
+def to_sparse_csr(sparse_matrix):
+    """
+    把 BGE-M3 输出的稀疏矩阵统一为 float32 CSR（合并重复下标），可直接作为插入列或检索数据
+
+    参数：
+        sparse_matrix: scipy 稀疏矩阵/数组（CSR、COO 等任意格式）
+
+    返回：
+        scipy.sparse.csr_array: 每行一个稀疏向量
+    """
+    csr = scipy.sparse.csr_array(sparse_matrix, dtype=np.float32)
+    csr.sum_duplicates()
+    return csr
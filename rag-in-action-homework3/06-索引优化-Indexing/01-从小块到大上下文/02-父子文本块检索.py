@@ -44,6 +44,8 @@ retriever = ParentDocumentRetriever(
 )
 # 添加文本块
 retriever.add_documents(documents)
+# 检索时子块命中按父文档 id 去重后一次 mget 取回父块；本例只有一篇文档，不存在多篇文档抢 top-k 名额的问题。
+# 多篇文档时按文档分组检索（Milvus group_by_field，Chroma 不支持）见 04-分组检索父文档.py
 # 自定义提示模板
 from langchain.prompts import PromptTemplate
 from langchain.chains import RetrievalQA
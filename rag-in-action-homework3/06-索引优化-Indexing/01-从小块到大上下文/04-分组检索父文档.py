@@ -0,0 +1,169 @@
+from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain.storage import InMemoryStore
+from pymilvus import MilvusClient, DataType
+
+"""
+基于 Milvus 分组搜索（Grouping Search）的父文档检索
+
+02-父子文本块检索.py 用子块做向量检索，top-k 里经常有好几个子块来自同一篇文档，
+映射回父文档后重复，k 个名额实际只覆盖了一两篇文档。
+
+本脚本：
+1. 子块向量存入 Milvus，doc_id 作为 schema 标量字段（分组字段必须是 schema 字段，不能是动态字段）
+2. 检索时用 group_by_field="doc_id"，limit 表示返回多少篇不同的文档，
+   group_size 表示每篇文档保留多少个最相关的子块
+3. 父文档存放在 docstore 中，所有命中文档的父文档用一次 mget 批量取回，而不是逐条查询
+4. 对比普通 top-k 与分组检索：覆盖的文档数、每个名额带来的有效上下文字符数
+"""
+
+# 1. 配置
+MILVUS_URI = "http://localhost:19530"  # 分组搜索需要 Milvus 2.4+ 服务端
+COLLECTION_NAME = "parent_doc_grouping"
+TOP_K = 4          # 返回的文档数（普通检索时为子块数）
+GROUP_SIZE = 2     # 每篇文档保留的子块数
+
+embed_model = HuggingFaceEmbeddings(model_name="BAAI/bge-small-zh")
+client = MilvusClient(uri=MILVUS_URI)
+docstore = InMemoryStore()
+
+# 2. 准备多篇游戏知识文档（每篇即一个父文档）
+game_docs = {
+    "combat": "《灭神纪∙猢狲》的战斗系统极具特色，采用了独特的\"变身系统\"。悟空可以在战斗中变换不同形态。每种形态都有其独特的战斗风格和技能组合。金刚形态侧重力量型打击，带来压倒性的破坏力。魔佛形态则专注法术攻击，能释放强大的法术伤害。Boss战充满挑战性，需要玩家精准把握战斗节奏和技能运用。",
+    "world": "游戏背景设定在架空的神话世界中。玩家将扮演齐天大圣孙悟空，在充满东方神话元素的世界中展开冒险。游戏世界中充满了标志性的神话角色，除了主角孙悟空以外，还有来自佛教、道教等各派系的神魔。这些角色既可能是悟空的盟友，也可能是需要击败的强大对手。",
+    "equipment": "装备系统包含了丰富的武器选择，除了著名的如意金箍棒以外，悟空还可以使用各种神器法宝。不同武器有其特色效果，玩家需要根据战斗场景灵活选择。法宝可以在战斗中临时改变形态的属性，与变身系统配合使用。",
+    "visual": "游戏的画面表现极具东方美学特色，场景融合了水墨画风格，将山川、建筑等元素完美呈现。战斗特效既有中国传统文化元素，又具备现代游戏的视觉震撼力。",
+    "difficulty": "难度设计上，游戏提供了多种难度选择，照顾不同技术水平的玩家。高难度下 Boss 的攻击欲望更强，变身形态的冷却时间也更长。",
+}
+
+child_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=60,
+    chunk_overlap=10,
+    separators=["\n\n", "\n", "。", "！", "？", "；", "，", " ", ""]
+)
+
+
+def build_collection(dim):
+    """
+    创建子块集合：doc_id 是 schema 字段，才能作为 group_by_field
+    """
+    if client.has_collection(COLLECTION_NAME):
+        client.drop_collection(COLLECTION_NAME)
+    schema = MilvusClient.create_schema(auto_id=True, enable_dynamic_field=False)
+    schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True)
+    schema.add_field(field_name="vector", datatype=DataType.FLOAT_VECTOR, dim=dim)
+    schema.add_field(field_name="doc_id", datatype=DataType.VARCHAR, max_length=64)
+    schema.add_field(field_name="chunk", datatype=DataType.VARCHAR, max_length=1000)
+
+    index_params = MilvusClient.prepare_index_params()
+    index_params.add_index(field_name="vector", index_type="FLAT", metric_type="IP", index_name="vector_index")
+    client.create_collection(collection_name=COLLECTION_NAME, schema=schema, index_params=index_params)
+
+
+def ingest(docs):
+    """
+    父文档写入 docstore，子块批量向量化后一次性写入 Milvus
+    """
+    docstore.mset(list(docs.items()))
+    doc_ids, chunks = [], []
+    for doc_id, text in docs.items():
+        for chunk in child_splitter.split_text(text):
+            doc_ids.append(doc_id)
+            chunks.append(chunk)
+    vectors = embed_model.embed_documents(chunks)
+    build_collection(len(vectors[0]))
+    client.insert(
+        collection_name=COLLECTION_NAME,
+        data=[{"vector": v, "doc_id": d, "chunk": c} for v, d, c in zip(vectors, doc_ids, chunks)]
+    )
+    client.load_collection(collection_name=COLLECTION_NAME)
+    print(f"写入 {len(docs)} 篇父文档，{len(chunks)} 个子块")
+
+
+def search_chunks(query, top_k=TOP_K):
+    """
+    普通子块检索：top_k 个子块，可能集中在少数几篇文档
+    """
+    results = client.search(
+        collection_name=COLLECTION_NAME,
+        data=[embed_model.embed_query(query)],
+        anns_field="vector",
+        limit=top_k,
+        output_fields=["doc_id", "chunk"]
+    )
+    return [hit["entity"] for hit in results[0]]
+
+
+def search_grouped(query, top_k=TOP_K, group_size=GROUP_SIZE):
+    """
+    按文档分组检索，并批量取回父文档
+
+    参数：
+        query (str): 查询
+        top_k (int): 返回的不同文档数
+        group_size (int): 每篇文档保留的最相关子块数
+
+    返回：
+        list: [{"doc_id", "score", "chunks", "parent"}, ...]，按文档最高分排序
+    """
+    results = client.search(
+        collection_name=COLLECTION_NAME,
+        data=[embed_model.embed_query(query)],
+        anns_field="vector",
+        limit=top_k,
+        group_by_field="doc_id",
+        group_size=group_size,
+        strict_group_size=False,  # 短文档子块不足 group_size 时也保留
+        output_fields=["doc_id", "chunk"]
+    )
+
+    # 同一组的命中连续返回、组内按分数排序，按出现顺序聚合即可保持排序
+    groups = {}
+    for hit in results[0]:
+        doc_id = hit["entity"]["doc_id"]
+        group = groups.setdefault(doc_id, {"doc_id": doc_id, "score": hit["distance"], "chunks": []})
+        group["chunks"].append(hit["entity"]["chunk"])
+
+    # 一次 mget 取回全部父文档
+    parents = docstore.mget(list(groups))
+    for group, parent in zip(groups.values(), parents):
+        group["parent"] = parent
+    return list(groups.values())
+
+
+def context_per_slot(doc_ids, top_k):
+    """
+    每个 top-k 名额带来的有效上下文：去重后父文档的总字符数 / 名额数
+    """
+    unique_ids = list(dict.fromkeys(doc_ids))
+    return sum(len(p) for p in docstore.mget(unique_ids) if p) / top_k
+
+
+if __name__ == "__main__":
+    ingest(game_docs)
+
+    test_questions = [
+        "悟空在战斗中有哪些形态变化？",
+        "游戏的画面风格是怎样的？",
+    ]
+    for question in test_questions:
+        print(f"\n问题：{question}")
+
+        chunk_hits = search_chunks(question)
+        chunk_doc_ids = [hit["doc_id"] for hit in chunk_hits]
+        print(f"\n[普通检索] 命中文档: {chunk_doc_ids}")
+        print(f"  不同文档数: {len(set(chunk_doc_ids))}，每个名额有效上下文: "
+              f"{context_per_slot(chunk_doc_ids, TOP_K):.0f} 字符")
+
+        groups = search_grouped(question)
+        grouped_doc_ids = [group["doc_id"] for group in groups]
+        print(f"\n[分组检索] 命中文档: {grouped_doc_ids}")
+        print(f"  不同文档数: {len(grouped_doc_ids)}，每个名额有效上下文: "
+              f"{context_per_slot(grouped_doc_ids, TOP_K):.0f} 字符")
+        for group in groups:
+            print(f"\n  文档 {group['doc_id']} (最高分 {group['score']:.4f})")
+            for chunk in group["chunks"]:
+                print(f"    子块: {chunk}")
+            print(f"    父文档: {group['parent'][:80]}...")
+
+    client.release_collection(collection_name=COLLECTION_NAME)
@@ -1,4 +1,4 @@
-# 双层检索-富豪榜 - 需要pip install openpyxl
+# 双层检索-富豪榜 - 需要pip install openpyxl pyarrow duckdb
 import os
 from dotenv import load_dotenv
 import pandas as pd
@@ -6,6 +6,17 @@ from sentence_transformers import SentenceTransformer
 import torch
 from pymilvus import MilvusClient, DataType, FieldSchema, CollectionSchema
 import logging
+from table_index import TABLE_DESCRIPTIONS, TableStore, table_summary, row_groups, text_to_sql, to_markdown
+
+"""
+表格双层索引（Milvus）
+
+第一层：每张表一条摘要（表名、行数、列类型和取值范围），检索出最相关的表
+第二层：每 ROWS_PER_GROUP 行一个行组向量，在选中的表内检索相关行；行组原文从 Parquet 读回
+聚合类问题（最大、平均、排名、计数……）由大模型写 DuckDB SQL 在选中的表上执行，只把结果交给大模型
+
+不再把整张表 to_string() 存成一个 VARCHAR、只算一个向量：表再大也不会超出字段长度，行级问题也能命中具体行。
+"""
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -21,33 +32,38 @@ embedding_function = SentenceTransformer(
 )
 
 # 连接到Milvus
-client = MilvusClient("richman_bge_m3_v2.db")
+client = MilvusClient("richman_bge_m3_v3.db")
+# 表格本体按 Parquet 列式存储
+store = TableStore("table_store/richman")
 
-# 1. 创建summary向量数据库
+# 1. 创建summary向量数据库（每张表一条摘要）
 summary_collection_name = "billionaires_summary"
 summary_fields = [
     FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
     FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=1024),
-    FieldSchema(name="table_name", dtype=DataType.VARCHAR, max_length=100)
+    FieldSchema(name="table_name", dtype=DataType.VARCHAR, max_length=100),
+    FieldSchema(name="content", dtype=DataType.VARCHAR, max_length=4096)  # 表摘要
 ]
 
-summary_schema = CollectionSchema(summary_fields, "富豪榜年份摘要")
+summary_schema = CollectionSchema(summary_fields, "富豪榜表格摘要")
 if not client.has_collection(summary_collection_name):
     client.create_collection(
         collection_name=summary_collection_name,
         schema=summary_schema
     )
 
-# 2. 创建details向量数据库
+# 2. 创建details向量数据库（每个行组一条）
 details_collection_name = "billionaires_details"
 details_fields = [
     FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
     FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=1024),
     FieldSchema(name="table_name", dtype=DataType.VARCHAR, max_length=100),
-    FieldSchema(name="content", dtype=DataType.VARCHAR, max_length=10000)  # 存储整个表格内容
+    FieldSchema(name="row_start", dtype=DataType.INT64),
+    FieldSchema(name="row_end", dtype=DataType.INT64),
+    FieldSchema(name="content", dtype=DataType.VARCHAR, max_length=8192)  # 行组文本
 ]
 
-details_schema = CollectionSchema(details_fields, "富豪榜详细信息")
+details_schema = CollectionSchema(details_fields, "富豪榜行组")
 if not client.has_collection(details_collection_name):
     client.create_collection(
         collection_name=details_collection_name,
@@ -56,6 +72,7 @@ if not client.has_collection(details_collection_name):
 
 # 3. 加载Excel文件并准备数据
 excel_file = "90-文档-Data/复杂PDF/十大富豪/世界十大富豪.xlsx"
+summaries = {}
 
 # 读取Excel文件中的所有sheet并插入数据
 with pd.ExcelFile(excel_file) as xls:
@@ -63,34 +80,39 @@ with pd.ExcelFile(excel_file) as xls:
         try:
             df = pd.read_excel(xls, sheet_name=sheet_name)
             logging.info(f"正在处理sheet: {sheet_name}")
-            
-            # 插入summary数据 - 只存储表名
-            summary_embedding = embedding_function.encode([sheet_name])[0]
-            
+
+            # 表格写入 Parquet
+            store.save(sheet_name, df)
+
+            # 插入summary数据 - 表摘要
+            summary = table_summary(sheet_name, df, description=TABLE_DESCRIPTIONS.get(sheet_name))
+            summaries[sheet_name] = summary
+            summary_embedding = embedding_function.encode([summary], normalize_embeddings=True)[0]
             client.insert(
                 collection_name=summary_collection_name,
                 data=[{
                     "vector": summary_embedding.tolist(),
-                    "table_name": sheet_name
+                    "table_name": sheet_name,
+                    "content": summary[:4096]
                 }]
             )
-            
-            # 插入details数据 - 存储整个表格内容
-            # 将整个DataFrame转换为字符串
-            table_content = df.to_string(index=False)
-            detail_embedding = embedding_function.encode([table_content])[0]
-            
+
+            # 插入details数据 - 行组，一次编码整张表的所有行组
+            groups = row_groups(df)
+            group_embeddings = embedding_function.encode([text for _, _, text in groups], normalize_embeddings=True)
             client.insert(
                 collection_name=details_collection_name,
                 data=[{
-                    "vector": detail_embedding.tolist(),
+                    "vector": embedding.tolist(),
                     "table_name": sheet_name,
-                    "content": table_content
-                }]
+                    "row_start": start,
+                    "row_end": end,
+                    "content": text[:8192]
+                } for (start, end, text), embedding in zip(groups, group_embeddings)]
             )
-            
-            logging.info(f"成功处理sheet: {sheet_name}")
-            
+
+            logging.info(f"成功处理sheet: {sheet_name}（{len(df)} 行，{len(groups)} 个行组）")
+
         except Exception as e:
             logging.error(f"处理sheet {sheet_name} 时出错: {str(e)}")
             logging.error(f"错误详情: {e.__class__.__name__}")
@@ -110,15 +132,12 @@ except Exception as e:
 
 # 创建新索引
 try:
-    # 使用prepare_index_params方法创建索引参数
     summary_index_params = client.prepare_index_params()
     summary_index_params.add_index(
-        field_name="vector",  # 指定要为哪个字段创建索引，这里是向量字段
-        index_type="IVF_FLAT",  # 索引类型
-        metric_type="COSINE",  # 使用余弦相似度作为向量相似度度量方式
-        params={"nlist": 1024}  # 索引参数
+        field_name="vector",
+        index_type="FLAT",  # 表的数量很少，直接暴力搜索
+        metric_type="COSINE"
     )
-    
     client.create_index(
         collection_name=summary_collection_name,
         index_params=summary_index_params
@@ -128,15 +147,14 @@ except Exception as e:
     logging.error(f"创建summary索引时出错: {str(e)}")
 
 try:
-    # 使用prepare_index_params方法创建索引参数
     details_index_params = client.prepare_index_params()
     details_index_params.add_index(
-        field_name="vector",  # 指定要为哪个字段创建索引，这里是向量字段
-        index_type="IVF_FLAT",  # 索引类型
-        metric_type="COSINE",  # 使用余弦相似度作为向量相似度度量方式
-        params={"nlist": 1024}  # 索引参数
+        field_name="vector",
+        index_type="IVF_FLAT",
+        metric_type="COSINE",
+        params={"nlist": 128}
     )
-    
+    details_index_params.add_index(field_name="table_name", index_type="INVERTED")  # 第二层按表名过滤
     client.create_index(
         collection_name=details_collection_name,
         index_params=details_index_params
@@ -153,84 +171,97 @@ try:
 except Exception as e:
     logging.error(f"加载集合时出错: {str(e)}")
 
-def search_relevant_table(question):
-    # 第一层检索：在summary集合中搜索最相关的sheet
-    query_embedding = embedding_function.encode([question])[0]
-    
+
+def search_relevant_table(question, top_groups=3):
+    """
+    双层检索：先选表，再在表内选行组
+
+    返回：
+        tuple: (表名, 表摘要, 相关行 DataFrame)，没有结果时为 (None, None, None)
+    """
+    # 第一层检索：在summary集合中搜索最相关的表
+    query_embedding = embedding_function.encode([question], normalize_embeddings=True)[0]
+
     summary_results = client.search(
         collection_name=summary_collection_name,
         data=[query_embedding.tolist()],
         limit=1,
-        output_fields=["table_name"],
-        search_params={
-            "metric_type": "COSINE",
-            "params": {"nprobe": 10}
-        }
+        output_fields=["table_name", "content"],
+        search_params={"metric_type": "COSINE"}
     )
-    
+
     if not summary_results or not summary_results[0]:
-        return None, None
-    
+        return None, None, None
+
     matched_table = summary_results[0][0]['entity']['table_name']
-    
-    # 第二层检索：在details集合中搜索具体信息
+    summary = summary_results[0][0]['entity']['content']
+
+    # 第二层检索：在选中的表内搜索相关行组，行组原文从 Parquet 读回
     details_results = client.search(
         collection_name=details_collection_name,
         data=[query_embedding.tolist()],
         filter=f"table_name == '{matched_table}'",
-        limit=1,
-        output_fields=["content"],
-        search_params={
-            "metric_type": "COSINE",
-            "params": {"nprobe": 10}
-        }
+        limit=top_groups,
+        output_fields=["row_start", "row_end"],
+        search_params={"metric_type": "COSINE", "params": {"nprobe": 16}}
     )
-    
-    if not details_results or not details_results[0]:
-        return None, None
-    
-    return matched_table, details_results[0][0]['entity']['content']
-
-def generate_answer(question):
-    # 检索相关信息
-    table_name, content = search_relevant_table(question)
-    
-    if not table_name or not content:
-        return "抱歉，没有找到相关信息。"
-    
-    # 构建提示词
-    prompt = f"""根据以下表格信息回答问题：
 
-表格名称：{table_name}
+    hits = sorted((hit['entity']['row_start'], hit['entity']['row_end']) for hit in details_results[0])
+    rows = pd.concat([store.rows(matched_table, start, end) for start, end in hits]) if hits else None
+    return matched_table, summary, rows
 
-表格内容：
-{content}
 
-问题：{question}
-
-请基于以上信息给出详细回答："""
-
-    # 使用DeepSeek生成答案
+def chat(prompt, max_tokens=1024):
+    # 使用DeepSeek生成文本
     from openai import OpenAI
-    client = OpenAI(
+    llm = OpenAI(
         api_key=os.getenv("DEEPSEEK_API_KEY"),
         base_url="https://api.deepseek.com/v1"
     )
-
-    response = client.chat.completions.create(
+    response = llm.chat.completions.create(
         model="deepseek-chat",
         messages=[{
             "role": "user",
             "content": prompt
         }],
-        max_tokens=1024
+        max_tokens=max_tokens
     )
-    
     return response.choices[0].message.content
 
+
+def generate_answer(question):
+    # 检索相关信息
+    table_name, summary, rows = search_relevant_table(question)
+
+    if not table_name:
+        return "抱歉，没有找到相关信息。"
+
+    # 聚合类问题：在选中的表上执行 SQL，只把结果交给大模型
+    sql, result = text_to_sql(question, store, table_name, chat, summary=summary)
+    if sql is not None:
+        logging.info(f"执行 SQL: {sql}")
+        context = f"SQL：{sql}\n\n查询结果：\n{to_markdown(result)}"
+    elif rows is not None:
+        context = f"相关行：\n{to_markdown(rows)}"
+    else:
+        return "抱歉，没有找到相关信息。"
+
+    # 构建提示词
+    prompt = f"""根据以下表格信息回答问题：
+
+表格名称：{table_name}
+
+{context}
+
+问题：{question}
+
+请基于以上信息给出详细回答："""
+
+    return chat(prompt)
+
 # 测试示例
 if __name__ == "__main__":
-    test_question = "2023年世界首富是谁？他的财富是多少？"
-    answer = generate_answer(test_question)
-    print(f"问题：{test_question}")
-    print(f"答案：{answer}") 
\ No newline at end of file
+    for test_question in ["2023年世界首富是谁？他的财富是多少？", "2023年十大富豪的平均财富是多少？"]:
+        answer = generate_answer(test_question)
+        print(f"问题：{test_question}")
+        print(f"答案：{answer}")
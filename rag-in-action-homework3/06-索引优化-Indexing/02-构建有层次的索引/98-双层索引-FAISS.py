@@ -5,80 +5,61 @@ from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
 from openai import OpenAI
+from table_index import TABLE_DESCRIPTIONS, TableStore, table_summary, row_groups, text_to_sql, to_markdown
 
 # 加载环境变量
 load_dotenv()
 
-# 1. 准备表格说明数据
-table_descriptions = [
-    "2023年世界十大富豪榜单，展示了当年全球最富有的十位富豪及其财富情况。",
-    "2022年世界十大富豪榜单，记录了当年全球最富有的十位富豪及其财富情况。",
-    "2021年世界十大富豪榜单，展示了当年全球最富有的十位富豪及其财富情况。",
-    "2020年世界十大富豪榜单，记录了当年全球最富有的十位富豪及其财富情况。",
-    "2019年世界十大富豪榜单，展示了当年全球最富有的十位富豪及其财富情况。"
-]
-
-# 2. 设置第一层嵌入模型（用于匹配年份）
+# 1. 设置嵌入模型
 model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-desc_embeddings = model.encode(table_descriptions)
-
-# 3. 创建第一层向量存储
-dimension = desc_embeddings.shape[1]
-desc_index = faiss.IndexFlatL2(dimension)
-desc_index.add(desc_embeddings.astype('float32'))
+# 表格本体按 Parquet 列式存储
+store = TableStore("table_store/richman_faiss")
 
-# 4. 加载Excel文件并准备第二层数据
+# 2. 加载Excel文件，生成表摘要（说明 + 列结构）和行组
 excel_file = "90-文档-Data/复杂PDF/十大富豪/世界十大富豪.xlsx"
-all_tables_data = {}
+table_names, table_summaries = [], []
+group_tables, group_ranges, group_texts = [], [], []
 
 # 读取Excel文件中的所有sheet
 with pd.ExcelFile(excel_file) as xls:
     for sheet_name in xls.sheet_names:
         df = pd.read_excel(xls, sheet_name=sheet_name)
-        # 将DataFrame转换为文本格式
-        table_text = df.to_string(index=False)
-        all_tables_data[sheet_name] = table_text
-
-# 5. 创建第二层向量存储
-table_embeddings = model.encode(list(all_tables_data.values()))
-table_index = faiss.IndexFlatL2(dimension)
-table_index.add(table_embeddings.astype('float32'))
-
-def search_relevant_table(question):
-    # 第一层检索：匹配年份
-    query_embedding = model.encode([question])[0]
-    distances, indices = desc_index.search(
-        np.array([query_embedding]).astype('float32'), 
-        k=1
-    )
-    matched_year = indices[0][0]
-    
-    # 第二层检索：在匹配的年份表格中搜索具体信息
-    table_embedding = model.encode([all_tables_data[f"billionaires_table_{matched_year+2}"]])[0]
-    distances, indices = table_index.search(
-        np.array([table_embedding]).astype('float32'), 
-        k=1
-    )
-    
-    return table_descriptions[matched_year], all_tables_data[f"billionaires_table_{matched_year+2}"]
+        store.save(sheet_name, df)
+        table_names.append(sheet_name)
+        table_summaries.append(table_summary(sheet_name, df, description=TABLE_DESCRIPTIONS.get(sheet_name)))
+        for start, end, text in row_groups(df):
+            group_tables.append(sheet_name)
+            group_ranges.append((start, end))
+            group_texts.append(text)
 
-def generate_answer(question):
-    # 检索相关信息
-    year_context, table_context = search_relevant_table(question)
-    
-    # 构建提示词
-    prompt = f"""根据以下参考信息回答问题：
-    
-年份信息：{year_context}
+# 3. 创建第一层向量存储（每张表一条摘要，内积 + 归一化即余弦相似度）
+summary_embeddings = model.encode(table_summaries, normalize_embeddings=True).astype('float32')
+dimension = summary_embeddings.shape[1]
+summary_index = faiss.IndexFlatIP(dimension)
+summary_index.add(summary_embeddings)
 
-相关数据：
-{table_context}
+# 4. 创建第二层向量存储（每个行组一条），行组向量按表分组，第二层只在选中的表内计算
+group_embeddings = model.encode(group_texts, normalize_embeddings=True).astype('float32')
+group_tables = np.array(group_tables)
 
-问题：{question}
+def search_relevant_table(question, top_groups=3):
+    # 查询只编码一次，两层检索共用
+    query_embedding = model.encode([question], normalize_embeddings=True).astype('float32')
 
-请基于以上信息给出详细回答："""
+    # 第一层检索：匹配表
+    _, indices = summary_index.search(query_embedding, k=1)
+    matched = indices[0][0]
+    table_name = table_names[matched]
 
-    # 使用DeepSeek生成答案
+    # 第二层检索：只在匹配到的表的行组里按相似度排序
+    candidates = np.flatnonzero(group_tables == table_name)
+    scores = group_embeddings[candidates] @ query_embedding[0]
+    best = candidates[np.argsort(-scores)[:top_groups]]
+    rows = pd.concat([store.rows(table_name, *group_ranges[i]) for i in sorted(best)])
+    return table_name, table_summaries[matched], rows
+
+def chat(prompt, max_tokens=1024):
+    # 使用DeepSeek生成文本
     client = OpenAI(
         api_key=os.getenv("DEEPSEEK_API_KEY"),
         base_url="https://api.deepseek.com/v1"
@@ -90,14 +71,36 @@ def generate_answer(question):
             "role": "user",
             "content": prompt
         }],
-        max_tokens=1024
+        max_tokens=max_tokens
     )
-    
+
     return response.choices[0].message.content
 
+def generate_answer(question):
+    # 检索相关信息
+    table_name, summary, rows = search_relevant_table(question)
+
+    # 聚合类问题在选中的表上执行 SQL，其余问题使用检索到的行
+    sql, result = text_to_sql(question, store, table_name, chat, summary=summary)
+    context = f"SQL：{sql}\n\n查询结果：\n{to_markdown(result)}" if sql else f"相关行：\n{to_markdown(rows)}"
+
+    # 构建提示词
+    prompt = f"""根据以下参考信息回答问题：
+
+表格摘要：
+{summary}
+
+{context}
+
+问题：{question}
+
+请基于以上信息给出详细回答："""
+
+    return chat(prompt)
+
 # 测试示例
 if __name__ == "__main__":
     test_question = "2023年世界首富是谁？他的财富是多少？"
     answer = generate_answer(test_question)
     print(f"问题：{test_question}")
-    print(f"答案：{answer}") 
\ No newline at end of file
+    print(f"答案：{answer}")
@@ -4,6 +4,8 @@ from sentence_transformers import SentenceTransformer
 import torch
 from pymilvus import MilvusClient
 import logging
+import pandas as pd
+from table_index import TableStore, text_to_sql, to_markdown
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,51 +21,73 @@ embedding_function = SentenceTransformer(
 )
 
 # 连接到Milvus
-client = MilvusClient("richman_bge_m3_v2.db")
+client = MilvusClient("richman_bge_m3_v3.db")
+# 02-双层索引-Milvus-成功的分层索引.py 写入的 Parquet 表格
+store = TableStore("table_store/richman")
 
-def search_relevant_table(question):
-    # 第一层检索：在summary集合中搜索最相关的sheet
-    query_embedding = embedding_function.encode([question])[0]
+def search_relevant_table(question, top_groups=3):
+    # 第一层检索：在summary集合中搜索最相关的表
+    query_embedding = embedding_function.encode([question], normalize_embeddings=True)[0]
     
     summary_results = client.search(
         collection_name="billionaires_summary",
         data=[query_embedding.tolist()],
         limit=1,
-        output_fields=["table_name"],
-        search_params={
-            "metric_type": "COSINE",
-            "params": {"nprobe": 10}
-        }
+        output_fields=["table_name", "content"],
+        search_params={"metric_type": "COSINE"}
     )
     
     if not summary_results or not summary_results[0]:
-        return None, None
+        return None, None, None
     
     matched_table = summary_results[0][0]['entity']['table_name']
+    summary = summary_results[0][0]['entity']['content']
     
-    # 第二层检索：在details集合中搜索具体信息
+    # 第二层检索：在选中的表内搜索相关行组，行组原文从 Parquet 读回
     details_results = client.search(
         collection_name="billionaires_details",
         data=[query_embedding.tolist()],
         filter=f"table_name == '{matched_table}'",
-        limit=1,
-        output_fields=["content"],
-        search_params={
-            "metric_type": "COSINE",
-            "params": {"nprobe": 10}
-        }
+        limit=top_groups,
+        output_fields=["row_start", "row_end"],
+        search_params={"metric_type": "COSINE", "params": {"nprobe": 16}}
     )
     
-    if not details_results or not details_results[0]:
-        return None, None
-    
-    return matched_table, details_results[0][0]['entity']['content']
+    hits = sorted((hit['entity']['row_start'], hit['entity']['row_end']) for hit in details_results[0])
+    rows = pd.concat([store.rows(matched_table, start, end) for start, end in hits]) if hits else None
+    return matched_table, summary, rows
+
+def chat(prompt, max_tokens=1024):
+    # 使用DeepSeek生成文本
+    from openai import OpenAI
+    llm = OpenAI(
+        api_key=os.getenv("DEEPSEEK_API_KEY"),
+        base_url="https://api.deepseek.com/v1"
+    )
+    response = llm.chat.completions.create(
+        model="deepseek-chat",
+        messages=[{
+            "role": "user",
+            "content": prompt
+        }],
+        max_tokens=max_tokens
+    )
+    return response.choices[0].message.content
 
 def generate_answer(question):
     # 检索相关信息
-    table_name, content = search_relevant_table(question)
+    table_name, summary, rows = search_relevant_table(question)
     
-    if not table_name or not content:
+    if not table_name:
+        return "抱歉，没有找到相关信息。"
+    
+    # 比较、计数、平均等问题：在选中的表上执行 SQL，只把结果交给大模型
+    sql, result = text_to_sql(question, store, table_name, chat, summary=summary)
+    if sql is not None:
+        context = f"SQL：{sql}\n\n查询结果：\n{to_markdown(result)}"
+    elif rows is not None:
+        context = f"相关行：\n{to_markdown(rows)}"
+    else:
         return "抱歉，没有找到相关信息。"
     
     # 构建提示词
@@ -71,30 +95,13 @@ def generate_answer(question):
 
 表格名称：{table_name}
 
-表格内容：
-{content}
+{context}
 
 问题：{question}
 
 请基于以上信息给出详细回答："""
 
-    # 使用DeepSeek生成答案
-    from openai import OpenAI
-    client = OpenAI(
-        api_key=os.getenv("DEEPSEEK_API_KEY"),
-        base_url="https://api.deepseek.com/v1"
-    )
-
-    response = client.chat.completions.create(
-        model="deepseek-chat",
-        messages=[{
-            "role": "user",
-            "content": prompt
-        }],
-        max_tokens=1024
-    )
-    
-    return response.choices[0].message.content
+    return chat(prompt)
 
 # 测试查询列表
 test_queries = [
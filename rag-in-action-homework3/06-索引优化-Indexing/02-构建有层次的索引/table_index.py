@@ -0,0 +1,204 @@
+# table_index.py - 表格感知检索：表摘要 + 行组文本、Parquet 列式存储、DuckDB 聚合查询
+import os
+import re
+import pandas as pd
+
+"""
+表格感知的分层索引
+
+02-双层索引-Milvus-成功的分层索引.py 把整张 sheet 用 df.to_string() 存进一个 VARCHAR(10000) 并只算一个向量，
+98-双层索引-FAISS.py 同样整表编码，查询时还把匹配到的表重新编码一遍。
+表一大就超出字段长度和模型输入长度，一个向量也代表不了几百行的内容；
+"平均值""前几名""一共多少"这类聚合问题，把整表文本塞给大模型既贵又容易算错。
+
+这里：
+- 每张表一条摘要文本（表说明、表名、行数、各列的类型、取值范围或示例值）作为第一层向量；
+  表说明来自 TABLE_DESCRIPTIONS，Milvus 和 FAISS 两个版本共用
+- 每 ROWS_PER_GROUP 行一个行组，行组文本是 "列: 值；列: 值" 的紧凑形式，作为第二层向量
+- 表格本身存成 Parquet（行组大小与检索行组一致），命中的行组按 Parquet 行组直接读回 DataFrame
+- 聚合类问题由大模型根据列结构写一条 DuckDB SQL（表名固定为 t），在选中的表上执行，只把结果交给大模型；
+  SQL 在关闭外部文件访问的内存库里执行，只能查询表 t
+
+向量库由调用方选择（Milvus / FAISS），本模块只负责文本构造、存储和查询。
+
+使用方式：
+    from table_index import TABLE_DESCRIPTIONS, TableStore, table_summary, row_groups, text_to_sql
+    store = TableStore("table_store")
+    store.save("billionaires_2023", df)
+    summary = table_summary(sheet_name, df, description=TABLE_DESCRIPTIONS.get(sheet_name))
+    for start, end, text in row_groups(df): ...
+    sql, result = text_to_sql("2023年富豪的平均财富是多少？", store, "billionaires_2023", complete)
+"""
+
+ROWS_PER_GROUP = 10
+TABLE_STORE_DIR = "table_store"
+MAX_SQL_RESULT_ROWS = 50
+
+# 世界十大富豪.xlsx 的表说明：sheet 名（billionaires_table_N）看不出年份，靠说明把问题中的年份对应到表
+TABLE_DESCRIPTIONS = {
+    "billionaires_table_2": "2023年世界十大富豪榜单，展示了当年全球最富有的十位富豪及其财富情况。",
+    "billionaires_table_3": "2022年世界十大富豪榜单，记录了当年全球最富有的十位富豪及其财富情况。",
+    "billionaires_table_4": "2021年世界十大富豪榜单，展示了当年全球最富有的十位富豪及其财富情况。",
+    "billionaires_table_5": "2020年世界十大富豪榜单，记录了当年全球最富有的十位富豪及其财富情况。",
+    "billionaires_table_6": "2019年世界十大富豪榜单，展示了当年全球最富有的十位富豪及其财富情况。"
+}
+
+
+def table_summary(name, df, max_values=5, description=None):
+    """
+    表摘要文本：表说明（可选）、表名、行数、每列的类型和取值范围 / 示例值
+
+    参数：
+        description (str): 人工写的表说明，放在摘要开头；表名本身看不出年份、主题时用它把问题和表对应起来
+    """
+    parts = ([description] if description else []) + [f"表名：{name}", f"行数：{len(df)}", "列："]
+    for column in df.columns:
+        series = df[column].dropna()
+        if pd.api.types.is_numeric_dtype(series) and len(series):
+            parts.append(f"- {column}（数值，范围 {series.min()} ~ {series.max()}）")
+        else:
+            values = series.astype(str).unique()[:max_values]
+            parts.append(f"- {column}（文本，例如 {'、'.join(values)}）")
+    return "\n".join(parts)
+
+
+def row_text(row):
+    """
+    一行的紧凑文本："列: 值；列: 值"（跳过空值）
+    """
+    return "；".join(f"{column}: {value}" for column, value in row.items() if pd.notna(value) and value != "")
+
+
+def row_groups(df, rows_per_group=ROWS_PER_GROUP):
+    """
+    把表切成行组
+
+    返回：
+        list: [(起始行, 结束行(不含), 行组文本), ...]
+    """
+    groups = []
+    for start in range(0, len(df), rows_per_group):
+        chunk = df.iloc[start:start + rows_per_group]
+        groups.append((start, start + len(chunk), "\n".join(row_text(row) for _, row in chunk.iterrows())))
+    return groups
+
+
+def to_markdown(df):
+    """
+    紧凑 Markdown 表格（不做列宽填充）
+    """
+    lines = ["| " + " | ".join(map(str, df.columns)) + " |", "|" + "---|" * len(df.columns)]
+    lines.extend("| " + " | ".join(str(v).replace("|", "\\|") for v in row) + " |"
+                 for row in df.itertuples(index=False))
+    return "\n".join(lines)
+
+
+class TableStore:
+    """
+    Parquet 表格存储：每张表一个文件，Parquet 行组与检索行组对齐
+    """
+
+    def __init__(self, store_dir=TABLE_STORE_DIR, rows_per_group=ROWS_PER_GROUP):
+        self.store_dir = store_dir
+        self.rows_per_group = rows_per_group
+        os.makedirs(store_dir, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.store_dir, re.sub(r"[^\w\-]", "_", name) + ".parquet")
+
+    def save(self, name, df):
+        """
+        写 Parquet（列名统一为字符串，混合类型的列转成字符串）
+        """
+        df = df.copy()
+        df.columns = [str(c) for c in df.columns]
+        for column in df.columns:
+            if df[column].dtype == object:
+                df[column] = df[column].astype(str).where(df[column].notna(), None)
+        df.to_parquet(self.path(name), index=False, row_group_size=self.rows_per_group)
+        return self.path(name)
+
+    def load(self, name, columns=None):
+        """
+        读取整张表（可以只读部分列）
+        """
+        return pd.read_parquet(self.path(name), columns=columns)
+
+    def rows(self, name, start, end):
+        """
+        读取 [start, end) 行：只解码覆盖这些行的 Parquet 行组
+        """
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(self.path(name))
+        groups, offset, first_offset = [], 0, None
+        for i in range(parquet.num_row_groups):
+            num_rows = parquet.metadata.row_group(i).num_rows
+            if offset < end and offset + num_rows > start:
+                groups.append(i)
+                first_offset = offset if first_offset is None else first_offset
+            offset += num_rows
+        if not groups:
+            return pd.DataFrame()
+        df = parquet.read_row_groups(groups).to_pandas()
+        return df.iloc[start - first_offset:end - first_offset].reset_index(drop=True)
+
+    def schema_text(self, name):
+        """
+        给大模型写 SQL 用的列结构说明
+        """
+        import pyarrow.parquet as pq
+        schema = pq.read_schema(self.path(name))
+        return "\n".join(f'"{field.name}" {field.type}' for field in schema)
+
+    def sql(self, name, query):
+        """
+        在一张表上执行一条只读 SQL，表名为 t
+
+        Parquet 先读进内存表 t，然后关闭外部访问并锁定配置，
+        大模型写出的 SQL 无法再用 read_text / read_csv / COPY 等读写本地文件；多条语句直接拒绝
+        """
+        import duckdb
+        with duckdb.connect(":memory:") as con:
+            statements = con.extract_statements(query)
+            if len(statements) != 1:
+                raise ValueError("只允许执行一条 SQL 语句")
+            path = self.path(name).replace("'", "''")
+            con.execute(f"CREATE TABLE t AS SELECT * FROM read_parquet('{path}')")
+            con.execute("SET enable_external_access = false")
+            con.execute("SET lock_configuration = true")
+            return con.execute(statements[0]).df()
+
+SQL_PROMPT = """表 t 的列结构如下：
+{schema}
+
+表摘要：
+{summary}
+
+问题：{question}
+
+如果回答这个问题需要对表做筛选、排序、计数或求和/平均等计算，请只输出一条 DuckDB SQL（表名用 t，列名用双引号），不要解释；
+如果只需要查看若干行原文即可回答，请只输出 NONE。"""
+
+
+def text_to_sql(question, store, name, complete, summary=""):
+    """
+    让大模型为问题写 SQL 并在选中的表上执行
+
+    参数：
+        question (str): 用户问题
+        store (TableStore): 表格存储
+        name (str): 选中的表名
+        complete (callable): prompt -> 大模型输出文本
+        summary (str): 表摘要（可选，帮助大模型理解列含义）
+
+    返回：
+        tuple: (sql, 结果 DataFrame)；不需要 SQL 或执行失败时返回 (None, None)
+    """
+    output = complete(SQL_PROMPT.format(schema=store.schema_text(name), summary=summary, question=question)).strip()
+    sql = re.sub(r"^```(?:sql)?|```$", "", output, flags=re.IGNORECASE | re.MULTILINE).strip().rstrip(";")
+    if not sql or sql.upper() == "NONE" or not sql.lower().lstrip("(").startswith(("select", "with")):
+        return None, None
+    try:
+        return sql, store.sql(name, sql).head(MAX_SQL_RESULT_ROWS)
+    except Exception:  # SQL 写错：退回行组检索
+        return None, None
@@ -8,6 +8,9 @@ from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_deepseek import ChatDeepSeek
 from langchain.load import dumps, loads
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "01-数据导入-DataLoading"))
+from incremental_ingest import sync_directory
 
 """
 RRF（Reciprocal Rank Fusion）重排算法实现
@@ -29,63 +32,80 @@ RRF是一种简单而有效的多检索结果融合算法，它通过将多个
 
 # 文档目录配置
 doc_dir = "90-文档-Data/山西文旅"
+persist_dir = "chroma_rrf_db"  # 向量库持久化目录，配合导入清单做增量更新
 
-def load_documents(directory):
+def load_file(filepath):
     """
-    文档加载函数
+    单文件加载函数
     
-    功能：读取指定目录中的所有文档（支持PDF、TXT格式）
+    功能：根据文件扩展名选择合适的加载器（支持PDF、TXT格式）
+    
+    参数：
+        filepath (str): 文件路径
+    
+    返回：
+        list: 加载的文档列表，不支持的格式返回空列表
+    """
+    if filepath.endswith(".pdf"):
+        # 使用PyPDFLoader加载PDF文件
+        return PyPDFLoader(filepath).load()
+    if filepath.endswith(".txt"):
+        # 使用TextLoader加载TXT文件
+        return TextLoader(filepath).load()
+    return []  # 跳过不支持的文件类型
+
+def load_documents(directory, vectorstore, text_splitter):
+    """
+    文档增量导入函数
+    
+    功能：只解析目录中新增或修改的文档，切块后写入向量库；已删除或已修改文件的旧文本块从向量库删除
     
     参数：
         directory (str): 文档所在目录路径
+        vectorstore (Chroma): 持久化的向量库
+        text_splitter: 文本切块器
     
     返回：
-        list: 加载的文档列表，每个文档包含内容和元数据
+        dict: sync_directory 的结果（changed / unchanged / removed / errors）
     
     说明：
-        - 遍历目录中的所有文件
-        - 根据文件扩展名选择合适的加载器
-        - 支持PDF和TXT格式文件
-        - 跳过不支持的文件格式
+        - 导入清单记录每个文件的大小、mtime、内容哈希和对应的文本块 id
+        - 未变化的文件不重新解析、不重新嵌入
+        - 文件并行解析，单个文件出错只记录错误，不影响其他文件
     """
-    documents = []
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-        
-        if filename.endswith(".pdf"):
-            # 使用PyPDFLoader加载PDF文件
-            loader = PyPDFLoader(filepath)
-        elif filename.endswith(".txt"):
-            # 使用TextLoader加载TXT文件
-            loader = TextLoader(filepath)
-        else:
-            continue  # 跳过不支持的文件类型
-        
-        # 加载文档并添加到列表中
-        documents.extend(loader.load())
-    return documents
-
-# 第一步：加载文档
-print("📖 正在加载文档...")
-docs = load_documents(doc_dir)
-print(f"✅ 成功加载 {len(docs)} 个文档")
-
-# 第二步：文本切块（分割）
-print("\n🔪 正在进行文本切块...")
+    def index_fn(rel_path, docs):
+        splits = text_splitter.split_documents(docs)
+        if not splits:
+            return []
+        ids = [f"{rel_path}:{docs[0].metadata['content_hash'][:12]}:{i}" for i in range(len(splits))]
+        vectorstore.add_documents(splits, ids=ids)
+        return ids
+
+    return sync_directory(directory, load_file, manifest_path=os.path.join(persist_dir, "manifest.json"),
+                          loader_version="pypdf-text-300-50", index_fn=index_fn,
+                          delete_fn=lambda ids: vectorstore.delete(ids=ids))
+
+# 第一步：准备文本切块器和向量库
+print("\n🔍 正在准备向量库...")
 text_splitter = RecursiveCharacterTextSplitter(
     chunk_size=300,      # 每个文本块的最大字符数
     chunk_overlap=50     # 相邻文本块之间的重叠字符数，确保上下文连续性
 )
-splits = text_splitter.split_documents(docs)
-print(f"✅ 文档已切分为 {len(splits)} 个文本块")
-
-# 第三步：创建向量索引
-print("\n🔍 正在创建向量索引...")
 # 使用HuggingFace的轻量级嵌入模型
 embed_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-# 使用Chroma向量数据库存储文档向量
-vectorstore = Chroma.from_documents(documents=splits, embedding=embed_model)
-# 创建检索器
+# 使用持久化的Chroma向量数据库存储文档向量
+os.makedirs(persist_dir, exist_ok=True)
+vectorstore = Chroma(embedding_function=embed_model, persist_directory=persist_dir)
+
+# 第二步：增量加载文档、切块并写入向量库
+print("📖 正在增量加载文档...")
+result = load_documents(doc_dir, vectorstore, text_splitter)
+print(f"✅ 新增/修改 {len(result['changed'])} 个文件，未变化 {len(result['unchanged'])} 个，"
+      f"已删除 {len(result['removed'])} 个")
+for path, error in result["errors"].items():
+    print(f"⚠️ 加载失败 {path}：{error}")
+
+# 第三步：创建检索器
 retriever = vectorstore.as_retriever()
 print("✅ 向量索引创建完成")
 
@@ -0,0 +1,388 @@
+import copy
+import math
+import re
+import time
+from transformers import AutoTokenizer, AutoModelForCausalLM, AutoModelForSequenceClassification
+import torch
+
+"""
+本地Listwise LLM重排算法实现（RankGPT滑动窗口）
+
+05-RankLLM重排和04-Cohere重排都依赖在线API，本脚本提供一个完全离线的重排层：
+用本地小模型（Qwen3-0.6B，同08-响应生成-Generation/01-模型的选择和调用）做Listwise排序。
+
+核心原理（RankGPT）：
+1. 把查询和一组带编号的候选段落一起交给LLM，让它直接输出排序，如 [3] > [1] > [2]
+2. 小模型上下文有限，候选较多时使用滑动窗口：从列表末尾开始，每次对window_size个
+   候选排序，然后向前移动stride个位置，让相关文档逐步"冒泡"到前面
+3. 窗口之间有重叠（window_size - stride），保证排序结果能在窗口间传递
+
+性能优化：
+- KV缓存复用：同一查询的所有窗口共享相同的前缀（系统指令 + 查询），前缀只做一次
+  prefill，之后每个窗口在前缀KV缓存的副本上继续生成，省去重复计算
+- 批量生成：多个查询处于同一滑动步时，把各自的窗口prompt左填充后一次generate
+- 贪心解码 + 较短的max_new_tokens：排序输出只包含编号，不需要采样
+
+与CrossEncoder对比：
+- CrossEncoder对每个查询-文档对独立打分（Pointwise），速度快
+- Listwise让模型同时看到多个候选，能做相互比较，但生成开销更大
+脚本最后在同一批候选集上对比两者的NDCG@k与延迟。
+"""
+
+# 配置
+LLM_MODEL_NAME = "Qwen/Qwen3-0.6B"
+CROSS_ENCODER_NAME = "cross-encoder/ms-marco-MiniLM-L-12-v2"
+WINDOW_SIZE = 4          # 每个窗口内排序的候选数量
+STRIDE = 2               # 窗口每次向前移动的步长
+MAX_PASSAGE_CHARS = 200  # 每个候选段落在prompt中的最大字符数
+MAX_NEW_TOKENS = 40      # 排序输出的最大token数
+EVAL_K = 3               # NDCG@k
+
+print("🔄 初始化本地Listwise重排系统...")
+
+# 1. 加载本地LLM
+print("📥 加载本地LLM...")
+print(f"使用模型: {LLM_MODEL_NAME}")
+tokenizer = AutoTokenizer.from_pretrained(LLM_MODEL_NAME, trust_remote_code=True)
+tokenizer.padding_side = "left"  # 批量生成需要左填充
+if tokenizer.pad_token is None:
+    tokenizer.pad_token = tokenizer.eos_token
+llm = AutoModelForCausalLM.from_pretrained(
+    LLM_MODEL_NAME,
+    device_map="auto",
+    trust_remote_code=True
+).eval()
+print("✅ LLM加载完成")
+
+# 2. 准备测试数据（候选集 + 相关性标注，标注值越大越相关）
+print("\n📋 准备测试数据...")
+eval_set = [
+    {
+        "query": "山西有哪些著名的旅游景点？",
+        "candidates": [
+            "山西的煤炭储量丰富，是中国重要的能源基地。",
+            "五台山是中国四大佛教名山之一，以文殊菩萨道场闻名。",
+            "山西刀削面是著名的面食，历史悠久。",
+            "云冈石窟是中国三大石窟之一，以精美的佛教雕塑著称。",
+            "太原是山西省的省会城市。",
+            "平遥古城是中国保存最完整的古代县城之一，被列为世界文化遗产。",
+        ],
+        "labels": [0, 2, 0, 2, 0, 2],
+    },
+    {
+        "query": "云冈石窟有哪些著名的造像？",
+        "candidates": [
+            "平遥古城的城墙修建于明洪武年间。",
+            "云冈石窟第20窟的露天大佛是云冈石窟的象征。",
+            "五台山有大量寺庙，如显通寺、塔院寺。",
+            "云冈石窟第5窟的释迦坐像高17米，是云冈最大的佛像。",
+            "大同是云冈石窟所在的城市，也是北魏的都城。",
+            "云冈石窟第6窟的中心塔柱和佛传故事浮雕最为精美。",
+        ],
+        "labels": [0, 2, 0, 2, 1, 2],
+    },
+]
+for item in eval_set:
+    print(f"  查询: {item['query']}（{len(item['candidates'])} 个候选）")
+
+
+def build_prefix(query, num_passages):
+    """
+    构造所有窗口共享的前缀
+
+    功能：前缀只依赖查询和窗口大小，同一查询的所有窗口可以复用它的KV缓存
+
+    参数：
+        query (str): 用户查询
+        num_passages (int): 窗口内候选数量
+
+    返回：
+        str: 前缀文本
+    """
+    return (
+        "<|im_start|>system\n你是一个智能助手，负责根据段落与查询的相关性对段落进行排序。<|im_end|>\n"
+        f"<|im_start|>user\n下面给出 {num_passages} 个段落，每个段落用编号 [1]、[2] ... 标识。\n"
+        f"查询：{query}\n"
+    )
+
+
+def build_window_suffix(passages):
+    """
+    构造窗口相关的后缀（候选段落 + 输出格式要求）
+
+    参数：
+        passages (list): 窗口内的候选段落
+
+    返回：
+        str: 后缀文本
+    """
+    lines = [f"[{i}] {p[:MAX_PASSAGE_CHARS]}" for i, p in enumerate(passages, 1)]
+    return (
+        "\n".join(lines)
+        + "\n请按相关性从高到低输出所有段落编号，格式为 [2] > [1] > [3]，只输出排序结果。<|im_end|>\n"
+        + "<|im_start|>assistant\n<think>\n\n</think>\n\n"
+    )
+
+
+def parse_permutation(text, n):
+    """
+    解析LLM输出的排序结果
+
+    功能：提取形如 [3] > [1] > [2] 的编号序列，去除重复和越界编号，
+         缺失的编号按原顺序补到末尾，保证返回完整排列
+
+    参数：
+        text (str): LLM生成的文本
+        n (int): 窗口内候选数量
+
+    返回：
+        list: 0-based排列
+    """
+    order = []
+    for num in re.findall(r"\[?(\d+)\]?", text):
+        idx = int(num) - 1
+        if 0 <= idx < n and idx not in order:
+            order.append(idx)
+    order.extend(i for i in range(n) if i not in order)
+    return order
+
+
+def sliding_windows(num_candidates, window_size, stride):
+    """
+    生成RankGPT滑动窗口的区间（从列表末尾向前）
+
+    参数：
+        num_candidates (int): 候选总数
+        window_size (int): 窗口大小
+        stride (int): 步长
+
+    返回：
+        list: [(start, end), ...]
+    """
+    windows = []
+    end = num_candidates
+    while True:
+        start = max(0, end - window_size)
+        windows.append((start, end))
+        if start == 0:
+            break
+        end -= stride
+    return windows
+
+
+def encode_prefix(query, num_passages):
+    """
+    对前缀做一次prefill，返回前缀的token和KV缓存
+
+    参数：
+        query (str): 用户查询
+        num_passages (int): 窗口内候选数量
+
+    返回：
+        tuple: (前缀input_ids, 前缀KV缓存)
+    """
+    prefix_ids = tokenizer(build_prefix(query, num_passages), return_tensors="pt").input_ids.to(llm.device)
+    with torch.no_grad():
+        prefix_cache = llm(prefix_ids, use_cache=True).past_key_values
+    return prefix_ids, prefix_cache
+
+
+def rerank_window_cached(prefix_ids, prefix_cache, passages):
+    """
+    在前缀KV缓存上对一个窗口排序
+
+    功能：拼接前缀与窗口后缀，generate只需要prefill后缀部分；
+         缓存在生成时会被追加，所以每个窗口使用前缀缓存的副本
+
+    参数：
+        prefix_ids (torch.Tensor): 前缀token
+        prefix_cache: 前缀KV缓存
+        passages (list): 窗口内候选段落
+
+    返回：
+        list: 窗口内0-based排列
+    """
+    suffix_ids = tokenizer(
+        build_window_suffix(passages), return_tensors="pt", add_special_tokens=False
+    ).input_ids.to(llm.device)
+    input_ids = torch.cat([prefix_ids, suffix_ids], dim=1)
+    with torch.no_grad():
+        output = llm.generate(
+            input_ids=input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            past_key_values=copy.deepcopy(prefix_cache),
+            max_new_tokens=MAX_NEW_TOKENS,
+            do_sample=False,
+            pad_token_id=tokenizer.pad_token_id,
+        )
+    text = tokenizer.decode(output[0, input_ids.shape[1]:], skip_special_tokens=True)
+    return parse_permutation(text, len(passages))
+
+
+def listwise_rerank(query, candidates, window_size=WINDOW_SIZE, stride=STRIDE):
+    """
+    单查询滑动窗口Listwise重排（复用前缀KV缓存）
+
+    参数：
+        query (str): 用户查询
+        candidates (list): 初检索得到的候选段落（按初检索顺序）
+        window_size (int): 窗口大小
+        stride (int): 步长
+
+    返回：
+        list: 重排后的候选下标
+    """
+    ranking = list(range(len(candidates)))
+    prefix_cache_by_size = {}
+    for start, end in sliding_windows(len(candidates), window_size, stride):
+        size = end - start
+        # 最后一个窗口可能比window_size小，前缀里的段落数不同，需要单独缓存
+        if size not in prefix_cache_by_size:
+            prefix_cache_by_size[size] = encode_prefix(query, size)
+        prefix_ids, prefix_cache = prefix_cache_by_size[size]
+        window = ranking[start:end]
+        order = rerank_window_cached(prefix_ids, prefix_cache, [candidates[i] for i in window])
+        ranking[start:end] = [window[i] for i in order]
+    return ranking
+
+
+def listwise_rerank_batch(queries, candidate_lists, window_size=WINDOW_SIZE, stride=STRIDE):
+    """
+    多查询批量滑动窗口Listwise重排
+
+    功能：所有查询按同样的窗口步推进，每一步把各查询当前窗口的prompt左填充后
+         一次generate，用批量生成摊薄每步的解码开销
+
+    参数：
+        queries (list): 查询列表
+        candidate_lists (list): 每个查询对应的候选段落列表
+        window_size (int): 窗口大小
+        stride (int): 步长
+
+    返回：
+        list: 每个查询重排后的候选下标
+    """
+    rankings = [list(range(len(c))) for c in candidate_lists]
+    windows_per_query = [sliding_windows(len(c), window_size, stride) for c in candidate_lists]
+    num_steps = max(len(w) for w in windows_per_query)
+
+    for step in range(num_steps):
+        active = [q for q in range(len(queries)) if step < len(windows_per_query[q])]
+        prompts = []
+        for q in active:
+            start, end = windows_per_query[q][step]
+            passages = [candidate_lists[q][i] for i in rankings[q][start:end]]
+            prompts.append(build_prefix(queries[q], len(passages)) + build_window_suffix(passages))
+
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(llm.device)
+        with torch.no_grad():
+            outputs = llm.generate(
+                **inputs,
+                max_new_tokens=MAX_NEW_TOKENS,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id,
+            )
+        texts = tokenizer.batch_decode(outputs[:, inputs.input_ids.shape[1]:], skip_special_tokens=True)
+
+        for q, text in zip(active, texts):
+            start, end = windows_per_query[q][step]
+            window = rankings[q][start:end]
+            order = parse_permutation(text, len(window))
+            rankings[q][start:end] = [window[i] for i in order]
+    return rankings
+
+
+def ndcg_at_k(ranking, labels, k):
+    """
+    计算NDCG@k
+
+    参数：
+        ranking (list): 重排后的候选下标
+        labels (list): 每个候选的相关性标注
+        k (int): 截断位置
+
+    返回：
+        float: NDCG@k
+    """
+    dcg = sum((2 ** labels[idx] - 1) / math.log2(rank + 2) for rank, idx in enumerate(ranking[:k]))
+    ideal = sorted(labels, reverse=True)
+    idcg = sum((2 ** rel - 1) / math.log2(rank + 2) for rank, rel in enumerate(ideal[:k]))
+    return dcg / idcg if idcg > 0 else 0.0
+
+
+# 3. 单查询重排（复用前缀KV缓存）
+print(f"\n🎯 单查询滑动窗口重排（window_size={WINDOW_SIZE}, stride={STRIDE}）...")
+listwise_single_results = []
+start_time = time.perf_counter()
+for item in eval_set:
+    ranking = listwise_rerank(item["query"], item["candidates"])
+    listwise_single_results.append(ranking)
+listwise_single_latency = (time.perf_counter() - start_time) / len(eval_set)
+print(f"  ✅ 完成，平均每个查询 {listwise_single_latency * 1000:.1f} ms")
+
+# 4. 多查询批量重排
+print(f"\n📦 多查询批量滑动窗口重排...")
+start_time = time.perf_counter()
+listwise_batch_results = listwise_rerank_batch(
+    [item["query"] for item in eval_set],
+    [item["candidates"] for item in eval_set],
+)
+listwise_batch_latency = (time.perf_counter() - start_time) / len(eval_set)
+print(f"  ✅ 完成，平均每个查询 {listwise_batch_latency * 1000:.1f} ms")
+
+# 5. CrossEncoder基线（同一批候选集）
+print(f"\n📥 加载CrossEncoder基线模型: {CROSS_ENCODER_NAME}")
+ce_tokenizer = AutoTokenizer.from_pretrained(CROSS_ENCODER_NAME)
+ce_model = AutoModelForSequenceClassification.from_pretrained(CROSS_ENCODER_NAME).eval()
+
+
+def cross_encoder_rerank(query, candidates):
+    """
+    CrossEncoder批量打分后排序（与02-CrossEncoder重排相同的模型）
+
+    参数：
+        query (str): 用户查询
+        candidates (list): 候选段落
+
+    返回：
+        list: 重排后的候选下标
+    """
+    inputs = ce_tokenizer(
+        [query] * len(candidates), candidates,
+        return_tensors="pt", truncation=True, max_length=512, padding=True
+    )
+    with torch.no_grad():
+        scores = ce_model(**inputs).logits[:, 0].tolist()
+    return sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+
+
+start_time = time.perf_counter()
+cross_encoder_results = [cross_encoder_rerank(item["query"], item["candidates"]) for item in eval_set]
+cross_encoder_latency = (time.perf_counter() - start_time) / len(eval_set)
+
+# 6. 质量/延迟对比
+print(f"\n{'='*60}")
+print(f"🏆 Listwise vs CrossEncoder 对比（NDCG@{EVAL_K}）")
+print(f"{'='*60}")
+methods = {
+    "初检索顺序": ([list(range(len(item["candidates"]))) for item in eval_set], 0.0),
+    "CrossEncoder": (cross_encoder_results, cross_encoder_latency),
+    "Listwise(KV缓存)": (listwise_single_results, listwise_single_latency),
+    "Listwise(批量)": (listwise_batch_results, listwise_batch_latency),
+}
+print(f"{'方法':<20}{'NDCG@' + str(EVAL_K):>10}{'平均延迟(ms)':>16}")
+for name, (rankings, latency) in methods.items():
+    ndcg = sum(ndcg_at_k(r, item["labels"], EVAL_K) for r, item in zip(rankings, eval_set)) / len(eval_set)
+    print(f"{name:<20}{ndcg:>10.4f}{latency * 1000:>16.1f}")
+
+for item, ranking in zip(eval_set, listwise_single_results):
+    print(f"\n查询: {item['query']}")
+    for rank, idx in enumerate(ranking[:EVAL_K], 1):
+        print(f"  {rank}. {item['candidates'][idx]}")
+
+print(f"\n📋 本地Listwise重排总结:")
+print("- ✅ 完全离线：不依赖任何在线重排API")
+print("- ✅ 滑动窗口：小模型也能处理较长的候选列表")
+print("- ✅ KV缓存复用：同一查询的窗口共享前缀prefill")
+print("- ✅ 批量生成：多查询同步推进，提升吞吐")
+print("- ⚠️  延迟高于CrossEncoder：适合作为精排的最后一层")
@@ -0,0 +1,271 @@
+import json
+import time
+from collections import Counter
+from transformers import AutoTokenizer, AutoModel, AutoModelForSequenceClassification
+import torch
+
+"""
+级联重排（Cascade Reranking）实现
+
+01~06 各个重排脚本（RRF、CrossEncoder、ColBERT、Cohere、RankLLM）都是独立的演示，
+调用方只能挑选一种。本脚本把它们组合成一条由便宜到昂贵的级联管道：
+
+    RRF融合（全部候选） → ColBERT MaxSim（Top-100） → CrossEncoder（Top-20）
+
+核心思想：
+1. 每一级只处理上一级保留下来的候选（per-stage budget），昂贵模型只看少量文档
+2. 每一级结束后计算置信度：Top-1与Top-2分数差距（按该级分数的标准差归一化）
+3. 差距足够大说明结果已经很确定，提前退出（early exit），不再调用更贵的模型
+4. 记录每一级的耗时并导出延迟直方图，便于观察不同难度查询的成本分布
+
+这样简单查询只付出RRF/ColBERT的成本，困难查询才会走到CrossEncoder，
+总重排成本随查询难度变化，而不是每次都付出最贵模型的代价。
+"""
+
+# 配置
+COLBERT_MODEL_NAME = "bert-base-uncased"  # 可替换为 'colbert-ir/colbertv2.0'
+CROSS_ENCODER_NAME = "cross-encoder/ms-marco-MiniLM-L-12-v2"
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]  # 直方图桶上界（毫秒）
+HISTOGRAM_PATH = "cascade_latency_histogram.json"
+
+
+class RRFStage:
+    """
+    第一级：RRF融合
+
+    把多个检索器的结果列表按 score = Σ 1/(rank + k) 融合（同01-RRF重排），
+    只需要排名，几乎没有计算成本
+    """
+
+    name = "rrf"
+
+    def __init__(self, k=60, top_k=100, exit_margin=None):
+        self.k = k
+        self.top_k = top_k              # 本级保留给下一级的候选数量
+        self.exit_margin = exit_margin  # RRF分数区分度低，默认不在这一级提前退出
+
+    def score(self, query, candidates, ranked_lists):
+        fused = Counter()
+        for ranked in ranked_lists:
+            for rank, doc_id in enumerate(ranked):
+                fused[doc_id] += 1 / (rank + self.k)
+        return [fused.get(doc_id, 0.0) for doc_id in candidates]
+
+
+class ColBERTStage:
+    """
+    第二级：ColBERT MaxSim
+
+    查询和文档分别编码为token向量，对查询中每个token取与文档token的最大余弦相似度并求和
+    （03-CoBERT重排中使用的是平均池化简化版，这里是完整的MaxSim）
+    """
+
+    name = "colbert"
+
+    def __init__(self, documents, model_name=COLBERT_MODEL_NAME, top_k=20, exit_margin=3.0, max_length=128):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).eval()
+        self.max_length = max_length
+        self.top_k = top_k
+        self.exit_margin = exit_margin
+        # 文档token向量可以离线预计算，查询时只需要编码查询
+        self.doc_embeddings, self.doc_masks = self._encode(documents)
+
+    def _encode(self, texts):
+        inputs = self.tokenizer(texts, return_tensors="pt", padding=True,
+                                truncation=True, max_length=self.max_length)
+        with torch.no_grad():
+            embeddings = self.model(**inputs).last_hidden_state
+        embeddings = torch.nn.functional.normalize(embeddings, dim=-1)
+        return embeddings, inputs["attention_mask"].bool()
+
+    def score(self, query, candidates, ranked_lists):
+        query_emb, query_mask = self._encode([query])
+        query_emb = query_emb[0][query_mask[0]]            # [q_len, hidden]
+        doc_emb = self.doc_embeddings[candidates]          # [n, d_len, hidden]
+        doc_mask = self.doc_masks[candidates]              # [n, d_len]
+        sim = torch.einsum("qh,ndh->nqd", query_emb, doc_emb)
+        sim = sim.masked_fill(~doc_mask[:, None, :], float("-inf"))
+        return sim.max(dim=-1).values.sum(dim=-1).tolist()
+
+
+class CrossEncoderStage:
+    """
+    第三级：CrossEncoder
+
+    查询-文档对联合编码，精度最高、成本也最高，只处理前两级筛选后的少量候选
+    """
+
+    name = "cross_encoder"
+
+    def __init__(self, documents, model_name=CROSS_ENCODER_NAME, top_k=5, exit_margin=None):
+        self.documents = documents
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        self.top_k = top_k
+        self.exit_margin = exit_margin
+
+    def score(self, query, candidates, ranked_lists):
+        inputs = self.tokenizer([query] * len(candidates), [self.documents[i] for i in candidates],
+                                return_tensors="pt", padding=True, truncation=True, max_length=512)
+        with torch.no_grad():
+            return self.model(**inputs).logits[:, 0].tolist()
+
+
+class LatencyHistogram:
+    """
+    每一级的延迟直方图
+
+    使用固定桶上界统计（累计计数格式与Prometheus histogram一致），支持导出为JSON
+    """
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.stages = {}
+
+    def observe(self, stage, latency_ms):
+        stats = self.stages.setdefault(stage, {
+            "buckets": [0] * (len(self.buckets_ms) + 1), "count": 0, "sum_ms": 0.0
+        })
+        slot = next((i for i, b in enumerate(self.buckets_ms) if latency_ms <= b), len(self.buckets_ms))
+        stats["buckets"][slot] += 1
+        stats["count"] += 1
+        stats["sum_ms"] += latency_ms
+
+    def export(self, path):
+        data = {}
+        for stage, stats in self.stages.items():
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets_ms + ["+Inf"], stats["buckets"]):
+                running += count
+                cumulative[str(bound)] = running
+            data[stage] = {"le_ms": cumulative, "count": stats["count"], "sum_ms": round(stats["sum_ms"], 3)}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return data
+
+
+def score_margin(scores):
+    """
+    计算Top-1与Top-2的置信差距
+
+    功能：分数差按该级所有候选分数的标准差归一化，使不同模型的分数尺度可比
+
+    参数：
+        scores (list): 已按降序排列的分数
+
+    返回：
+        float: 归一化后的差距；候选不足2个时返回无穷大
+    """
+    if len(scores) < 2:
+        return float("inf")
+    mean = sum(scores) / len(scores)
+    std = (sum((s - mean) ** 2 for s in scores) / len(scores)) ** 0.5
+    return (scores[0] - scores[1]) / (std + 1e-6)
+
+
+class CascadeReranker:
+    """
+    级联重排器
+
+    按顺序执行各级，每一级把候选截断到自己的top_k预算后交给下一级；
+    若该级的置信差距超过exit_margin则提前返回
+    """
+
+    def __init__(self, stages, histogram=None):
+        self.stages = stages
+        self.histogram = histogram or LatencyHistogram()
+
+    def rerank(self, query, ranked_lists):
+        """
+        执行级联重排
+
+        参数：
+            query (str): 用户查询
+            ranked_lists (list[list[int]]): 各检索器返回的文档下标列表
+
+        返回：
+            tuple: ([(文档下标, 分数), ...], 实际执行到的阶段名列表)
+        """
+        candidates = list(dict.fromkeys(doc_id for ranked in ranked_lists for doc_id in ranked))
+        ranked = [(doc_id, 0.0) for doc_id in candidates]
+        executed = []
+        for stage in self.stages:
+            start = time.perf_counter()
+            scores = stage.score(query, candidates, ranked_lists)
+            ranked = sorted(zip(candidates, scores), key=lambda x: x[1], reverse=True)[:stage.top_k]
+            self.histogram.observe(stage.name, (time.perf_counter() - start) * 1000)
+            executed.append(stage.name)
+
+            candidates = [doc_id for doc_id, _ in ranked]
+            if stage.exit_margin is not None and score_margin([s for _, s in ranked]) >= stage.exit_margin:
+                break
+        return ranked, executed
+
+
+if __name__ == "__main__":
+    print("🔄 初始化级联重排系统...")
+
+    # 1. 准备文档库
+    print("📋 准备文档库...")
+    documents = [
+        "五台山是中国四大佛教名山之一，以文殊菩萨道场闻名。",
+        "云冈石窟是中国三大石窟之一，以精美的佛教雕塑著称。",
+        "平遥古城是中国保存最完整的古代县城之一，被列为世界文化遗产。",
+        "云冈石窟第20窟的露天大佛是云冈石窟的象征。",
+        "山西的煤炭储量丰富，是中国重要的能源基地。",
+        "山西刀削面是著名的面食，历史悠久。",
+        "悬空寺建在恒山金龙峡的悬崖上，距今已有1500多年历史。",
+        "太原是山西省的省会城市。",
+        "乔家大院是清代北方民居建筑的代表。",
+        "壶口瀑布是黄河上的著名瀑布，位于山西吉县。",
+    ]
+    print(f"文档数量: {len(documents)}")
+
+    # 2. 第一阶段检索：用两个简单检索器模拟多路召回（字符重叠 / 字符二元组重叠）
+    def char_overlap_retriever(query, top_k=8):
+        scores = [len(set(query) & set(doc)) for doc in documents]
+        return sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)[:top_k]
+
+    def bigram_retriever(query, top_k=8):
+        query_bigrams = {query[i:i + 2] for i in range(len(query) - 1)}
+        scores = [sum(1 for i in range(len(doc) - 1) if doc[i:i + 2] in query_bigrams) for doc in documents]
+        return sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)[:top_k]
+
+    # 3. 构建级联
+    print("\n🏗️  构建级联: RRF(Top-100) → ColBERT(Top-20) → CrossEncoder(Top-5)")
+    cascade = CascadeReranker([
+        RRFStage(k=60, top_k=100),
+        ColBERTStage(documents, top_k=20, exit_margin=3.0),
+        CrossEncoderStage(documents, top_k=5),
+    ])
+    print("✅ 级联构建完成")
+
+    # 4. 执行查询
+    queries = [
+        "云冈石窟的露天大佛",
+        "山西有哪些著名的旅游景点？",
+        "悬空寺在哪里？",
+    ]
+    for query in queries:
+        print(f"\n{'='*60}")
+        print(f"🔍 查询: {query}")
+        ranked_lists = [char_overlap_retriever(query), bigram_retriever(query)]
+        results, executed = cascade.rerank(query, ranked_lists)
+        print(f"执行阶段: {' → '.join(executed)}"
+              f"{'（提前退出）' if len(executed) < len(cascade.stages) else ''}")
+        for rank, (doc_id, score) in enumerate(results[:3], 1):
+            print(f"  {rank}. [{score:.4f}] {documents[doc_id]}")
+
+    # 5. 导出延迟直方图
+    print(f"\n📊 导出各级延迟直方图到 {HISTOGRAM_PATH}...")
+    histogram = cascade.histogram.export(HISTOGRAM_PATH)
+    for stage, stats in histogram.items():
+        avg = stats["sum_ms"] / stats["count"]
+        print(f"  {stage:<14} 调用 {stats['count']} 次，平均 {avg:.2f} ms")
+
+    print(f"\n📋 级联重排总结:")
+    print("- ✅ 可组合：各级重排器实现同一个score接口，可自由增删")
+    print("- ✅ 逐级预算：越贵的模型处理越少的候选")
+    print("- ✅ 提前退出：置信度高时跳过昂贵阶段")
+    print("- ✅ 可观测：导出每级延迟直方图")
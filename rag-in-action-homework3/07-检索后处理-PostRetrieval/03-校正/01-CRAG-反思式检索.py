@@ -17,7 +17,10 @@ CRAG是一种改进的RAG方法，通过以下步骤提高检索质量：
 
 #1 为3篇博客文章创建索引
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import WebBaseLoader
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "01-数据导入-DataLoading"))
+from web_loader import CachedWebLoader
 from langchain_community.vectorstores import Chroma
 from langchain_openai import OpenAIEmbeddings
 from dotenv import load_dotenv
@@ -33,10 +36,11 @@ urls = [
     "https://lilianweng.github.io/posts/2023-10-25-adv-attack-llm/",      # LLM对抗攻击
 ]
 
-# 使用WebBaseLoader加载每个URL的内容
-docs = [WebBaseLoader(url).load() for url in urls]
-# 将嵌套列表展平为单一文档列表
-docs_list = [item for sublist in docs for item in sublist]
+# 并发抓取所有URL，只保留正文；响应缓存在 .web_cache，再次运行走条件请求（离线时用 mode="replay"）
+loader = CachedWebLoader(urls)
+docs_list = loader.load()
+if loader.errors:  # 没有缓存可退回的 URL 加载失败时直接报错，不悄悄用不完整的文档建索引
+    raise RuntimeError(f"网页加载失败: {loader.errors}")
 
 # 创建文本分割器，使用tiktoken编码器来准确计算token数量
 # chunk_size=250: 每个文档片段最多250个token
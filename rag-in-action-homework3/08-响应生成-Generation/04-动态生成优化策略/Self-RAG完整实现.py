@@ -1,5 +1,8 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import WebBaseLoader
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "01-数据导入-DataLoading"))
+from web_loader import CachedWebLoader
 from langchain_community.vectorstores import Chroma
 from langchain_openai import OpenAIEmbeddings
 from dotenv import load_dotenv
@@ -12,9 +15,11 @@ urls = [
     "https://lilianweng.github.io/posts/2023-10-25-adv-attack-llm/",
 ]
 
-# 加载文档
-docs = [WebBaseLoader(url).load() for url in urls]
-docs_list = [item for sublist in docs for item in sublist]
+# 加载文档（并发抓取 + 磁盘缓存，只保留正文）
+loader = CachedWebLoader(urls)
+docs_list = loader.load()
+if loader.errors:  # 没有缓存可退回的 URL 加载失败时直接报错，不悄悄用不完整的文档建索引
+    raise RuntimeError(f"网页加载失败: {loader.errors}")
 
 # 创建文本分割器
 text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
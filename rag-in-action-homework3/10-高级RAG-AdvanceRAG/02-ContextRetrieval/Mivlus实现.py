@@ -73,6 +73,7 @@ API变更说明：
 │ 标准检索     │ 原始文本块   │ 密集向量搜索 │ 无           │
 │ 上下文检索   │ LLM增强块    │ 密集向量搜索 │ 无           │
 │ 重排序检索   │ LLM增强块    │ 密集向量搜索 │ Cohere重排序 │
+│ 文档多样化   │ LLM增强块    │ 按doc_id分组 │ 批量取父文档 │
 └──────────────┴──────────────┴──────────────┴──────────────┘
 
 🔍 评估体系:
@@ -111,6 +112,11 @@ API变更说明：
    - 启用Cohere重排序
    - 执行检索评估
 
+   实验四: 文档多样化检索
+   - 按doc_id分组检索，top-k名额分给k篇不同的文档
+   - 父文档一次mget批量取回
+   - 对比覆盖的文档数和每个名额的有效上下文
+
 6️⃣ 结果分析
    - 对比三种策略性能
    - 计算性能提升幅度
@@ -145,7 +151,7 @@ from pymilvus.model.dense import SentenceTransformerEmbeddingFunction
 from pymilvus.model.hybrid import BGEM3EmbeddingFunction
 from pymilvus.model.reranker import CohereRerankFunction
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 from typing import Callable
 from pymilvus import (
     MilvusClient,
@@ -173,6 +179,7 @@ class MilvusContextualRetriever:
     2. 混合检索：结合密集向量和稀疏向量的检索
     3. 上下文检索：使用LLM丰富文本块的上下文信息后进行检索
     4. 重排序检索：在检索结果基础上使用专门的重排序模型优化结果
+    5. 文档多样化检索：按doc_id分组检索，每篇文档保留最相关的几个块，父文档一次批量取回
     
     🔄 数据流向:
     文本输入 → [上下文增强] → 向量化 → Milvus存储
@@ -199,6 +206,7 @@ class MilvusContextualRetriever:
         llm_client=None,  # 改用通用LLM客户端名称（支持OpenAI）
         use_reranker=False,
         rerank_function=None,
+        docstore=None,
     ):
         """
         初始化检索器
@@ -233,6 +241,9 @@ class MilvusContextualRetriever:
             use_reranker: 是否使用重排序
                 - 在初步检索结果基础上，使用专门的重排序模型优化结果排序
             rerank_function: 重排序函数（如Cohere Rerank）
+            docstore: 父文档存储（doc_id -> 文档全文），需支持mget/mset（如LangChain InMemoryStore）
+                - 文档多样化检索时用一次mget批量取回命中文档的全文
+                - 默认在第一次add_parent_documents时创建InMemoryStore
         """
         self.collection_name = collection_name
 
@@ -252,6 +263,7 @@ class MilvusContextualRetriever:
 
         self.use_reranker = use_reranker
         self.rerank_function = rerank_function
+        self.docstore = docstore
 
         # 参数验证：如果启用稀疏向量，必须提供稀疏嵌入函数
         if use_sparse is True and sparse_embedding_function:
@@ -280,6 +292,7 @@ class MilvusContextualRetriever:
         │ pk          │ INT64        │ 主键ID         │ 自动          │
         │ dense_vector│ FLOAT_VECTOR │ 语义向量       │ FLAT/IP      │
         │ sparse_vector│ SPARSE_VECTOR│ 关键词向量     │ INVERTED/IP  │
+        │ doc_id      │ VARCHAR      │ 文档ID/分组字段│ 无           │
         │ content     │ VARCHAR      │ 原始内容       │ 动态字段     │
         │ metadata    │ JSON         │ 元数据信息     │ 动态字段     │
         └─────────────┴──────────────┴─────────────────┴──────────────┘
@@ -306,6 +319,9 @@ class MilvusContextualRetriever:
             datatype=DataType.FLOAT_VECTOR,
             dim=self.embedding_function.dim,  # 向量维度由嵌入函数决定
         )
+
+        # 文档ID作为schema字段：分组检索的group_by_field不能是动态字段
+        schema.add_field(field_name="doc_id", datatype=DataType.VARCHAR, max_length=256)
         
         # 如果启用稀疏向量，添加稀疏向量字段
         if self.use_sparse is True:
@@ -490,7 +506,19 @@ class MilvusContextualRetriever:
             data=[data]
         )
 
-    def search(self, query, k=5):
+    def add_parent_documents(self, documents):
+        """
+        父文档写入docstore，供文档多样化检索批量取回
+
+        参数:
+            documents: {doc_id: 文档全文}
+        """
+        if self.docstore is None:
+            from langchain_core.stores import InMemoryStore
+            self.docstore = InMemoryStore()
+        self.docstore.mset(list(documents.items()))
+
+    def search(self, query, k=5, group_size=None):
         """
         搜索相关内容
         
@@ -520,7 +548,8 @@ class MilvusContextualRetriever:
         
         参数:
             query: 查询文本
-            k: 返回结果数量
+            k: 返回结果数量；指定group_size时为返回的不同文档数
+            group_size: 按doc_id分组检索时每篇文档保留的块数，None表示普通检索
         
         返回:
             搜索结果列表，按相关性排序
@@ -533,12 +562,17 @@ class MilvusContextualRetriever:
         
         # 执行标准密集向量搜索
         # 这里使用内积（IP）作为相似度度量
+        # 分组检索：limit表示文档数，每篇文档最多group_size个块，块数不足的短文档也保留
+        group_kwargs = {}
+        if group_size:
+            group_kwargs = {"group_by_field": "doc_id", "group_size": group_size, "strict_group_size": False}
         res = self.client.search(
             collection_name=self.collection_name,
             data=[dense_vec],
             limit=k,
-            output_fields=["content", "contextualized_content"],  # 返回原始内容和上下文化内容
+            output_fields=["doc_id", "content", "contextualized_content"],  # 返回原始内容和上下文化内容
             search_params=search_params,
+            **group_kwargs,
         )
         
         # 使用重排序器进一步优化结果
@@ -564,6 +598,34 @@ class MilvusContextualRetriever:
         
         return res
 
+    def search_documents(self, query, k=5, group_size=2):
+        """
+        文档多样化检索：按doc_id分组检索，再用一次mget批量取回父文档
+
+        普通检索的top-k经常被同一篇文档的多个块占满；分组后k个名额对应k篇不同的文档，
+        每篇保留group_size个最相关的块，每个名额带来的有效上下文更多
+
+        参数:
+            query: 查询文本
+            k: 返回的不同文档数
+            group_size: 每篇文档保留的块数
+
+        返回:
+            [{"doc_id", "score", "chunks", "parent"}, ...]，按文档最高分排序
+        """
+        # 同一文档的命中按出现顺序聚合（重排序后按重排序顺序），第一次出现的即该文档的最高分
+        groups = {}
+        for hit in self.search(query, k=k, group_size=group_size)[0]:
+            doc_id = hit["entity"]["doc_id"]
+            group = groups.setdefault(doc_id, {"doc_id": doc_id, "score": hit["distance"], "chunks": []})
+            group["chunks"].append(hit["entity"]["content"])
+
+        # 一次mget取回全部父文档
+        parents = self.docstore.mget(list(groups)) if self.docstore is not None else [None] * len(groups)
+        for group, parent in zip(groups.values(), parents):
+            group["parent"] = parent
+        return list(groups.values())
+
 
 def evaluate_retrieval(eval_data, retrieval_function, db, k=5):
     """
@@ -705,14 +767,17 @@ def retrieve_base(query: str, db, k: int = 20) -> List[Dict[str, Any]]:
     return db.search(query, k=k)
 
 
-def load_jsonl(file_path: str) -> List[Dict[str, Any]]:
+def load_jsonl(file_path: str) -> Iterator[Dict[str, Any]]:
     """
-    加载JSONL文件并返回字典列表
+    流式加载JSONL文件，逐条产出字典
     
     JSONL格式：每行一个JSON对象，适合存储结构化的评估数据
+    逐行解析，不构造完整列表，评估集再大内存中也只有一条记录
     """
-    with open(file_path, "r") as file:
-        return [json.loads(line) for line in file]
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
 
 
 def evaluate_db(db, original_jsonl_path: str, k):
@@ -957,6 +1022,26 @@ def main():
     # 评估带重排序的检索性能
     reranker_results = evaluate_db(contextual_retriever, "evaluation_set.jsonl", 5)
     
+    # ===============================
+    # 实验四：文档多样化检索
+    # ===============================
+    print("\n===== 实验四：文档多样化检索 =====")
+    print("按doc_id分组检索，5个名额分给5篇不同的文档，父文档一次mget批量取回")
+    
+    contextual_retriever.use_reranker = False
+    parents = {doc["doc_id"]: doc["content"] for doc in dataset}
+    contextual_retriever.add_parent_documents(parents)
+    for item in eval_data:
+        query = item["query"]
+        plain_doc_ids = set(hit["entity"]["doc_id"] for hit in contextual_retriever.search(query, k=5)[0])
+        groups = contextual_retriever.search_documents(query, k=5, group_size=2)
+        # 每个名额的有效上下文：去重后父文档的总字符数 / 名额数
+        plain_context = sum(len(parents[doc_id]) for doc_id in plain_doc_ids) / 5
+        grouped_context = sum(len(group["parent"] or "") for group in groups) / 5
+        print(f"查询: {query[:30]}...")
+        print(f"  普通检索: {len(plain_doc_ids)} 篇文档，每个名额 {plain_context:.0f} 字符")
+        print(f"  分组检索: {len(groups)} 篇文档，每个名额 {grouped_context:.0f} 字符")
+    
     # ===============================
     # 结果对比分析
     # ===============================
@@ -1,9 +1,11 @@
 import os
+import sys
 import getpass
 from typing import Annotated, Sequence, TypedDict, List, Literal
 from pprint import pprint
 
-from langchain_community.document_loaders import WebBaseLoader
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "01-数据导入-DataLoading"))
+from web_loader import CachedWebLoader
 from langchain_community.vectorstores import Chroma
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -29,9 +31,11 @@ urls = [
     # "https://lilianweng.github.io/posts/2023-03-15-prompt-engineering/",
     # "https://lilianweng.github.io/posts/2023-10-25-adv-attack-llm/",
 ]
-# 加载文档
-docs = [WebBaseLoader(url).load() for url in urls]
-docs_list = [item for sublist in docs for item in sublist]
+# 加载文档（并发抓取 + 磁盘缓存，只保留正文）
+loader = CachedWebLoader(urls)
+docs_list = loader.load()
+if loader.errors:  # 没有缓存可退回的 URL 加载失败时直接报错，不悄悄用不完整的文档建索引
+    raise RuntimeError(f"网页加载失败: {loader.errors}")
 # 分块
 splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(chunk_size=100, chunk_overlap=50)
 doc_splits = splitter.split_documents(docs_list)